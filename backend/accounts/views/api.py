@@ -15,6 +15,7 @@ from accounts.serializers.user import (
     UserRegistrationSerializer,
 )
 from games.serializers.game import GameListSerializer
+from core.views.mixins import SparseFieldsetMixin
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import api_view, permission_classes
@@ -23,7 +24,7 @@ from rest_framework.permissions import IsAuthenticated
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing user instances.
     """
@@ -81,7 +82,7 @@ class UserProfileAPIView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class UserGamesAPIView(generics.ListAPIView):
+class UserGamesAPIView(SparseFieldsetMixin, generics.ListAPIView):
     """
     API view for listing user's games
     """
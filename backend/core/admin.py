@@ -1,3 +1,29 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.models import AuditLog, Notification
+from core.pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin for tables too big to count on every changelist page
+    """
+    paginator = EstimatedCountPaginator
+    # Otherwise filtered changelists count the whole table too
+    show_full_result_count = False
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ('title', 'user', 'notification_type', 'is_read', 'created_at')
+    list_filter = ('notification_type', 'is_read')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(LargeTableAdmin):
+    list_display = ('action', 'model_name', 'object_repr', 'user', 'created_at')
+    list_filter = ('action',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
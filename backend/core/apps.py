@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        import core.hot_objects  # noqa: F401
+        import core.metrics  # noqa: F401  (connects the Celery signal handlers)
+        import core.signals  # noqa: F401
+        import core.slow_queries  # noqa: F401  (installs the query log on new connections)
+        import core.task_monitor  # noqa: F401  (connects the Celery signal handlers)
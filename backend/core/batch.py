@@ -0,0 +1,97 @@
+"""
+Chunked, resumable bulk maintenance for large tables.
+
+``batch_delete`` and ``batch_update`` walk a queryset in primary key order and
+touch at most ``batch_size`` rows per statement, so each chunk commits on its
+own and holds its locks only briefly. Each chunk statement keeps the
+conditions of the queryset, so rows that stopped matching after their keys
+were read are left alone. The last processed primary key is
+checkpointed in the cache under ``checkpoint`` so an interrupted run resumes
+where it stopped instead of rescanning the table.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TIMEOUT = 60 * 60 * 24
+
+
+def _checkpoint_key(name):
+    return f'batch:checkpoint:{name}'
+
+
+def _chunks(queryset, batch_size, checkpoint):
+    """
+    Yield lists of primary keys from ``queryset`` in ascending order,
+    persisting the last key of each chunk once the caller has processed it
+    """
+    last_pk = cache.get(_checkpoint_key(checkpoint)) if checkpoint else None
+    queryset = queryset.order_by('pk')
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(page.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        yield pks
+        last_pk = pks[-1]
+        if checkpoint:
+            cache.set(_checkpoint_key(checkpoint), last_pk, CHECKPOINT_TIMEOUT)
+
+    if checkpoint:
+        cache.delete(_checkpoint_key(checkpoint))
+
+
+def _run(queryset, apply, batch_size, sleep, checkpoint):
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    sleep = settings.MAINTENANCE_BATCH_SLEEP if sleep is None else sleep
+
+    started = time.monotonic()
+    rows = batches = 0
+    for pks in _chunks(queryset, batch_size, checkpoint):
+        rows += apply(queryset.filter(pk__in=pks))
+        batches += 1
+        if sleep:
+            time.sleep(sleep)
+
+    seconds = time.monotonic() - started
+    result = {
+        'rows': rows,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds else float(rows),
+    }
+    logger.info(
+        'Batch maintenance on %s: %s rows in %s batches (%s rows/s)',
+        queryset.model._meta.label, rows, batches, result['rows_per_second']
+    )
+    return result
+
+
+def batch_delete(queryset, batch_size=None, sleep=None, checkpoint=None):
+    """
+    Delete every row of ``queryset`` in primary-key-ordered chunks.
+
+    Each chunk goes through the regular ``QuerySet.delete()``, which issues a
+    plain ``DELETE`` without loading the rows into Python when the model has
+    no delete signals and no cascading relations.
+
+    Returns a dict with ``rows``, ``batches``, ``seconds`` and
+    ``rows_per_second``.
+    """
+    def apply(chunk):
+        return chunk.delete()[1].get(queryset.model._meta.label, 0)
+
+    return _run(queryset, apply, batch_size, sleep, checkpoint)
+
+
+def batch_update(queryset, batch_size=None, sleep=None, checkpoint=None, **values):
+    """
+    Apply ``queryset.update(**values)`` in primary-key-ordered chunks.
+
+    Returns the same summary dict as ``batch_delete``.
+    """
+    return _run(queryset, lambda chunk: chunk.update(**values), batch_size, sleep, checkpoint)
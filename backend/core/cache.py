@@ -0,0 +1,344 @@
+"""
+Namespaced cache with O(1) invalidation.
+
+Every key is stored as ``<namespace>:<generation>:<key>``. Invalidating a
+namespace just increments its generation counter: old entries become
+unreachable at once and are left to expire through their TTL, so there's no
+need to scan or ``cache.clear()`` the whole Redis database.
+
+Each namespace also keeps shared hit/miss counters. They're accumulated in
+process and flushed to the cache every ``STATS_FLUSH_EVERY`` lookups so that
+counting doesn't add a round trip to every read.
+
+``TwoTierCache`` puts a bounded per-process LRU in front of a namespace for
+small, read-mostly data (categories, tags, FAQs, public configuration). Saves
+broadcast an invalidation over Redis pub/sub so every process drops its local
+copy.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+
+from core.metrics import CACHE_REQUESTS, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+STATS_FLUSH_EVERY = 50
+
+_MISSING = object()
+
+
+class CacheNamespace:
+    """
+    A group of cache keys that can be invalidated together
+    """
+
+    def __init__(self, name, timeout=300):
+        self.name = name
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+
+    def __repr__(self):
+        return f'<CacheNamespace {self.name}>'
+
+    @property
+    def generation_key(self):
+        return f'ns:{self.name}:generation'
+
+    def generation(self):
+        """
+        Current generation of the namespace
+        """
+        generation = cache.get(self.generation_key)
+        if generation is None:
+            cache.add(self.generation_key, 1, timeout=None)
+            generation = cache.get(self.generation_key) or 1
+        return generation
+
+    def make_key(self, key):
+        return f'{self.name}:{self.generation()}:{key}'
+
+    def get(self, key, default=None):
+        value = cache.get(self.make_key(key), _MISSING)
+        self._record(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key, value, timeout=_MISSING):
+        cache.set(self.make_key(key), value, self.timeout if timeout is _MISSING else timeout)
+
+    def get_many(self, keys):
+        """
+        ``{key: value}`` of the ``keys`` that are cached, in one round trip
+        """
+        generation = self.generation()
+        full_keys = {f'{self.name}:{generation}:{key}': key for key in keys}
+        values = cache.get_many(list(full_keys))
+        for full_key in full_keys:
+            self._record(full_key in values)
+        return {full_keys[full_key]: value for full_key, value in values.items()}
+
+    def set_many(self, values, timeout=_MISSING):
+        generation = self.generation()
+        cache.set_many(
+            {f'{self.name}:{generation}:{key}': value for key, value in values.items()},
+            self.timeout if timeout is _MISSING else timeout
+        )
+
+    def delete(self, key):
+        cache.delete(self.make_key(key))
+
+    def get_or_set(self, key, default, timeout=_MISSING):
+        """
+        Return the cached value for ``key``, computing and storing it with
+        ``default()`` on a miss
+        """
+        full_key = self.make_key(key)
+        value = cache.get(full_key, _MISSING)
+        self._record(value is not _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            cache.set(full_key, value, self.timeout if timeout is _MISSING else timeout)
+        return value
+
+    def invalidate(self):
+        """
+        Drop every key of the namespace by bumping its generation
+        """
+        try:
+            return cache.incr(self.generation_key)
+        except ValueError:
+            # Counter was evicted or never created; any fresh value works as
+            # long as it differs from the generations readers have seen
+            cache.set(self.generation_key, 2, timeout=None)
+            return 2
+
+    def _record(self, hit):
+        record_cache_lookup(self.name, hit)
+        with self._lock:
+            self._pending['hits' if hit else 'misses'] += 1
+            if sum(self._pending.values()) < STATS_FLUSH_EVERY:
+                return
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        self._flush(pending)
+
+    def _flush(self, pending):
+        for counter, count in pending.items():
+            if not count:
+                continue
+            key = f'ns:{self.name}:{counter}'
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                if not cache.add(key, count, timeout=None):
+                    cache.incr(key, count)
+
+    def stats(self):
+        """
+        Hit/miss counters of the namespace across all processes
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        self._flush(pending)
+        hits = cache.get(f'ns:{self.name}:hits') or 0
+        misses = cache.get(f'ns:{self.name}:misses') or 0
+        total = hits + misses
+        return {
+            'generation': self.generation(),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+
+
+games_cache = CacheNamespace('games')
+dashboard_cache = CacheNamespace('dashboard')
+
+NAMESPACES = {namespace.name: namespace for namespace in (games_cache, dashboard_cache)}
+
+
+class TwoTierCache:
+    """
+    In-process LRU with TTL in front of a Redis-backed ``CacheNamespace``.
+
+    Values are produced by loaders registered with ``loader()``. Local reads
+    are a dict lookup under a lock; misses fall through to Redis and then to
+    the loader. ``invalidate()`` clears the key in Redis and publishes it on
+    ``channel`` so other processes evict their local copies. The local TTL
+    (``HOT_CACHE_LOCAL_TIMEOUT``) bounds staleness if a message is missed;
+    setting it to 0 disables the local tier.
+    """
+
+    channel = 'core:two_tier_cache:invalidate'
+
+    def __init__(self, name, timeout=3600):
+        self.name = name
+        self.namespace = CacheNamespace(name, timeout=timeout)
+        self._loaders = {}
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+        self._local_timeout = self._maxsize = None
+        setting_changed.connect(self._reload_settings, weak=False)
+        # Each worker process needs its own subscriber thread
+        os.register_at_fork(after_in_child=self._reset_listener)
+        self.counters = {'local_hits': 0, 'local_misses': 0, 'redis_hits': 0, 'redis_misses': 0}
+        # Bound once; labels() on every local read would cost more than the read
+        self._local_hit_metric = CACHE_REQUESTS.labels(name, 'local', 'hit')
+        self._local_miss_metric = CACHE_REQUESTS.labels(name, 'local', 'miss')
+
+    def __repr__(self):
+        return f'<TwoTierCache {self.name}>'
+
+    def loader(self, key):
+        """
+        Decorator registering the function that computes ``key``
+        """
+        def register(func):
+            self._loaders[key] = func
+            return func
+        return register
+
+    def _reload_settings(self, setting=None, **kwargs):
+        if setting in (None, 'HOT_CACHE_LOCAL_TIMEOUT', 'HOT_CACHE_MAXSIZE'):
+            self._local_timeout = settings.HOT_CACHE_LOCAL_TIMEOUT
+            self._maxsize = settings.HOT_CACHE_MAXSIZE
+
+    def get(self, key):
+        if self._local_timeout is None:
+            self._reload_settings()
+        local_timeout = self._local_timeout
+        if local_timeout:
+            if not self._listening:
+                self._start_listener()
+            now = time.monotonic()
+            with self._lock:
+                entry = self._local.get(key)
+                if entry is not None and entry[0] > now:
+                    self._local.move_to_end(key)
+                    self.counters['local_hits'] += 1
+                    self._local_hit_metric.inc()
+                    return entry[1]
+                self.counters['local_misses'] += 1
+            self._local_miss_metric.inc()
+
+        value = self.namespace.get(key, _MISSING)
+        if value is _MISSING:
+            self.counters['redis_misses'] += 1
+            value = self._loaders[key]()
+            self.namespace.set(key, value)
+        else:
+            self.counters['redis_hits'] += 1
+
+        if local_timeout:
+            self._store_local(key, value, local_timeout)
+        return value
+
+    def _store_local(self, key, value, local_timeout):
+        with self._lock:
+            self._local[key] = (time.monotonic() + local_timeout, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self._maxsize:
+                self._local.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Drop ``key`` from Redis and from the local tier of every process
+        """
+        self.namespace.delete(key)
+        self._evict(key)
+        connection = self._redis()
+        if connection is not None:
+            try:
+                connection.publish(self.channel, f'{self.name}:{key}')
+            except Exception:
+                logger.exception('Could not publish invalidation of %s:%s', self.name, key)
+
+    def warm(self):
+        """
+        Load every registered key into both tiers
+        """
+        for key in self._loaders:
+            self.get(key)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, local_size=len(self._local))
+
+    def _evict(self, key=None):
+        with self._lock:
+            if key is None:
+                self._local.clear()
+            else:
+                self._local.pop(key, None)
+
+    def _redis(self):
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except (ImportError, NotImplementedError):
+            # Not running on django-redis (e.g. tests); local TTL applies
+            return None
+
+    def _reset_listener(self):
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        connection = self._redis()
+        if connection is not None:
+            threading.Thread(
+                target=self._listen, args=(connection,),
+                name=f'{self.name}-invalidation', daemon=True
+            ).start()
+
+    def _listen(self, connection):
+        prefix = f'{self.name}:'
+        while True:
+            try:
+                pubsub = connection.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    data = message['data']
+                    data = data.decode() if isinstance(data, bytes) else data
+                    if data.startswith(prefix):
+                        self._evict(data[len(prefix):])
+            except Exception:
+                logger.exception('Lost %s invalidation channel, retrying', self.name)
+                # Invalidations may have been missed while disconnected
+                self._evict()
+                time.sleep(1)
+
+
+hot_cache = TwoTierCache('hot')
+
+
+def warm_hot_cache():
+    """
+    Process start hook filling ``hot_cache`` before the first request
+    """
+    if not settings.HOT_CACHE_WARM_ON_START:
+        return
+    try:
+        hot_cache.warm()
+    except Exception:
+        # Never keep a worker from booting; the cache fills on first use
+        logger.exception('Could not warm the hot cache')
+
+
+def invalidate_namespaces(*names):
+    """
+    Invalidate the given namespaces by name
+    """
+    for name in names:
+        NAMESPACES[name].invalidate()
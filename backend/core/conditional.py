@@ -0,0 +1,68 @@
+"""
+Validators for conditional GET.
+
+Rarely changing read endpoints answer ``If-None-Match`` and
+``If-Modified-Since`` without touching their serializers: their state is
+described by cheap values, ``updated_at`` columns and the version counters
+kept here, which signal handlers bump whenever the rows behind a response
+change. ``core.views.mixins.ConditionalGetMixin`` turns them into ``ETag``
+and ``Last-Modified`` headers and ``304 Not Modified`` responses.
+
+Each counter is an integer in the cache, incremented atomically, next to the
+time of its last bump for ``Last-Modified``. A counter that was evicted
+starts over at a value no client has seen, modified at that moment.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+VERSION_KEY = 'conditional:version:{}'
+MODIFIED_KEY = 'conditional:modified:{}'
+
+
+def get_versions(*names):
+    """
+    ``({name: version}, last modified datetime)`` of the counters ``names``,
+    one cache round trip when they all exist; None if the cache can't keep
+    them (the dummy backend)
+    """
+    keys = [VERSION_KEY.format(name) for name in names] + [MODIFIED_KEY.format(name) for name in names]
+    values = cache.get_many(keys)
+
+    versions, stamps = {}, []
+    for name in names:
+        version = values.get(VERSION_KEY.format(name))
+        stamp = values.get(MODIFIED_KEY.format(name))
+        if version is None or stamp is None:
+            # Start over at a version no client has seen, modified now
+            cache.add(VERSION_KEY.format(name), time.time_ns(), timeout=None)
+            cache.set(MODIFIED_KEY.format(name), time.time(), timeout=None)
+            version = cache.get(VERSION_KEY.format(name))
+            if version is None:
+                return None
+            stamp = time.time()
+        versions[name] = version
+        stamps.append(stamp)
+    return versions, datetime.fromtimestamp(max(stamps), tz=timezone.utc)
+
+
+def bump_versions(*names):
+    """
+    Change the counters ``names``, making the ETags built on them stale
+    """
+    now = time.time()
+    for name in names:
+        try:
+            cache.incr(VERSION_KEY.format(name))
+        except ValueError:
+            cache.set(VERSION_KEY.format(name), time.time_ns(), timeout=None)
+    cache.set_many({MODIFIED_KEY.format(name): now for name in names}, timeout=None)
+
+
+def make_etag(*parts):
+    """
+    Strong ETag value (unquoted) of ``parts``, which must have stable reprs
+    """
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
@@ -0,0 +1,200 @@
+"""
+System health probes used by ``SystemHealthCheckAPIView``.
+
+CPU, memory and disk are sampled by a background thread so a health request
+never waits on ``psutil.cpu_percent(interval=...)``. Dependency probes run
+concurrently on a shared pool of ``HEALTH_PROBE_WORKERS`` threads, each with a
+deadline, and report their measured round-trip latency. A probe still stuck
+from a previous report isn't started again, so a hung dependency holds one
+thread at most. The composite report is cached for ``HEALTH_CHECK_CACHE_SECONDS`` so
+a burst of health checks costs one round of probes.
+"""
+import copy
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import psutil
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class SystemSampler:
+    """
+    Daemon thread keeping the latest CPU, memory and disk usage
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._latest = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        return {
+            # Percentage since the previous call, so it never blocks
+            'cpu_usage': psutil.cpu_percent(interval=None),
+            'memory_usage': {
+                'total': memory.total,
+                'available': memory.available,
+                'percent': memory.percent,
+                'used': memory.used,
+            },
+            'disk_usage': {
+                'total': disk.total,
+                'used': disk.used,
+                'free': disk.free,
+                'percent': disk.percent,
+            },
+            'sampled_at': time.time(),
+        }
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self._latest = self._sample()
+            except Exception:
+                logger.exception('System sampling failed')
+
+    def latest(self):
+        # (Re)start the thread lazily so forked workers sample themselves
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._latest = self._sample()
+                    threading.Thread(target=self._run, name='health-sampler', daemon=True).start()
+        return self._latest
+
+
+sampler = SystemSampler(interval=settings.HEALTH_SAMPLE_INTERVAL)
+
+
+def probe_database():
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return {'status': 'healthy', 'latency': _elapsed_ms(started)}
+    finally:
+        # Probes run on pool threads, which must not keep connections open
+        connection.close()
+
+
+def probe_cache():
+    started = time.perf_counter()
+    try:
+        from django_redis import get_redis_connection
+        client = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        cache.get('health:ping')
+        return {'status': 'healthy', 'latency': _elapsed_ms(started)}
+    client.ping()
+    latency = _elapsed_ms(started)
+    return {
+        'status': 'healthy',
+        'latency': latency,
+        'used_memory': client.info('memory')['used_memory_human'],
+    }
+
+
+def probe_celery(timeout):
+    from samma.celery import app
+
+    started = time.perf_counter()
+    # ping() is answered by every worker directly, unlike active() which
+    # serializes each worker's task list
+    workers = app.control.inspect(timeout=timeout).ping() or {}
+    return {
+        'status': 'healthy' if workers else 'warning',
+        'latency': _elapsed_ms(started),
+        'active_workers': len(workers),
+    }
+
+
+def probe_paypal(timeout):
+    import paypalrestsdk
+
+    started = time.perf_counter()
+    api = paypalrestsdk.api.default()
+    # The SDK sends requests without a timeout; bound the token request on a
+    # copy so calls made by payments on other threads aren't affected
+    probe_api = copy.copy(api)
+    probe_api.http_call = functools.partial(api.http_call, timeout=timeout)
+    token = probe_api.get_access_token()
+    api.token_hash, api.token_request_at = probe_api.token_hash, probe_api.token_request_at
+    return {'status': 'healthy' if token else 'unhealthy', 'latency': _elapsed_ms(started)}
+
+
+_pool = {'pid': None, 'executor': None, 'pending': {}}
+_pool_lock = threading.Lock()
+
+
+def _submit(name, probe):
+    """
+    Start ``probe`` on the shared pool unless its previous run is still
+    going, and return its future
+    """
+    with _pool_lock:
+        # Pool threads don't survive a fork; each worker starts its own pool
+        if _pool['pid'] != os.getpid():
+            _pool.update(pid=os.getpid(), pending={}, executor=ThreadPoolExecutor(
+                max_workers=settings.HEALTH_PROBE_WORKERS, thread_name_prefix='health-probe'
+            ))
+        future = _pool['pending'].get(name)
+        if future is None or future.done():
+            future = _pool['pending'][name] = _pool['executor'].submit(probe)
+        return future
+
+
+def run_probes(probes, timeout):
+    """
+    Run ``{name: callable}`` probes concurrently and return their results.
+
+    A probe that raises is reported as unhealthy with the error; one that
+    misses the deadline is reported as ``timeout`` and left to finish in the
+    background, where later reports wait on it instead of starting another.
+    """
+    futures = {name: _submit(name, probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = {'status': 'timeout', 'error': f'No answer within {timeout}s'}
+        elif future.exception() is not None:
+            results[name] = {'status': 'unhealthy', 'error': str(future.exception())}
+        else:
+            results[name] = future.result()
+    return results
+
+
+_report = {'value': None, 'expires': 0}
+_report_lock = threading.Lock()
+
+
+def health_report(build):
+    """
+    Return the cached composite report, calling ``build()`` at most once per
+    ``HEALTH_CHECK_CACHE_SECONDS`` even under concurrent requests
+    """
+    if _report['expires'] > time.monotonic():
+        return _report['value']
+    with _report_lock:
+        if _report['expires'] <= time.monotonic():
+            _report['value'] = build()
+            _report['expires'] = time.monotonic() + settings.HEALTH_CHECK_CACHE_SECONDS
+    return _report['value']
@@ -0,0 +1,15 @@
+"""
+Loaders for core rows served from ``core.cache.hot_cache``.
+"""
+from core.cache import hot_cache
+from core.models import SystemConfiguration, FAQ
+
+
+@hot_cache.loader('faqs')
+def load_faqs():
+    return list(FAQ.objects.filter(is_active=True).order_by('category', 'order'))
+
+
+@hot_cache.loader('public_configs')
+def load_public_configs():
+    return list(SystemConfiguration.objects.filter(is_public=True))
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+import io
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from core.renderers import ORJSONParser, ORJSONRenderer, msgpack
+from payments.export import encode_ndjson
+
+
+def _cpu_us(func, rounds):
+    """
+    Best CPU time of ``rounds`` calls to ``func``, in microseconds
+    """
+    best = None
+    for _ in range(rounds):
+        started = time.process_time()
+        func()
+        elapsed = (time.process_time() - started) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _game_list(count):
+    """
+    A page of the game list as its serializer outputs it
+    """
+    now = timezone.now()
+    return {
+        'next': None,
+        'previous': None,
+        'results': [
+            {
+                'id': i, 'title': f'Game {i}', 'slug': f'game-{i}', 'price': '9.99',
+                'thumbnail': f'https://127.0.0.1:8443/media/game_thumbnails/game-{i}.png',
+                'seller': {'id': 1, 'username': 'seller', 'first_name': 'Sam', 'last_name': 'Seller'},
+                'category': {'id': 1, 'name': 'Action', 'slug': 'action', 'icon': None},
+                'rating': '7.50', 'total_sales': i * 3, 'is_active': True,
+                'created_at': (now - timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _export_rows(count):
+    """
+    Payment export rows as ``values_list`` reads them
+    """
+    now = timezone.now()
+    return [
+        (i, now, now, 'completed', i, f'Game {i}', 'buyer', 'seller',
+         Decimal('9.99'), Decimal('0.50'), Decimal('9.49'), f'PAY-{i}')
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the CPU time of the stdlib json based DRF renderer and parser with the orjson ones '
+        '(and MessagePack when installed) on a game list page and on payment export rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objects', type=int, default=1000, help='Games and export rows per round')
+        parser.add_argument('--rounds', type=int, default=20, help='Rounds per measurement, the best one counts')
+
+    def handle(self, *args, **options):
+        count, rounds = options['objects'], options['rounds']
+        page = _game_list(count)
+        rendered = JSONRenderer().render(page)
+        rows = _export_rows(count)
+        header = [f'column_{i}' for i in range(len(rows[0]))]
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+
+        cases = [
+            ('render', lambda: JSONRenderer().render(page), lambda: ORJSONRenderer().render(page)),
+            (
+                'parse',
+                lambda: JSONParser().parse(io.BytesIO(rendered)),
+                lambda: ORJSONParser().parse(io.BytesIO(rendered)),
+            ),
+            (
+                'ndjson',
+                lambda: '\n'.join(encoder.encode(dict(zip(header, row))) for row in rows).encode(),
+                lambda: list(encode_ndjson(header, rows)),
+            ),
+        ]
+        self.stdout.write(f'{"case":<10} {"json µs/obj":>12} {"orjson µs/obj":>14} {"speedup":>8}')
+        for name, stdlib, fast in cases:
+            stdlib_us, fast_us = _cpu_us(stdlib, rounds), _cpu_us(fast, rounds)
+            self.stdout.write(
+                f'{name:<10} {stdlib_us / count:>12.2f} {fast_us / count:>14.2f} {stdlib_us / fast_us:>7.1f}x'
+            )
+
+        if msgpack is None:
+            self.stdout.write('msgpack is not installed, MessagePack skipped')
+            return
+        from core.renderers import MessagePackRenderer
+        packed = MessagePackRenderer().render(page)
+        packed_us = _cpu_us(lambda: MessagePackRenderer().render(page), rounds)
+        self.stdout.write(
+            f'msgpack render {packed_us / count:.2f} µs/obj, '
+            f'{len(packed)} bytes against {len(rendered)} for JSON'
+        )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from samma.celery import app
+
+
+class Command(BaseCommand):
+    help = 'Starts a Celery worker consuming one queue with the settings of its CELERY_WORKER_PROFILES entry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queue', help=f'One of: {", ".join(settings.CELERY_WORKER_PROFILES)}')
+        parser.add_argument('--concurrency', type=int, help='Override the number of worker processes')
+        parser.add_argument('--loglevel', default='INFO')
+        parser.add_argument('--include', help='Comma separated modules with extra tasks to register')
+
+    def handle(self, *args, **options):
+        queue = options['queue']
+        profile = settings.CELERY_WORKER_PROFILES.get(queue)
+        if profile is None:
+            raise CommandError(f'Unknown queue {queue!r}, expected one of {", ".join(settings.CELERY_WORKER_PROFILES)}')
+
+        argv = [
+            'worker',
+            f'--queues={queue}',
+            f'--hostname={queue}@%h',
+            f'--concurrency={options["concurrency"] or profile["concurrency"]}',
+            f'--prefetch-multiplier={profile["prefetch_multiplier"]}',
+            f'--loglevel={options["loglevel"]}',
+        ]
+        if options['include']:
+            argv.append(f'--include={options["include"]}')
+        if profile.get('max_tasks_per_child'):
+            argv.append(f'--max-tasks-per-child={profile["max_tasks_per_child"]}')
+        app.worker_main(argv=argv)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from core.slow_queries import report, reset
+
+
+class Command(BaseCommand):
+    help = 'Prints the SQL fingerprints that take the most database time across all workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Number of fingerprints to show')
+        parser.add_argument(
+            '--order', choices=['total', 'count', 'mean', 'p95'], default='total',
+            help='Column to rank by'
+        )
+        parser.add_argument('--width', type=int, default=160, help='Truncate SQL to this many characters')
+        parser.add_argument('--reset', action='store_true', help='Clear the collected statistics')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset()
+            self.stdout.write(self.style.SUCCESS('Query statistics cleared'))
+            return
+
+        rows = report(order_by=options['order'])
+        if not rows:
+            self.stdout.write('No queries recorded yet')
+            return
+
+        grand_total = sum(row['total'] for row in rows)
+        self.stdout.write(
+            f'{"fingerprint":<16} {"count":>9} {"total ms":>11} {"share":>6} {"mean ms":>9} {"p95 ms":>8}  sql'
+        )
+        for row in rows[:options['top']]:
+            p95 = '>10000' if row['p95'] == float('inf') else row['p95']
+            share = row['total'] / grand_total * 100 if grand_total else 0
+            self.stdout.write(
+                f'{row["fingerprint"]:<16} {row["count"]:>9} {row["total"]:>11.1f} {share:>5.1f}% '
+                f'{row["mean"]:>9.2f} {p95:>8}  {row["sql"][:options["width"]]}'
+            )
@@ -0,0 +1,166 @@
+"""
+Prometheus instrumentation for requests, database, cache and Celery.
+
+Metrics are recorded with ``prometheus_client``. When the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable is set (it must be for
+gunicorn or Celery prefork), every process writes its samples to that
+directory and ``render_metrics`` aggregates them, so a scrape sees the whole
+fleet instead of whichever worker answered.
+
+Celery workers run in their own containers, so each service gets its own
+``PROMETHEUS_MULTIPROC_DIR`` below a shared ``PROMETHEUS_MULTIPROC_ROOT``
+(process ids, which name the sample files, repeat across containers). With
+the root set, ``render_metrics`` merges the samples of every service.
+"""
+import glob
+import os
+import shutil
+import time
+
+from celery.signals import (
+    beat_init,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TASK_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+REQUEST_LATENCY = Histogram(
+    'samma_http_request_duration_seconds',
+    'Request latency by view and action',
+    ['view', 'action', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'samma_http_request_db_queries',
+    'Number of SQL queries per request',
+    ['view', 'action'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'samma_http_request_db_duration_seconds',
+    'Time spent in SQL per request',
+    ['view', 'action'],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    'samma_cache_requests_total',
+    'Cache lookups by namespace, tier and result',
+    ['namespace', 'tier', 'result'],
+)
+TASK_DURATION = Histogram(
+    'samma_celery_task_duration_seconds',
+    'Celery task run time',
+    ['task', 'state'],
+    buckets=TASK_BUCKETS,
+)
+TASK_QUEUE_LAG = Histogram(
+    'samma_celery_task_queue_lag_seconds',
+    'Time between publishing a task and a worker starting it',
+    ['task'],
+    buckets=TASK_BUCKETS,
+)
+TASK_RETRIES = Counter(
+    'samma_celery_task_retries_total',
+    'Celery task retries',
+    ['task'],
+)
+TASK_SINGLETON_CONTENTION = Counter(
+    'samma_celery_singleton_contention_total',
+    'Runs of singleton tasks that found the previous run still going',
+    ['task', 'action'],
+)
+
+
+def record_cache_lookup(namespace, hit, tier='redis'):
+    CACHE_REQUESTS.labels(namespace, tier, 'hit' if hit else 'miss').inc()
+
+
+class ServicesCollector:
+    """
+    Samples of all the services writing below ``root``, one directory each
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def collect(self):
+        files = glob.glob(os.path.join(self.root, '*', '*.db'))
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def render_metrics():
+    """
+    Return ``(body, content_type)`` in the Prometheus text format
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_ROOT'):
+        registry = CollectorRegistry()
+        registry.register(ServicesCollector(os.environ['PROMETHEUS_MULTIPROC_ROOT']))
+    elif os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# Celery task instrumentation
+
+_task_started = {}
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at:
+        TASK_QUEUE_LAG.labels(task.name).observe(max(time.time() - published_at, 0))
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+@task_retry.connect
+def _task_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@worker_init.connect
+@beat_init.connect
+def _reset_multiproc_dir(**kwargs):
+    # Samples left by a previous run would be added to the new totals
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+@worker_process_shutdown.connect
+def _mark_process_dead(pid=None, **kwargs):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,117 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from core.metrics import REQUEST_DB_TIME, REQUEST_LATENCY, REQUEST_QUERIES
+from core.profiling import RequestProfile, profiling_requested, save_profile
+from core.query_budget import QueryRecorder, check_queries, view_budget
+from core.slow_queries import query_origin
+
+
+def view_labels(view_func, method):
+    """
+    Return a ``(view, action)`` pair naming the view that handles a request,
+    e.g. ``('GameViewSet', 'list')`` or ``('TopGamesAPIView', 'get')``
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    name = view_class.__name__ if view_class else view_func.__name__
+    actions = getattr(view_func, 'actions', None) or {}
+    return name, actions.get(method.lower(), method.lower())
+
+
+class QueryStats:
+    """
+    ``connection.execute_wrapper`` callable counting and timing queries
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Record per-view latency, SQL query count and SQL time, and label the
+    request's queries with its view for the slow query log
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryStats()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            try:
+                response = self.get_response(request)
+            finally:
+                query_origin.set(None)
+        duration = time.perf_counter() - started
+
+        view, action = getattr(request, 'metrics_view', ('unresolved', ''))
+        REQUEST_LATENCY.labels(view, action, request.method, response.status_code).observe(duration)
+        REQUEST_QUERIES.labels(view, action).observe(queries.count)
+        REQUEST_DB_TIME.labels(view, action).observe(queries.duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_labels(view_func, request.method)
+        query_origin.set('{}.{}'.format(*request.metrics_view))
+
+
+class QueryBudgetMiddleware:
+    """
+    Flag N+1 query patterns and enforce the budgets declared with
+    ``core.query_budget.query_budget``
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_BUDGET_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(settings.QUERY_BUDGET_REPEAT_THRESHOLD)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        view, budget = getattr(request, 'query_budget', (request.path, None))
+        check_queries(recorder, view, budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view, action = view_labels(view_func, request.method)
+        request.query_budget = (f'{view}.{action}', view_budget(view_func, action))
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests of staff users who ask for it, see ``core.profiling``.
+
+    Must come after ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (settings.PROFILING_ENABLED and profiling_requested(request) and request.user.is_staff):
+            return self.get_response(request)
+
+        # DRF replaces request.user with the user it authenticates
+        user = request.user
+        with RequestProfile(settings.PROFILING_INTERVAL).record() as profile:
+            response = self.get_response(request)
+        response['X-Profile-Id'] = save_profile(request, response, profile, user)
+        return response
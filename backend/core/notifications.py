@@ -0,0 +1,62 @@
+"""
+Bulk notification fan-out helpers.
+
+These stream user ids out of the database in chunks and insert notifications
+with ``bulk_create`` so that notifying hundreds of thousands of users costs a
+handful of queries per batch instead of one INSERT per user.
+"""
+from django.db.models import Exists, OuterRef
+
+from core.models import Notification
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def exclude_already_notified(users, campaign, since):
+    """
+    Drop users that already received a notification for ``campaign``.
+
+    ``since`` bounds how far back a previous notification counts; pass an
+    ``OuterRef`` (e.g. ``OuterRef('last_login')``) to compare against a
+    column of the user row. The check runs in the database as a correlated
+    ``EXISTS`` so it never loads notifications into Python.
+    """
+    already_notified = Notification.objects.filter(
+        user=OuterRef('pk'),
+        data__campaign=campaign,
+        created_at__gte=since,
+    )
+    return users.exclude(Exists(already_notified))
+
+
+def bulk_notify(rows, notification_type, title, message, campaign=None,
+                batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create one notification per ``(user_id, data)`` pair in ``rows``.
+
+    ``rows`` may be any iterable, typically a ``values_list(...).iterator()``,
+    and is consumed lazily. Notifications are inserted in batches of
+    ``batch_size``. Returns the number of notifications created.
+    """
+    created = 0
+    batch = []
+    for user_id, data in rows:
+        data = dict(data or {})
+        if campaign:
+            data['campaign'] = campaign
+        batch.append(Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            data=data,
+        ))
+        if len(batch) >= batch_size:
+            Notification.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+
+    if batch:
+        Notification.objects.bulk_create(batch)
+        created += len(batch)
+    return created
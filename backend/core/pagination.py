@@ -0,0 +1,260 @@
+"""
+Pagination for large tables.
+
+``KeysetPagination`` pages through a queryset ordered by ``ordering`` (a
+tuple of model fields ending with a unique one, ``('-created_at', '-id')``
+by default) by filtering on the position of the last row seen instead of
+using ``OFFSET``, and never counts, so every page costs the same index range
+scan however deep it is. Positions travel in opaque ``cursor`` parameters of
+the ``next`` and ``previous`` links.
+
+Views opt in by setting ``pagination_class``; subclass it to change the
+ordering::
+
+    class AdScorePagination(KeysetPagination):
+        ordering = ('-ad_score', '-id')
+
+A view whose queryset is an OR of disjoint conditions that are each served
+by their own index can list them in a ``keyset_branches`` attribute. Pages
+are then read from every branch separately and merged, the plan of a
+``UNION ALL`` with a ``LIMIT`` per branch, where the OR would scan one index
+and filter, or sort everything.
+
+Where page numbers and a total are wanted, ``EstimatedCountPaginator`` (for
+the admin) and ``EstimatedCountPagination`` (for DRF) take the count from
+the PostgreSQL planner's estimate when it's above
+``ESTIMATED_COUNT_THRESHOLD`` rows, and count exactly below that.
+"""
+import base64
+import datetime
+import json
+import operator
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _cursor_value(value):
+    # Full precision, unlike DjangoJSONEncoder which cuts microseconds
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.parse_position(queryset.model, position)
+
+        ordering = self.reversed_ordering() if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        fields, deferred = queryset.query.deferred_loading
+        if not deferred:
+            # Positions are read from the rows, keep their fields loaded
+            queryset = queryset.only(*fields, *(field.lstrip('-') for field in self.ordering))
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        branches = getattr(view, 'keyset_branches', None)
+        if branches and len(branches) > 1:
+            # A page of each branch along its own index, then the best of them
+            results = []
+            for branch in branches:
+                results.extend(queryset.filter(branch)[:page_size + 1])
+            results = self.sort(results, ordering)[:page_size + 1]
+        else:
+            results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if self.reverse:
+            results.reverse()
+
+        # Going forward there is a previous page if we came from one, and the
+        # other way around
+        self.has_next = has_more if not self.reverse else position is not None
+        self.has_previous = has_more if self.reverse else position is not None
+        self.first = self.position_of(results[0]) if results else position
+        self.last = self.position_of(results[-1]) if results else position
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def reversed_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def after(self, ordering, position):
+        """
+        Rows past ``position`` in ``ordering``: ``(a, b) < (x, y)`` written as
+        ``a <= x AND (a < x OR (a = x AND b < y))``, whose leading range on
+        ``a`` bounds the index scan
+        """
+        fields = [(field.lstrip('-'), field.startswith('-'), value) for field, value in zip(ordering, position)]
+
+        condition = Q()
+        for index, (name, descending, value) in enumerate(fields):
+            equal = {previous: previous_value for previous, _descending, previous_value in fields[:index]}
+            condition |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+
+        name, descending, value = fields[0]
+        return Q(**{f'{name}__{"lte" if descending else "gte"}': value}) & condition
+
+    def sort(self, rows, ordering):
+        """
+        ``rows`` in ``ordering``, by stable sorts from the last field to the first
+        """
+        get = operator.getitem if rows and isinstance(rows[0], dict) else getattr
+        for field in reversed(ordering):
+            name = field.lstrip('-')
+            rows.sort(key=lambda row: get(row, name), reverse=field.startswith('-'))
+        return rows
+
+    def position_of(self, instance):
+        if isinstance(instance, dict):
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position, reverse = data['p'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def parse_position(self, model, position):
+        """
+        Values of a decoded ``position`` converted by their model fields, so
+        a tampered cursor is a 404 rather than an error building the query
+        """
+        values = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            try:
+                value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(data, default=_cursor_value).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AdScorePagination(KeysetPagination):
+    ordering = ('-ad_score', '-id')
+
+
+class AcquiredAtPagination(KeysetPagination):
+    ordering = ('-acquired_at', '-id')
+
+
+def estimate_count(queryset):
+    """
+    PostgreSQL's estimate of the number of rows of ``queryset``: the table's
+    ``reltuples`` if it's unfiltered, the planner's row estimate otherwise.
+    None on other databases or before the table was first analyzed
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # -1 until the first VACUUM or ANALYZE
+            return row[0] if row and row[0] >= 0 else None
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting exactly only below ``ESTIMATED_COUNT_THRESHOLD`` rows
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
@@ -0,0 +1,228 @@
+"""
+On-demand profiling of single requests for staff.
+
+A staff user with a session sends an ``X-Profile`` header, or adds
+``?_profile=1``, and the request's stack is sampled every
+``PROFILING_INTERVAL`` seconds into a call tree while its SQL queries and
+cache calls are timed. The profile is kept in the cache for
+``PROFILING_TTL`` seconds under the id returned in the ``X-Profile-Id``
+response header, and served to admins at ``/api/v1/core/profiles/<id>/``.
+
+Every other request only pays for a header lookup.
+"""
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.utils import timezone
+
+PROFILE_KEY = 'profiling:profile:{}'
+INDEX_KEY = 'profiling:index'
+INDEX_SIZE = 50
+TOP_FUNCTIONS = 50
+# Call tree branches below this share of the request time are pruned
+TREE_MIN_SHARE = 0.005
+
+CACHE_METHODS = (
+    'get', 'set', 'add', 'delete', 'touch', 'incr', 'decr', 'has_key',
+    'get_many', 'set_many', 'delete_many',
+)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def profiling_requested(request):
+    return 'HTTP_X_PROFILE' in request.META or '_profile=' in request.META.get('QUERY_STRING', '')
+
+
+def _label(function):
+    filename, line, name = function
+    return f'{name} ({filename}:{line})' if line else name
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one thread every ``interval`` seconds into a call
+    tree, stopping at ``root`` (the frame that started profiling)
+    """
+
+    def __init__(self, thread_id, root, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.samples = 0
+        self.tree = {}
+        self.leaves = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if not stack:
+                continue
+            self.samples += 1
+            self.leaves[stack[0]] += 1
+            children = self.tree
+            for function in reversed(stack):
+                node = children.setdefault(function, {'samples': 0, 'children': {}})
+                node['samples'] += 1
+                children = node['children']
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfile:
+    """
+    Sampled call tree plus SQL and cache timelines of one request
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.sampler = None
+        self.queries = []
+        self.cache_calls = []
+        self.started = None
+        self.duration = None
+
+    def _execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'start': _ms(started - self.started),
+                'duration': _ms(time.perf_counter() - started),
+                'sql': sql,
+                'many': many,
+            })
+
+    def _timed_cache_method(self, backend, name):
+        method = getattr(backend, name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.cache_calls.append({
+                    'start': _ms(started - self.started),
+                    'duration': _ms(time.perf_counter() - started),
+                    'method': name,
+                    'key': str(args[0])[:200] if args else None,
+                })
+        return timed
+
+    @contextmanager
+    def record(self):
+        # Cache backends are per thread, so shadowing their methods only
+        # affects the request being profiled
+        backend = caches['default']
+        for name in CACHE_METHODS:
+            setattr(backend, name, self._timed_cache_method(backend, name))
+        # The frame running the ``with`` block; contextmanager's __enter__
+        # sits between it and this generator
+        root = sys._getframe(2)
+        self.sampler = StackSampler(threading.get_ident(), root, self.interval)
+        self.started = time.perf_counter()
+        self.sampler.start()
+        try:
+            with connection.execute_wrapper(self._execute):
+                yield self
+        finally:
+            self.sampler.stop()
+            self.duration = time.perf_counter() - self.started
+            for name in CACHE_METHODS:
+                backend.__dict__.pop(name, None)
+
+    def _estimate(self, samples):
+        return _ms(self.duration * samples / self.sampler.samples)
+
+    def call_tree(self):
+        """
+        Nested ``{function, samples, time, children}``; times are estimated
+        from each function's share of the samples
+        """
+        minimum = self.sampler.samples * TREE_MIN_SHARE
+
+        def nodes(children):
+            return [
+                {
+                    'function': _label(function),
+                    'samples': node['samples'],
+                    'time': self._estimate(node['samples']),
+                    'children': nodes(node['children']),
+                }
+                for function, node in sorted(children.items(), key=lambda item: -item[1]['samples'])
+                if node['samples'] >= minimum
+            ]
+        return nodes(self.sampler.tree)
+
+    def top_functions(self):
+        """
+        Functions most often found running, i.e. with the most self time
+        """
+        return [
+            {'function': _label(function), 'samples': samples, 'time': self._estimate(samples)}
+            for function, samples in self.sampler.leaves.most_common(TOP_FUNCTIONS)
+        ]
+
+
+def save_profile(request, response, profile, user):
+    """
+    Store ``profile`` and add it to the index; returns its id
+    """
+    profile_id = uuid.uuid4().hex
+    now = timezone.now()
+    summary = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'user': user.get_username(),
+        'status': response.status_code,
+        'duration': _ms(profile.duration),
+        'queries': len(profile.queries),
+        'cache_calls': len(profile.cache_calls),
+        'samples': profile.sampler.samples,
+        'created_at': now.isoformat(),
+        'expires_at': (now + timedelta(seconds=settings.PROFILING_TTL)).isoformat(),
+    }
+    cache.set(PROFILE_KEY.format(profile_id), dict(
+        summary,
+        sql_time=round(sum(query['duration'] for query in profile.queries), 3),
+        call_tree=profile.call_tree(),
+        top_functions=profile.top_functions(),
+        sql=profile.queries,
+        cache=profile.cache_calls,
+    ), settings.PROFILING_TTL)
+    index = [summary] + (cache.get(INDEX_KEY) or [])
+    cache.set(INDEX_KEY, index[:INDEX_SIZE], settings.PROFILING_TTL)
+    return profile_id
+
+
+def get_profile(profile_id):
+    return cache.get(PROFILE_KEY.format(profile_id))
+
+
+def recent_profiles():
+    """
+    Summaries of the latest profiles that haven't expired yet
+    """
+    now = timezone.now().isoformat()
+    return [summary for summary in cache.get(INDEX_KEY) or [] if summary['expires_at'] > now]
@@ -0,0 +1,138 @@
+"""
+Per-request SQL query budgets and N+1 detection.
+
+``QueryBudgetMiddleware`` counts the queries each request runs. A query shape
+(the SQL with ``IN`` lists and literals collapsed) repeated
+``QUERY_BUDGET_REPEAT_THRESHOLD`` times is reported as a likely N+1 together
+with the stack that issued it, and views declaring a limit with
+``query_budget()`` are checked against it.
+
+With ``QUERY_BUDGET_RAISE`` (on in tests) a violation raises
+``QueryBudgetExceeded``; otherwise it's logged as a warning. Only
+``QUERY_BUDGET_SAMPLE_RATE`` of requests are tracked, and shapes are only
+normalized when the response is checked, so the per-query cost is a dict
+increment.
+"""
+import logging
+import re
+import traceback
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STACK_DEPTH = 8
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A request ran more queries than its budget or repeated a query shape
+    """
+
+
+def query_budget(limit=None, **actions):
+    """
+    Declare the maximum number of queries a view may run per request.
+
+    Decorates function views and view classes. Viewsets can set limits per
+    action, e.g. ``@query_budget(list=4, retrieve=3)``; ``limit`` applies to
+    the other actions.
+    """
+    def decorate(view):
+        view.query_budget = {None: limit, **actions}
+        return view
+    return decorate
+
+
+def view_budget(view_func, action):
+    """
+    Budget declared for ``action`` of ``view_func``, or None
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budgets = getattr(view_class, 'query_budget', None) or getattr(view_func, 'query_budget', None)
+    if not budgets:
+        return None
+    return budgets.get(action, budgets[None])
+
+
+def query_shape(sql):
+    """
+    Normalize ``sql`` so queries differing only in values compare equal
+    """
+    return _LITERAL.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+def _stack_sample():
+    """
+    Innermost project frames of the current stack, outside this module
+    """
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return [f'{frame.filename}:{frame.lineno} in {frame.name}' for frame in frames[-STACK_DEPTH:]]
+
+
+class QueryRecorder:
+    """
+    ``connection.execute_wrapper`` callable collecting query shapes
+    """
+
+    def __init__(self, repeat_threshold):
+        self.repeat_threshold = repeat_threshold
+        self.counts = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.counts[sql] += 1
+        # Only the repetition that crosses the threshold pays for a stack
+        if self.counts[sql] == self.repeat_threshold:
+            self.stacks[sql] = _stack_sample()
+        return execute(sql, params, many, context)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def repeated(self):
+        """
+        ``[(shape, count, stack)]`` for shapes run at least
+        ``repeat_threshold`` times, most frequent first
+        """
+        shapes = Counter()
+        stacks = {}
+        for sql, count in self.counts.items():
+            shape = query_shape(sql)
+            shapes[shape] += count
+            if sql in self.stacks:
+                stacks.setdefault(shape, self.stacks[sql])
+        return [
+            (shape, count, stacks.get(shape) or [])
+            for shape, count in shapes.most_common()
+            if count >= self.repeat_threshold
+        ]
+
+
+def check_queries(recorder, view, budget=None):
+    """
+    Report budget overruns and repeated shapes recorded for ``view``
+    """
+    problems = []
+    if budget is not None and recorder.total > budget:
+        problems.append(f'{recorder.total} queries, budget is {budget}')
+    for shape, count, stack in recorder.repeated():
+        problems.append(
+            f'possible N+1: {count} x {shape}\n' + '\n'.join(f'    {frame}' for frame in stack)
+        )
+    if not problems:
+        return
+    message = f'Query budget violated by {view}:\n' + '\n'.join(f'  - {problem}' for problem in problems)
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,125 @@
+"""
+Fast JSON and MessagePack renderers and parsers for the API.
+
+``ORJSONRenderer`` and ``ORJSONParser`` are drop-in replacements for DRF's
+``JSONRenderer`` and ``JSONParser`` built on orjson. Output is the same as
+DRF's: datetimes are ISO 8601 with ``Z`` for UTC, decimals the serializers
+didn't already turn into strings become numbers, and ``\\u2028``/``\\u2029``
+are escaped. NaN and infinities raise ``ValueError`` as with ``STRICT_JSON``;
+orjson writes them as ``null``, so output containing ``null`` is checked for
+them. Pretty printing (``indent``, as asked for by the browsable API),
+non-compact, non-strict or ASCII-only settings and values orjson can't encode
+(such as integers over 64 bits or non-string keys) go through the DRF
+renderer.
+
+``MessagePackRenderer`` and ``MessagePackParser`` serve
+``application/msgpack`` to internal consumers. They need the optional
+``msgpack`` package and are only offered when it's installed.
+"""
+import codecs
+import math
+from decimal import Decimal
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+# How DRF's encoder represents everything that isn't plain JSON
+encode_default = JSONEncoder().default
+
+
+def has_non_finite(value):
+    """
+    Whether ``value`` holds a NaN or infinite float or decimal
+    """
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, Decimal):
+        return not value.is_finite()
+    if isinstance(value, dict):
+        return any(has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(has_non_finite(item) for item in value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` encoding with orjson
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            not self.compact or not self.strict or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'null' in ret and has_non_finite(data):
+            raise ValueError('Out of range float values are not JSON compliant')
+        # orjson writes U+2028 and U+2029 as is, like any other character;
+        # isascii() is much quicker than searching for them
+        if not ret.isascii():
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """
+    ``JSONParser`` decoding with orjson
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            data = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the same values as the JSON renderers, as MessagePack
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except ValueError as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
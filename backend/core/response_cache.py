@@ -0,0 +1,99 @@
+"""
+Server-side cache of whole responses to anonymous GET requests.
+
+Views opt in with ``core.views.mixins.ResponseCacheMixin``. A request is
+anonymous when it carries neither an ``Authorization`` header nor a session
+or messages cookie, which is decided from headers alone: hits are served
+before authentication, so without a single database query.
+
+Entries are keyed by path (with its language prefix), active language,
+query string with its parameters sorted and ``utm_*`` ones dropped, and
+``Accept`` header. Each entry is tagged with surrogate keys such as
+``game:<id>``, ``category:<id>``, ``games`` or ``ranking``, stored together
+with their versions at the time. Tags are the version counters of
+``core.conditional``: purging one just bumps it, and entries built against
+an older version are treated as misses on their next read, so no index of
+entries per tag is needed.
+
+Counters updated in place without signals (sales totals) aren't purged;
+``RESPONSE_CACHE_TIMEOUT`` bounds how stale they get.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.translation import get_language
+
+from core.conditional import bump_versions, get_versions
+
+ENTRY_KEY = 'response:{}'
+ANONYMOUS_METHODS = ('GET', 'HEAD')
+# Response headers worth replaying on a hit
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary', 'Content-Language')
+
+
+def is_anonymous(request):
+    return (
+        request.method in ANONYMOUS_METHODS
+        and 'HTTP_AUTHORIZATION' not in request.META
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def cache_key(request):
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists() if not name.startswith('utm_')
+        for value in values
+    )
+    # Bodies hold absolute URLs (pagination links, thumbnails), which differ
+    # by host and scheme
+    raw = repr((
+        request.scheme, request.get_host(), request.path, get_language(), params,
+        request.META.get('HTTP_ACCEPT', ''),
+    ))
+    return ENTRY_KEY.format(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def get_response(request):
+    """
+    The cached response to ``request``, None on a miss
+    """
+    entry = cache.get(cache_key(request))
+    if entry is None:
+        return None
+    state = get_versions(*entry['tags'])
+    if state is None or state[0] != entry['tags']:
+        return None
+
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers'].items():
+        response[header] = value
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def store_response(request, response, tags, started, timeout=None):
+    """
+    Cache the rendered ``response`` to ``request`` under the surrogate keys
+    ``tags``, unless one was purged since the response started being built
+    at ``started`` (a timestamp): it may hold rows from before the purge
+    """
+    state = get_versions(*tags)
+    if state is None or state[1].timestamp() >= started:
+        return
+    cache.set(cache_key(request), {
+        'status': response.status_code,
+        'content': response.content,
+        'headers': {header: response[header] for header in STORED_HEADERS if header in response},
+        'tags': state[0],
+    }, timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def purge(*tags):
+    """
+    Drop every cached response tagged with any of ``tags``
+    """
+    bump_versions(*tags)
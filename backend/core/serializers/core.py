@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from core.models import Notification, AuditLog, SystemConfiguration, FAQ
+from core.serializers.dynamic import DynamicFieldsMixin
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Notification model
     """
@@ -17,9 +18,10 @@ class NotificationSerializer(serializers.ModelSerializer):
             'id', 'user', 'notification_type', 'title',
             'message', 'data', 'created_at'
         )
+        expandable_fields = {'user': 'accounts.serializers.user.UserSerializer'}
 
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class AuditLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the AuditLog model
     """
@@ -31,9 +33,10 @@ class AuditLogSerializer(serializers.ModelSerializer):
             'created_at'
         )
         read_only_fields = fields
+        expandable_fields = {'user': 'accounts.serializers.user.UserSerializer'}
 
 
-class SystemConfigurationSerializer(serializers.ModelSerializer):
+class SystemConfigurationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the SystemConfiguration model
     """
@@ -61,7 +64,7 @@ class SystemConfigurationSerializer(serializers.ModelSerializer):
         return data
 
 
-class FAQSerializer(serializers.ModelSerializer):
+class FAQSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the FAQ model
     """
@@ -0,0 +1,177 @@
+"""
+Sparse fieldsets.
+
+``DynamicFieldsMixin`` lets API clients shape read responses with query
+parameters, each a comma separated list of field names, dotted to reach
+into nested serializers:
+
+- ``fields`` keeps only the listed fields (``fields=id,title,seller.username``)
+- ``omit`` drops the listed fields (``omit=description,seller.email``)
+- ``expand`` replaces fields named in ``Meta.expandable_fields`` (primary
+  keys by default) with the nested serializer given there
+
+``optimize_queryset`` narrows a queryset to what the remaining fields read:
+``only()`` the needed columns, ``select_related`` for nested objects and a
+``Prefetch`` for nested lists. ``core.views.mixins.SparseFieldsetMixin``
+applies it to a view's queryset.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+SPARSE_PARAMS = ('fields', 'omit', 'expand')
+
+
+def parse_field_tree(value):
+    """
+    ``'a,b.c,b.d'`` to ``{'a': {}, 'b': {'c': {}, 'd': {}}}``
+    """
+    tree = {}
+    for path in filter(None, (part.strip() for part in value.split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def sparse_params(request):
+    """
+    The sparse fieldset parameters of a read request, None without any
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    if not any(params.get(param) for param in SPARSE_PARAMS):
+        return None
+    return params
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin applying the ``fields``, ``omit`` and ``expand`` query
+    parameters of read requests
+    """
+    # (fields, omit, expand) trees, handed down to nested serializers
+    sparse_spec = None
+
+    def get_sparse_spec(self):
+        if self.sparse_spec is not None:
+            return self.sparse_spec
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return None
+
+        params = sparse_params(self.context.get('request'))
+        if params is None:
+            return None
+        return (
+            parse_field_tree(params['fields']) if params.get('fields') else None,
+            parse_field_tree(params.get('omit', '')),
+            parse_field_tree(params.get('expand', '')),
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.get_sparse_spec()
+        if spec is None:
+            return fields
+        only, omit, expand = spec
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            if name in expandable and name in fields:
+                kwargs = {'read_only': True}
+                source = fields[name].source
+                if source and source != name:
+                    kwargs['source'] = source
+                fields[name] = import_string(expandable[name])(**kwargs)
+
+        for name in list(fields):
+            if (only is not None and name not in only) or omit.get(name) == {}:
+                del fields[name]
+                continue
+            field = fields[name]
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(nested, DynamicFieldsMixin):
+                nested.sparse_spec = (
+                    only.get(name) or None if only is not None else None,
+                    omit.get(name, {}),
+                    expand.get(name, {}),
+                )
+        return fields
+
+
+def _plan(model, serializer, prefix=''):
+    """
+    ``(columns, select_related, prefetches)`` read by ``serializer`` on
+    ``model``; ``columns`` is None when a field may read any of them
+    """
+    columns, related, prefetches = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) > 1:
+            columns = None
+            continue
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            # Properties and methods may read anything; other names are
+            # skipped by the serializer anyway
+            if hasattr(model, field.source_attrs[0]):
+                columns = None
+            continue
+
+        name = prefix + field.source_attrs[0]
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if model_field.one_to_many or model_field.many_to_many:
+            if isinstance(nested, serializers.BaseSerializer):
+                queryset = optimize_queryset(model_field.related_model._default_manager.all(), nested)
+                if model_field.one_to_many and queryset.query.deferred_loading[1] is False:
+                    # Matching prefetched rows to their parent needs the foreign key
+                    queryset = queryset.only(
+                        model_field.field.attname, *queryset.query.deferred_loading[0]
+                    )
+                prefetches.append(Prefetch(name, queryset=queryset))
+            else:
+                prefetches.append(name)
+        elif model_field.is_relation and isinstance(nested, serializers.BaseSerializer):
+            nested_columns, nested_related, nested_prefetches = _plan(
+                model_field.related_model, nested, f'{name}__'
+            )
+            related += [name] + nested_related
+            prefetches += nested_prefetches
+            if columns is not None:
+                columns += [name] + (nested_columns or [])
+        elif columns is not None:
+            columns.append(name)
+    return columns, related, prefetches
+
+
+def optimize_queryset(queryset, serializer):
+    """
+    Restrict ``queryset`` to the columns and relations ``serializer``'s
+    fields read
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    columns, related, prefetches = _plan(queryset.model, serializer)
+
+    if columns is not None:
+        # Relations the view joined but the fields don't use can't be deferred
+        queryset = queryset.select_related(None).only(*columns)
+    if related:
+        queryset = queryset.select_related(*related)
+
+    seen = {getattr(lookup, 'prefetch_to', lookup) for lookup in queryset._prefetch_related_lookups}
+    prefetches = [
+        lookup for lookup in prefetches
+        if getattr(lookup, 'prefetch_to', lookup) not in seen
+    ]
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
@@ -0,0 +1,201 @@
+"""
+Compiled read path for list serializers.
+
+``values_plan(serializer_class)`` turns a read-only ``ModelSerializer`` into a
+plan, built once per class: the ``values()`` columns it reads and, per field,
+how to turn a column into what the DRF field would have output.
+``ValuesPlan.serialize`` then makes plain dicts out of ``values()`` rows
+without instantiating models or walking DRF fields object by object. Nested
+serializers on foreign keys are filled from a map built with one ``pk__in``
+query per relation, itself served by a plan.
+
+Serializers with fields a plan can't reproduce (method fields, properties,
+nested lists, dotted sources) have no plan, and ``FastListMixin`` falls back
+to the serializer for them.
+"""
+import decimal
+import functools
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.JSONField,
+)
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def _file_converter(field, model_field):
+    storage = model_field.storage
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def factory(context, maps):
+        request = context.get('request')
+
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+    return factory
+
+
+def _decimal_converter(field):
+    """
+    ``DecimalField.to_representation`` with its quantizing context built once
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or not coerce_to_string or field.localize:
+        return _static_converter(field.to_representation)
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return format(value.quantize(exponent, rounding=field.rounding, context=context), 'f')
+    return _static_converter(convert)
+
+
+def _datetime_converter(field):
+    """
+    ``DateTimeField.to_representation`` with the time zone looked up once
+    per serialization
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return _static_converter(field.to_representation)
+
+    def factory(context, maps):
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    return factory
+
+
+def _static_converter(convert):
+    return lambda context, maps: convert
+
+
+def _relation_converter(column):
+    return lambda context, maps: maps[column].get
+
+
+class ValuesPlan:
+    def __init__(self, model, entries, relations):
+        self.model = model
+        # (field name, column, converter factory or None)
+        self.entries = entries
+        # (column, plan of the nested serializer)
+        self.relations = relations
+        self.columns = list(dict.fromkeys(column for _name, column, _factory in entries))
+
+    def lookup(self, ids, context):
+        """
+        ``{pk: representation}`` of the objects with primary keys ``ids``
+        """
+        rows = list(self.model._base_manager.filter(pk__in=ids).values('pk', *self.columns))
+        return {row['pk']: item for row, item in zip(rows, self.serialize(rows, context))}
+
+    def serialize(self, rows, context=None):
+        context = context or {}
+        rows = list(rows)
+        maps = {
+            column: plan.lookup({row[column] for row in rows if row[column] is not None}, context)
+            for column, plan in self.relations
+        }
+        converters = [
+            (name, column, factory(context, maps) if factory else None)
+            for name, column, factory in self.entries
+        ]
+
+        results = []
+        for row in rows:
+            item = {}
+            for name, column, convert in converters:
+                value = row[column]
+                if value is None or convert is None:
+                    item[name] = value
+                else:
+                    item[name] = convert(value)
+            results.append(item)
+        return results
+
+
+def compile_plan(serializer):
+    """
+    The ``ValuesPlan`` of a ``ModelSerializer`` instance; raises
+    ``NotCompilable`` if a field can't be reproduced from columns
+    """
+    model = serializer.Meta.model
+    entries, relations = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) > 1:
+            raise NotCompilable(f'{type(serializer).__name__}.{name}')
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # A read-only field without a matching attribute is skipped by DRF
+            if hasattr(model, attr) or field.required or field.default is not empty or field.allow_null:
+                raise NotCompilable(f'{type(serializer).__name__}.{name}')
+            continue
+
+        if model_field.is_relation:
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                raise NotCompilable(f'{type(serializer).__name__}.{name}')
+            if isinstance(field, serializers.ModelSerializer):
+                relations.append((attr, compile_plan(field)))
+                entries.append((name, attr, _relation_converter(attr)))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                entries.append((name, attr, None))
+            else:
+                raise NotCompilable(f'{type(serializer).__name__}.{name}')
+        elif isinstance(field, serializers.FileField):
+            entries.append((name, attr, _file_converter(field, model_field)))
+        elif isinstance(field, IDENTITY_FIELDS):
+            entries.append((name, attr, None))
+        elif isinstance(field, serializers.DecimalField):
+            entries.append((name, attr, _decimal_converter(field)))
+        elif isinstance(field, serializers.DateTimeField):
+            entries.append((name, attr, _datetime_converter(field)))
+        elif isinstance(field, serializers.Field) and not isinstance(field, serializers.BaseSerializer):
+            entries.append((name, attr, _static_converter(field.to_representation)))
+        else:
+            raise NotCompilable(f'{type(serializer).__name__}.{name}')
+    return ValuesPlan(model, entries, relations)
+
+
+@functools.lru_cache(maxsize=None)
+def values_plan(serializer_class):
+    """
+    Cached ``ValuesPlan`` of ``serializer_class``, None if it has none
+    """
+    try:
+        return compile_plan(serializer_class())
+    except NotCompilable:
+        return None
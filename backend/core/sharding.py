@@ -0,0 +1,74 @@
+"""
+Shard-and-fan-out for full-table recomputations.
+
+``id_ranges`` splits a queryset into primary key ranges and ``fan_out`` runs
+a shard task ``task(start_id, end_id, ...)`` over them on as many workers as
+are free, up to ``max_parallel`` at once. Shards are dealt round-robin into
+that many lanes; each lane is one ``run_shards`` task working through its
+ranges in turn, so the cap holds without a scheduler. With a ``callback`` the lanes
+form a chord header and the callback receives the flat list of shard
+results.
+"""
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.db.models import Max, Min
+
+
+def id_ranges(queryset, range_size):
+    """
+    Split ``queryset`` into half-open ``(start_id, end_id)`` primary key ranges
+    of at most ``range_size`` ids each.
+    """
+    bounds = queryset.order_by().aggregate(
+        first=Min('pk'), last=Max('pk')
+    )
+    if bounds['first'] is None:
+        return []
+    return [
+        (start, min(start + range_size, bounds['last'] + 1))
+        for start in range(bounds['first'], bounds['last'] + 1, range_size)
+    ]
+
+
+def lanes(ranges, max_parallel):
+    """
+    Deal ``ranges`` round-robin into at most ``max_parallel`` lanes
+    """
+    count = min(len(ranges), max_parallel or len(ranges))
+    return [ranges[lane::count] for lane in range(count)]
+
+
+@shared_task
+def run_shards(task_name, ranges, args=(), kwargs=None):
+    """
+    Run the shard task ``task_name`` over ``ranges`` one after the other
+    """
+    from samma.celery import app
+
+    task = app.tasks[task_name]
+    return [task(start_id, end_id, *args, **(kwargs or {})) for start_id, end_id in ranges]
+
+
+@shared_task
+def flatten_shard_results(lane_results):
+    return [result for lane in lane_results for result in lane]
+
+
+def fan_out(task, ranges, max_parallel=None, args=(), kwargs=None, callback=None):
+    """
+    Run ``task(start_id, end_id, *args, **kwargs)`` over ``ranges`` (see
+    ``id_ranges``) in parallel.
+
+    Lanes go to the queue ``task`` is routed to. ``callback`` (a signature)
+    is called with the list of shard results once every shard is done.
+    """
+    from samma.celery import app
+
+    queue = app.amqp.router.route({}, task.name)['queue'].name
+    header = group(
+        run_shards.si(task.name, lane, list(args), kwargs or {}).set(queue=queue)
+        for lane in lanes(ranges, max_parallel or settings.SHARD_MAX_PARALLEL)
+    )
+    if callback is None:
+        return header.apply_async()
+    return chord(header)(flatten_shard_results.s().set(queue=queue) | callback)
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.cache import hot_cache
+from core.conditional import bump_versions
+from core.models import SystemConfiguration, FAQ
+
+
+@receiver(post_save, sender=SystemConfiguration)
+@receiver(post_delete, sender=SystemConfiguration)
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def invalidate_config_cache(sender, **kwargs):
+    """
+    Drop cached configuration and FAQs when they change
+    """
+    key = 'faqs' if sender is FAQ else 'public_configs'
+    hot_cache.invalidate(key)
+    # Again after commit, in case a reader re-cached the old rows meanwhile
+    transaction.on_commit(lambda: hot_cache.invalidate(key))
+    if sender is FAQ:
+        # Makes the ETags of FAQ responses stale
+        transaction.on_commit(lambda: bump_versions('faqs'))
@@ -0,0 +1,194 @@
+"""
+Singleton Celery tasks.
+
+``SingletonTask`` holds a lock named after the task for the whole run, so
+beat can't stack concurrent copies of a slow periodic task. The lock is a
+lease of ``singleton_lease`` seconds renewed by a background thread every
+third of the lease, so long runs keep it while a crashed worker frees it
+within one lease.
+
+When the lock is taken, the run is skipped (``singleton_contention =
+'skip'``, the default) or retried after ``singleton_retry_delay`` seconds
+(``'queue'``). Either outcome is counted in
+``samma_celery_singleton_contention_total``.
+
+Options are passed to the task decorator::
+
+    @shared_task(base=SingletonTask, singleton_contention='queue')
+    def rebuild_rankings():
+        ...
+
+A run that only dispatches subtasks would free the lock before they even
+start. It calls ``hand_off_lock()`` instead, and runs the signature it gets
+back once the subtasks are done, typically at the end of their chord
+callback. The lock then outlives the run, with its lease extended to
+``SINGLETON_HANDOFF_TIMEOUT`` so it still frees itself if the subtasks never
+finish.
+"""
+import logging
+import threading
+import uuid
+
+from celery import Task, shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import TASK_SINGLETON_CONTENTION
+
+logger = logging.getLogger(__name__)
+
+# Locks of the singleton runs in progress in this thread
+_local = threading.local()
+
+
+class LockLost(Exception):
+    pass
+
+
+class CacheLock:
+    """
+    Lease lock on the Django cache, for backends other than django-redis
+    """
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.token = uuid.uuid4().hex
+
+    def acquire(self, blocking=False):
+        return cache.add(self.name, self.token, self.timeout)
+
+    def reacquire(self):
+        if cache.get(self.name) != self.token or not cache.touch(self.name, self.timeout):
+            raise LockLost(self.name)
+
+    def extend(self, additional_time, replace_ttl=False):
+        if cache.get(self.name) != self.token or not cache.touch(self.name, additional_time):
+            raise LockLost(self.name)
+
+    def release(self):
+        if cache.get(self.name) == self.token:
+            cache.delete(self.name)
+
+
+def make_lock(name, timeout, token=None):
+    """
+    A redis-py lock (atomic renew and release) when running on django-redis,
+    a ``CacheLock`` otherwise. With ``token``, the lock as held by whoever
+    acquired it under that token.
+    """
+    try:
+        from django_redis import get_redis_connection
+        connection = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        lock = CacheLock(name, timeout)
+        if token is not None:
+            lock.token = token
+        return lock
+    lock = connection.lock(name, timeout=timeout, thread_local=False)
+    if token is not None:
+        lock.local.token = token.encode()
+    return lock
+
+
+def lock_token(lock):
+    if isinstance(lock, CacheLock):
+        return lock.token
+    return lock.local.token.decode()
+
+
+@shared_task
+def release_singleton_lock(name, token):
+    """
+    Release a lock handed off by ``SingletonTask.hand_off_lock()``
+    """
+    try:
+        make_lock(name, settings.SINGLETON_TASK_LEASE, token=token).release()
+    except Exception:
+        logger.warning('Singleton lock %s expired before release', name)
+
+
+class LeaseRenewer(threading.Thread):
+    """
+    Renews ``lock`` every ``interval`` seconds until stopped
+    """
+
+    def __init__(self, lock, interval):
+        super().__init__(name=f'lease-{lock.name}', daemon=True)
+        self.lock = lock
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.lock.reacquire()
+            except Exception:
+                logger.warning('Lost singleton lock %s before the task finished', self.lock.name)
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class SingletonTask(Task):
+    """
+    Task base class allowing a single concurrent run per task name
+    """
+
+    singleton_lease = None
+    singleton_contention = 'skip'
+    singleton_retry_delay = 60
+
+    def singleton_key(self, args, kwargs):
+        return f'singleton:{self.name}'
+
+    def __call__(self, *args, **kwargs):
+        lease = self.singleton_lease or settings.SINGLETON_TASK_LEASE
+        lock = make_lock(self.singleton_key(args, kwargs), lease)
+        if not lock.acquire(blocking=False):
+            return self.on_contention(args, kwargs)
+
+        renewer = LeaseRenewer(lock, lease / 3)
+        renewer.start()
+        run = {'lock': lock, 'handed_off': False}
+        runs = _local.__dict__.setdefault('runs', [])
+        runs.append(run)
+        try:
+            return super().__call__(*args, **kwargs)
+        except BaseException:
+            # Nothing to wait for if dispatching the subtasks failed
+            run['handed_off'] = False
+            raise
+        finally:
+            runs.pop()
+            renewer.stop()
+            if run['handed_off']:
+                try:
+                    lock.extend(settings.SINGLETON_HANDOFF_TIMEOUT, replace_ttl=True)
+                except Exception:
+                    # Subtasks already done (eager runs) and released it
+                    pass
+            else:
+                try:
+                    lock.release()
+                except Exception:
+                    logger.warning('Singleton lock %s expired before release', lock.name)
+
+    def hand_off_lock(self):
+        """
+        Keep the lock of the current run held after it returns; the returned
+        signature releases it
+        """
+        run = _local.runs[-1]
+        run['handed_off'] = True
+        return release_singleton_lock.si(run['lock'].name, lock_token(run['lock']))
+
+    def on_contention(self, args, kwargs):
+        if self.singleton_contention == 'queue' and not self.request.called_directly:
+            TASK_SINGLETON_CONTENTION.labels(self.name, 'requeued').inc()
+            raise self.retry(countdown=self.singleton_retry_delay, max_retries=None)
+        TASK_SINGLETON_CONTENTION.labels(self.name, 'skipped').inc()
+        logger.info('Skipped %s: previous run still in progress', self.name)
+        return {'skipped': True, 'summary': f'Skipped {self.name}: previous run still in progress'}
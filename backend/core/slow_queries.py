@@ -0,0 +1,204 @@
+"""
+Query log aggregated by SQL fingerprint.
+
+An execute wrapper installed on every database connection times each query
+and groups it by fingerprint, the SQL with ``IN`` lists and literals collapsed
+(see ``core.query_budget.query_shape``). Count, total time and a latency
+histogram per fingerprint are accumulated in process and added to shared
+cache counters every ``SLOW_QUERY_FLUSH_SECONDS``, so ``manage.py
+slow_queries`` can rank fingerprints across all web and Celery workers. Those
+flushes run on a background thread, so the query that triggers one never
+waits on the cache round trips.
+
+Queries slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged with the view or
+task that ran them.
+"""
+import hashlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.query_budget import query_shape
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'querylog:fingerprints'
+# Upper bounds in milliseconds; p95 is reported as the bound of its bucket
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+# View or task on whose behalf queries currently run
+query_origin = ContextVar('query_origin', default=None)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """
+    ``(id, shape)`` of ``sql``; cached because ORM SQL repeats verbatim
+    """
+    shape = query_shape(sql)
+    return hashlib.sha1(shape.encode()).hexdigest()[:16], shape
+
+
+def _key(fingerprint_id, field):
+    return f'querylog:{fingerprint_id}:{field}'
+
+
+class QueryLog:
+    """
+    Per-process accumulator flushed to the shared counters
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+        self._writer = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (time.perf_counter() - started) * 1000)
+
+    def record(self, sql, duration):
+        fingerprint_id, shape = fingerprint(sql)
+        bucket = next(index for index, bound in enumerate(BUCKETS) if duration <= bound)
+        with self._lock:
+            entry = self._pending.get(fingerprint_id)
+            if entry is None:
+                entry = self._pending[fingerprint_id] = {
+                    'shape': shape, 'count': 0, 'total': 0.0, 'buckets': [0] * len(BUCKETS)
+                }
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['buckets'][bucket] += 1
+            due = None
+            if time.monotonic() - self._flushed_at >= settings.SLOW_QUERY_FLUSH_SECONDS:
+                due = self._take()
+
+        if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                'Slow query (%.1f ms) [%s] from %s: %s',
+                duration, fingerprint_id, query_origin.get() or 'unknown', sql[:1000]
+            )
+        if due:
+            self._writer = threading.Thread(target=self._write, args=(due,), name='querylog-flush', daemon=True)
+            self._writer.start()
+
+    def _take(self):
+        pending, self._pending = self._pending, {}
+        self._flushed_at = time.monotonic()
+        return pending
+
+    def flush(self):
+        """
+        Add everything recorded so far to the shared counters
+        """
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            pending = self._take()
+        self._write(pending)
+
+    def _write(self, pending):
+        if not pending:
+            return
+        try:
+            for fingerprint_id, entry in pending.items():
+                _incr(_key(fingerprint_id, 'count'), entry['count'])
+                # Microseconds, as the counters are integers
+                _incr(_key(fingerprint_id, 'total_us'), round(entry['total'] * 1000))
+                for bucket, count in enumerate(entry['buckets']):
+                    if count:
+                        _incr(_key(fingerprint_id, f'bucket:{bucket}'), count)
+            known = cache.get(INDEX_KEY) or {}
+            new = {fp: entry['shape'] for fp, entry in pending.items() if fp not in known}
+            if new:
+                # Racy with other processes, but every flush re-adds its own
+                cache.set(INDEX_KEY, {**known, **new}, timeout=None)
+        except Exception:
+            logger.exception('Could not flush the query log')
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+query_log = QueryLog()
+
+
+@receiver(connection_created)
+def install_query_log(sender, connection, **kwargs):
+    if settings.SLOW_QUERY_LOG_ENABLED and query_log not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_log)
+
+
+@task_prerun.connect
+def _task_origin(task=None, **kwargs):
+    query_origin.set(f'task:{task.name}')
+
+
+@task_postrun.connect
+def _task_origin_done(**kwargs):
+    query_origin.set(None)
+
+
+def _percentile(buckets, count, fraction):
+    seen = 0
+    for bound, bucket_count in zip(BUCKETS, buckets):
+        seen += bucket_count
+        if seen >= count * fraction:
+            return bound
+    return BUCKETS[-1]
+
+
+def report(order_by='total'):
+    """
+    Aggregates of every fingerprint, sorted descending by ``order_by``
+    (``count``, ``total``, ``mean`` or ``p95``); times are in milliseconds
+    """
+    query_log.flush()
+    shapes = cache.get(INDEX_KEY) or {}
+    fields = ['count', 'total_us'] + [f'bucket:{bucket}' for bucket in range(len(BUCKETS))]
+    values = cache.get_many([_key(fp, field) for fp in shapes for field in fields])
+    rows = []
+    for fp, shape in shapes.items():
+        count = values.get(_key(fp, 'count'), 0)
+        if not count:
+            continue
+        total = values.get(_key(fp, 'total_us'), 0) / 1000
+        buckets = [values.get(_key(fp, f'bucket:{bucket}'), 0) for bucket in range(len(BUCKETS))]
+        rows.append({
+            'fingerprint': fp,
+            'sql': shape,
+            'count': count,
+            'total': round(total, 3),
+            'mean': round(total / count, 3),
+            'p95': _percentile(buckets, count, 0.95),
+        })
+    return sorted(rows, key=lambda row: -row[order_by])
+
+
+def reset():
+    """
+    Drop all aggregates
+    """
+    query_log.flush()
+    shapes = cache.get(INDEX_KEY) or {}
+    fields = ['count', 'total_us'] + [f'bucket:{bucket}' for bucket in range(len(BUCKETS))]
+    cache.delete_many([_key(fp, field) for fp in shapes for field in fields])
+    cache.delete(INDEX_KEY)
@@ -0,0 +1,162 @@
+"""
+Runtime history of Celery tasks.
+
+Signal handlers record every run: start time, duration, final state, retry
+number, rows processed (the ``rows`` of the task's result dict), lateness
+(start time minus the ``published_at`` stamped by ``core.metrics``, which for
+beat tasks is when they were due) and whether the previous run of the same
+task was still going.
+
+Runs are kept in a ring buffer of ``TASK_MONITOR_RETAIN`` slots per task in
+the cache, each slot a compact tuple, and ``task_stats()`` turns them into
+the p50/p95 figures served by ``TaskStatsAPIView``.
+"""
+import logging
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TASKS_KEY = 'taskmon:tasks'
+RUN_FIELDS = ('started_at', 'duration', 'lateness', 'state', 'rows', 'retries', 'overlapped')
+# How long an unfinished previous run counts as still running
+OVERLAP_WINDOW = 24 * 3600
+
+_running = {}
+
+
+def _key(task_name, suffix):
+    return f'taskmon:{task_name}:{suffix}'
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    try:
+        now = time.time()
+        published_at = getattr(task.request, 'published_at', None)
+        previous = cache.get(_key(task.name, 'last'))
+        overlapped = bool(
+            previous and previous['finished_at'] is None
+            and now - previous['started_at'] < OVERLAP_WINDOW
+        )
+        cache.set(_key(task.name, 'last'), {'started_at': now, 'finished_at': None}, OVERLAP_WINDOW)
+        _running[task_id] = {
+            'started_at': now,
+            'started': time.perf_counter(),
+            'lateness': now - published_at if published_at else None,
+            'retries': task.request.retries or 0,
+            'overlapped': overlapped,
+        }
+    except Exception:
+        # Monitoring must never keep a task from running
+        logger.exception('Could not record the start of %s', task.name)
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    run = _running.pop(task_id, None)
+    if run is None:
+        return
+    try:
+        duration = time.perf_counter() - run['started']
+        last = cache.get(_key(task.name, 'last'))
+        # Unless a newer run has started meanwhile
+        if last and last['started_at'] == run['started_at']:
+            cache.set(_key(task.name, 'last'), dict(last, finished_at=time.time()), OVERLAP_WINDOW)
+        record_run(task.name, (
+            round(run['started_at'], 3),
+            _ms(duration),
+            _ms(run['lateness']),
+            state,
+            retval.get('rows') if isinstance(retval, dict) else None,
+            run['retries'],
+            run['overlapped'],
+        ))
+    except Exception:
+        logger.exception('Could not record the end of %s', task.name)
+
+
+def record_run(task_name, run):
+    """
+    Store ``run`` (a tuple of ``RUN_FIELDS``) in the task's ring buffer
+    """
+    sequence_key = _key(task_name, 'sequence')
+    try:
+        sequence = cache.incr(sequence_key)
+    except ValueError:
+        sequence = 1 if cache.add(sequence_key, 1, timeout=None) else cache.incr(sequence_key)
+    slot = sequence % settings.TASK_MONITOR_RETAIN
+    cache.set(_key(task_name, f'run:{slot}'), run, settings.TASK_MONITOR_TTL)
+
+    tasks = cache.get(TASKS_KEY) or []
+    if task_name not in tasks:
+        cache.set(TASKS_KEY, sorted(tasks + [task_name]), timeout=None)
+
+
+def task_runs(task_name):
+    """
+    Stored runs of ``task_name`` as dicts, newest first
+    """
+    keys = [_key(task_name, f'run:{slot}') for slot in range(settings.TASK_MONITOR_RETAIN)]
+    runs = [dict(zip(RUN_FIELDS, run)) for run in cache.get_many(keys).values()]
+    return sorted(runs, key=lambda run: -run['started_at'])
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def task_interval(task_name):
+    """
+    Seconds between beat runs of ``task_name``, if it's scheduled at a fixed
+    interval (crontab entries have none)
+    """
+    from samma.celery import app
+
+    for entry in app.conf.beat_schedule.values():
+        if entry['task'] == task_name and isinstance(entry['schedule'], (int, float)):
+            return entry['schedule']
+    return None
+
+
+def task_stats(task_name):
+    """
+    p50/p95 runtime and lateness (in milliseconds) plus counts over the
+    stored runs of ``task_name``
+    """
+    runs = task_runs(task_name)
+    durations = [run['duration'] for run in runs]
+    lateness = [run['lateness'] for run in runs if run['lateness'] is not None]
+    interval = task_interval(task_name)
+    last = runs[0] if runs else None
+    return {
+        'task': task_name,
+        'runs': len(runs),
+        'interval': interval,
+        'duration_p50': _percentile(durations, 0.5),
+        'duration_p95': _percentile(durations, 0.95),
+        'duration_max': max(durations, default=None),
+        'lateness_p50': _percentile(lateness, 0.5),
+        'lateness_p95': _percentile(lateness, 0.95),
+        'lateness_max': max(lateness, default=None),
+        'failures': sum(run['state'] == 'FAILURE' for run in runs),
+        'retries': sum(run['state'] == 'RETRY' for run in runs),
+        'overlaps': sum(bool(run['overlapped']) for run in runs),
+        'overruns': sum(run['duration'] > interval * 1000 for run in runs) if interval else None,
+        'rows': sum(run['rows'] or 0 for run in runs),
+        'last_run': last,
+    }
+
+
+def all_task_stats():
+    return [task_stats(task_name) for task_name in cache.get(TASKS_KEY) or []]
@@ -1,25 +1,28 @@
 from celery import shared_task
 from django.utils import timezone
 from django.contrib.sessions.models import Session
-from django.core.cache import cache
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Sum
+from .batch import batch_delete
+from .cache import NAMESPACES, dashboard_cache, invalidate_namespaces
 from .models import Notification, AuditLog
+from .notifications import DEFAULT_BATCH_SIZE, bulk_notify, exclude_already_notified
+from .sharding import fan_out, id_ranges
+from .singleton import SingletonTask
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def cleanup_expired_sessions():
     """
     Clean up expired sessions from the database
     """
     # Delete expired sessions
     expired = Session.objects.filter(expire_date__lt=timezone.now())
-    count = expired.count()
-    expired.delete()
+    result = batch_delete(expired, checkpoint='cleanup_expired_sessions')
     
-    return f"Cleaned up {count} expired sessions"
+    return dict(result, summary=f"Cleaned up {result['rows']} expired sessions ({result['rows_per_second']} rows/s)")
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def cleanup_old_notifications():
     """
     Clean up old notifications
@@ -33,13 +36,12 @@ def cleanup_old_notifications():
         Q(is_read=True)
     )
     
-    count = old_notifications.count()
-    old_notifications.delete()
+    result = batch_delete(old_notifications, checkpoint='cleanup_old_notifications')
     
-    return f"Cleaned up {count} old notifications"
+    return dict(result, summary=f"Cleaned up {result['rows']} old notifications ({result['rows_per_second']} rows/s)")
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def cleanup_old_audit_logs():
     """
     Clean up old audit logs
@@ -49,28 +51,31 @@ def cleanup_old_audit_logs():
     
     # Delete old audit logs
     old_logs = AuditLog.objects.filter(created_at__lt=threshold)
-    count = old_logs.count()
-    old_logs.delete()
+    result = batch_delete(old_logs, checkpoint='cleanup_old_audit_logs')
     
-    return f"Cleaned up {count} old audit logs"
+    return dict(result, summary=f"Cleaned up {result['rows']} old audit logs ({result['rows_per_second']} rows/s)")
 
 
 @shared_task
-def clear_expired_cache():
+def invalidate_cache_namespaces(names=None):
     """
-    Clear expired cache entries
+    Invalidate cache namespaces (all of them by default)
+    
+    Keys are never cleared in bulk: bumping a namespace's generation makes its
+    old entries unreachable and Redis expires them through their TTL.
     """
-    try:
-        cache.clear()
-        return "Successfully cleared expired cache entries"
-    except Exception as e:
-        return f"Error clearing cache: {str(e)}"
+    names = list(names or NAMESPACES)
+    invalidate_namespaces(*names)
+    return {'namespaces': names, 'summary': f"Invalidated cache namespaces: {', '.join(names)}"}
 
 
-@shared_task
-def send_inactive_user_notifications():
+INACTIVE_USER_CAMPAIGN = 'inactive_user'
+
+
+def _inactive_users():
     """
-    Send notifications to users who haven't logged in for a while
+    Active users who haven't logged in for 30 days and haven't been
+    notified since their last login
     """
     from django.contrib.auth import get_user_model
     User = get_user_model()
@@ -78,27 +83,67 @@ def send_inactive_user_notifications():
     # Define the threshold (e.g., 30 days)
     threshold = timezone.now() - timezone.timedelta(days=30)
     
-    # Get inactive users
     inactive_users = User.objects.filter(
         last_login__lt=threshold,
         is_active=True
     )
+    return exclude_already_notified(
+        inactive_users, INACTIVE_USER_CAMPAIGN, since=OuterRef('last_login')
+    )
+
+
+def _notify_inactive_users(users, batch_size):
+    rows = (
+        (user_id, {'last_login': last_login.isoformat() if last_login else None})
+        for user_id, last_login in users.values_list('id', 'last_login').iterator(chunk_size=batch_size)
+    )
+    return bulk_notify(
+        rows,
+        notification_type='system',
+        title='We miss you!',
+        message='It\'s been a while since you last visited Samma. Check out our latest games!',
+        campaign=INACTIVE_USER_CAMPAIGN,
+        batch_size=batch_size,
+    )
+
+
+@shared_task(base=SingletonTask)
+def send_inactive_user_notifications(parallel=False, range_size=100000, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send notifications to users who haven't logged in for a while
     
-    notification_count = 0
-    for user in inactive_users:
-        Notification.objects.create(
-            user=user,
-            notification_type='system',
-            title='We miss you!',
-            message='It\'s been a while since you last visited Samma. Check out our latest games!',
-            data={'last_login': user.last_login.isoformat() if user.last_login else None}
+    With ``parallel=True`` the user table is split into id ranges of
+    ``range_size`` and each range is handled by its own subtask. The lock of
+    this run is held until they all finish.
+    """
+    inactive_users = _inactive_users()
+    
+    if parallel:
+        ranges = id_ranges(inactive_users, range_size)
+        fan_out(
+            send_inactive_user_notifications_range, ranges, args=(batch_size,),
+            callback=send_inactive_user_notifications.hand_off_lock()
         )
-        notification_count += 1
+        return {'subtasks': len(ranges), 'summary': f"Dispatched {len(ranges)} inactive user notification subtasks"}
     
-    return f"Sent {notification_count} notifications to inactive users"
+    notification_count = _notify_inactive_users(inactive_users, batch_size)
+    return {'rows': notification_count, 'summary': f"Sent {notification_count} notifications to inactive users"}
 
 
 @shared_task
+def send_inactive_user_notifications_range(start_id, end_id, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send inactive user notifications for users with ids in [start_id, end_id)
+    """
+    users = _inactive_users().filter(id__gte=start_id, id__lt=end_id)
+    notification_count = _notify_inactive_users(users, batch_size)
+    return {
+        'rows': notification_count,
+        'summary': f"Sent {notification_count} notifications to inactive users {start_id}-{end_id}",
+    }
+
+
+@shared_task(base=SingletonTask)
 def update_system_statistics():
     """
     Update system-wide statistics
@@ -117,12 +162,12 @@ def update_system_statistics():
             'total_revenue': float(Payment.objects.filter(
                 status='completed'
             ).aggregate(
-                total=models.Sum('amount')
+                total=Sum('amount')
             )['total'] or 0),
         }
         
         # Store in cache
-        cache.set('system_statistics', stats, timeout=3600)  # Cache for 1 hour
+        dashboard_cache.set('system_statistics', stats, timeout=3600)  # Cache for 1 hour
         
         # Store in database
         from .models import SystemConfiguration
@@ -135,7 +180,7 @@ def update_system_statistics():
             }
         )
         
-        return "Successfully updated system statistics"
+        return dict(stats, summary="Successfully updated system statistics")
     
     except Exception as e:
-        return f"Error updating system statistics: {str(e)}" 
\ No newline at end of file
+        return {'error': str(e), 'summary': f"Error updating system statistics: {str(e)}"} 
\ No newline at end of file
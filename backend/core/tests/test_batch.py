@@ -0,0 +1,65 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from core.batch import batch_delete, batch_update
+from core.models import Notification
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def notifications():
+    user = User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+    return [
+        Notification.objects.create(user=user, notification_type='system', title=f'N{n}', message='m')
+        for n in range(5)
+    ]
+
+
+class TestBatchDelete:
+    def test_deletes_in_chunks_without_collecting(self, django_assert_num_queries, notifications):
+        # 3 chunks: (SELECT pks + DELETE) each, then a final empty SELECT
+        with django_assert_num_queries(7):
+            result = batch_delete(Notification.objects.all(), batch_size=2, sleep=0)
+
+        assert result['rows'] == 5
+        assert result['batches'] == 3
+        assert not Notification.objects.exists()
+
+    def test_rechecks_conditions_of_each_chunk(self, mocker, notifications):
+        # A row read as matching is marked read before its chunk is deleted
+        mocker.patch('core.batch._chunks', return_value=[[n.pk for n in notifications]])
+        Notification.objects.filter(pk=notifications[0].pk).update(is_read=True)
+
+        result = batch_delete(Notification.objects.filter(is_read=False), sleep=0)
+
+        assert result['rows'] == 4
+        assert list(Notification.objects.all()) == notifications[:1]
+
+    def test_cascades_when_fast_delete_is_unsafe(self, notifications):
+        user = notifications[0].user
+
+        result = batch_delete(User.objects.filter(id=user.id), batch_size=2, sleep=0)
+
+        assert result['rows'] == 1
+        assert not Notification.objects.exists()
+
+    def test_resumes_from_checkpoint(self, locmem_cache, notifications):
+        cache.set('batch:checkpoint:resume', notifications[2].pk)
+
+        result = batch_update(
+            Notification.objects.all(), batch_size=2, sleep=0, checkpoint='resume', is_read=True
+        )
+
+        assert result['rows'] == 2
+        assert list(Notification.objects.filter(is_read=True).order_by('pk')) == notifications[3:]
+        assert cache.get('batch:checkpoint:resume') is None
@@ -0,0 +1,141 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.cache import CacheNamespace, TwoTierCache, invalidate_namespaces, games_cache
+from core.tasks import invalidate_cache_namespaces
+from games.models import Category
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+class TestCacheNamespace:
+    def test_get_set_round_trip(self):
+        namespace = CacheNamespace('test')
+        assert namespace.get('key') is None
+        namespace.set('key', {'value': 1})
+        assert namespace.get('key') == {'value': 1}
+
+    def test_invalidate_only_affects_its_namespace(self):
+        first, second = CacheNamespace('first'), CacheNamespace('second')
+        first.set('key', 'a')
+        second.set('key', 'b')
+
+        first.invalidate()
+
+        assert first.get('key') is None
+        assert second.get('key') == 'b'
+
+    def test_get_or_set_computes_once(self):
+        namespace = CacheNamespace('test')
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 42
+
+        assert namespace.get_or_set('answer', compute) == 42
+        assert namespace.get_or_set('answer', compute) == 42
+        assert len(calls) == 1
+
+    def test_stats_report_hit_ratio(self):
+        namespace = CacheNamespace('test')
+        namespace.set('key', 1)
+        namespace.get('key')
+        namespace.get('key')
+        namespace.get('missing')
+
+        stats = namespace.stats()
+
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['hit_ratio'] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_invalidate_task_bumps_all_namespaces(self):
+        games_cache.set('key', 1)
+        invalidate_cache_namespaces()
+        assert games_cache.get('key') is None
+
+
+@pytest.mark.django_db
+def test_category_save_invalidates_games_namespace():
+    games_cache.set('list', [1, 2, 3])
+    Category.objects.create(name='Action')
+    assert games_cache.get('list') is None
+
+
+def test_invalidate_namespaces_by_name():
+    games_cache.set('key', 1)
+    invalidate_namespaces('games')
+    assert games_cache.get('key') is None
+
+
+class TestTwoTierCache:
+    @pytest.fixture
+    def two_tier(self, settings):
+        settings.HOT_CACHE_LOCAL_TIMEOUT = 30
+        settings.HOT_CACHE_MAXSIZE = 2
+        two_tier = TwoTierCache('test_hot')
+        two_tier.loads = []
+        for key in ('a', 'b', 'c'):
+            two_tier.loader(key)(lambda key=key: two_tier.loads.append(key) or key.upper())
+        return two_tier
+
+    def test_local_tier_serves_repeat_reads(self, two_tier):
+        assert two_tier.get('a') == 'A'
+        assert two_tier.get('a') == 'A'
+
+        stats = two_tier.stats()
+        assert two_tier.loads == ['a']
+        assert stats['local_hits'] == 1
+        assert stats['redis_misses'] == 1
+
+    def test_redis_tier_serves_after_local_eviction(self, two_tier):
+        two_tier.get('a')
+        two_tier.get('b')
+        two_tier.get('c')  # evicts 'a' from the 2-entry local tier
+
+        assert two_tier.get('a') == 'A'
+        assert two_tier.loads == ['a', 'b', 'c']
+        assert two_tier.stats()['redis_hits'] == 1
+
+    def test_invalidate_reloads(self, two_tier):
+        two_tier.get('a')
+        two_tier.invalidate('a')
+        two_tier.get('a')
+        assert two_tier.loads == ['a', 'a']
+
+    def test_local_tier_disabled(self, two_tier, settings):
+        settings.HOT_CACHE_LOCAL_TIMEOUT = 0
+        two_tier.get('a')
+        two_tier.get('a')
+        assert two_tier.stats()['local_hits'] == 0
+        assert two_tier.stats()['redis_hits'] == 1
+
+    def test_warm_loads_every_key(self, two_tier):
+        two_tier.warm()
+        assert two_tier.loads == ['a', 'b', 'c']
+
+
+@pytest.mark.django_db
+def test_category_list_served_from_hot_cache(settings, client):
+    settings.HOT_CACHE_LOCAL_TIMEOUT = 30
+    Category.objects.create(name='Action')
+    url = reverse('api:games:category-list')
+
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert [c['name'] for c in response.json()['results']] == ['Action']
+    assert not any('games_category' in q['sql'] for q in queries.captured_queries)
+
+    Category.objects.create(name='Puzzle')
+    assert len(client.get(url).json()['results']) == 2
@@ -0,0 +1,130 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.conditional import bump_versions, get_versions
+from core.models import FAQ
+from games.models import Category, Game, GameComment
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    return client
+
+
+@pytest.fixture
+def game():
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    return Game.objects.create(
+        title='Game', description='Game', price=10, seller=seller, category=category, is_approved=True
+    )
+
+
+def test_versions_change_when_bumped():
+    versions, modified = get_versions('categories', 'tags')
+
+    bump_versions('tags')
+
+    bumped, bumped_modified = get_versions('categories', 'tags')
+    assert bumped['categories'] == versions['categories']
+    assert bumped['tags'] != versions['tags']
+    assert bumped_modified >= modified
+
+
+def test_versions_need_a_real_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    assert get_versions('categories') is None
+
+
+def test_category_list_is_not_modified(django_capture_on_commit_callbacks):
+    Category.objects.create(name='Action', slug='action')
+    url = reverse('api:games:category-list')
+    client = APIClient()
+
+    first = client.get(url)
+    again = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    since = client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.create(name='Puzzle', slug='puzzle')
+    changed = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    assert first.status_code == 200
+    assert 'public' in first['Cache-Control'] and 'max-age=60' in first['Cache-Control']
+    assert again.status_code == 304 and again['ETag'] == first['ETag']
+    assert since.status_code == 304
+    assert changed.status_code == 200
+    assert changed['ETag'] != first['ETag']
+    assert len(changed.data['results']) == 2
+
+
+def test_etag_depends_on_the_query_string():
+    url = reverse('api:core:faq-list')
+    FAQ.objects.create(question='How?', answer='Like that', category='general')
+    client = APIClient()
+
+    first = client.get(url)
+    filtered = client.get(url, {'category': 'general'}, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    assert filtered.status_code == 200
+    assert filtered['ETag'] != first['ETag']
+
+
+def test_not_modified_game_skips_serialization(client, game, django_assert_max_num_queries):
+    url = reverse('api:games:game-detail', kwargs={'slug': game.slug})
+    first = client.get(url)
+
+    with django_assert_max_num_queries(1):
+        again = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    assert first.status_code == 200
+    assert 'private' in first['Cache-Control']
+    assert again.status_code == 304
+    assert again.content == b''
+
+
+def test_game_etag_follows_nested_data(client, buyer, game, django_capture_on_commit_callbacks):
+    url = reverse('api:games:game-detail', kwargs={'slug': game.slug})
+    etags = [client.get(url)['ETag']]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        GameComment.objects.create(game=game, user=buyer, content='Nice', rating=8)
+    etags.append(client.get(url)['ETag'])
+    with django_capture_on_commit_callbacks(execute=True):
+        game.seller.first_name = 'Sam'
+        game.seller.save()
+    etags.append(client.get(url)['ETag'])
+    Game.objects.filter(id=game.id).update(total_sales=5)
+    etags.append(client.get(url)['ETag'])
+    with django_capture_on_commit_callbacks(execute=True):
+        buyer.save(update_fields=['last_login'])
+    etags.append(client.get(url)['ETag'])
+
+    assert len(set(etags)) == 4
+    assert etags[-1] == etags[-2]
+
+
+def test_unknown_game_is_not_found(client):
+    response = client.get(reverse('api:games:game-detail', kwargs={'slug': 'missing'}), HTTP_IF_NONE_MATCH='*')
+
+    assert response.status_code == 404
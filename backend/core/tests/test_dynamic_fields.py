@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.serializers.dynamic import parse_field_tree
+from games.models import Category, Game, GameComment
+from payments.models import Payment, Transaction
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    return client
+
+
+@pytest.fixture
+def game():
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    return Game.objects.create(
+        title='Game', description='A long description', price=10, seller=seller, category=category
+    )
+
+
+@pytest.fixture
+def payment(buyer, game):
+    payment = Payment.objects.create(
+        buyer=buyer, seller=game.seller, game=game, amount=Decimal('10.00'),
+        platform_fee=Decimal('1.00'), seller_amount=Decimal('9.00'), status='completed'
+    )
+    Transaction.objects.create(payment=payment, transaction_type='purchase', amount=payment.amount)
+    return payment
+
+
+def test_parse_field_tree():
+    assert parse_field_tree('id, game.title,game.seller.username,') == {
+        'id': {}, 'game': {'title': {}, 'seller': {'username': {}}},
+    }
+
+
+def test_fields_select_columns_and_joins(client, payment):
+    url = reverse('api:payments:payment-history')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, {'fields': 'id,amount,game.title,game.seller.username'})
+
+    assert response.data['results'] == [{
+        'id': payment.id,
+        'amount': '10.00',
+        'game': {'title': 'Game', 'seller': {'username': 'seller'}},
+    }]
+    sql = next(query['sql'] for query in queries if 'payments_payment' in query['sql'])
+    assert 'games_game' in sql and 'accounts_user' in sql
+    assert '"description"' not in sql and '"platform_fee"' not in sql and '"email"' not in sql
+
+
+def test_omit_nested_fields(client, game):
+    response = client.get(reverse('api:games:game-list'), {'omit': 'seller.email,category,tags'})
+
+    result = response.data['results'][0]
+    assert 'category' not in result
+    assert set(result['seller']) == {'id', 'username', 'first_name', 'last_name'}
+    assert result['title'] == 'Game'
+
+
+def test_expand_primary_keys(client, payment):
+    url = reverse('api:payments:transaction-list')
+
+    plain = client.get(url).data['results'][0]
+    expanded = client.get(url, {'expand': 'payment', 'fields': 'id,payment.amount,payment.game.slug'})
+
+    assert plain['payment'] == payment.id
+    assert expanded.data['results'][0] == {
+        'id': plain['id'], 'payment': {'amount': '10.00', 'game': {'slug': game_slug(payment)}},
+    }
+
+
+def game_slug(payment):
+    return Game.objects.get(id=payment.game_id).slug
+
+
+def test_without_parameters_nothing_changes(client, payment):
+    result = client.get(reverse('api:payments:payment-history')).data['results'][0]
+
+    assert set(result) == {
+        'id', 'buyer', 'seller', 'game', 'amount', 'platform_fee',
+        'seller_amount', 'status', 'created_at', 'completed_at',
+    }
+    assert 'description' not in result['game'] and 'category' in result['game']
+
+
+def test_prefetched_views_keep_their_prefetches(client, buyer, game):
+    comment = GameComment.objects.create(game=game, user=buyer, content='Nice', rating=8)
+    GameComment.objects.create(game=game, user=buyer, content='Thanks', parent=comment)
+
+    response = client.get(reverse('api:games:gamecomment-list'), {'fields': 'id,content,user.username,replies'})
+
+    result = response.data['results'][0]
+    assert result['user'] == {'username': 'buyer'}
+    assert [reply['content'] for reply in result['replies']] == ['Thanks']
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from core.serializers.fast import values_plan
+from games.models import Category, Game
+from games.serializers.game import GameCommentSerializer, GameListSerializer
+from payments.models import Payment
+from payments.serializers.payment import PaymentListSerializer
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    return client
+
+
+@pytest.fixture
+def payments(buyer):
+    seller = User.objects.create_user(
+        username='seller', email='seller@example.com', password='pass', first_name='Sam'
+    )
+    category = Category.objects.create(name='Action', slug='action', icon='category_icons/action.png')
+    games = [
+        Game.objects.create(
+            title=f'Game {i}', description='Game', price=Decimal('9.90'), seller=seller, category=category,
+            thumbnail='game_thumbnails/game.png' if i else '', rating=Decimal('7.5'), ad_score=i
+        )
+        for i in range(3)
+    ]
+    return [
+        Payment.objects.create(
+            buyer=buyer, seller=seller, game=game, amount=Decimal('9.90'),
+            platform_fee=Decimal('0.50'), seller_amount=Decimal('9.40'), status='completed',
+            completed_at=timezone.now() if i else None
+        )
+        for i, game in enumerate(games)
+    ]
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+def serializer_output(serializer_class, objects, path):
+    request = APIRequestFactory().get(path)
+    return render(serializer_class(objects, many=True, context={'request': request}).data)
+
+
+def test_list_serializers_have_plans():
+    assert values_plan(GameListSerializer) is not None
+    assert values_plan(PaymentListSerializer) is not None
+    # Method fields can't be compiled
+    assert values_plan(GameCommentSerializer) is None
+
+
+def test_game_list_matches_the_serializer(client, payments):
+    response = client.get(reverse('api:games:game-list'))
+
+    games = Game.objects.order_by('-ad_score', '-id')
+    expected = serializer_output(GameListSerializer, games, reverse('api:games:game-list'))
+    results = response.data['results']
+    # Added by the view, the buyer paid for every game
+    assert all(game.pop('is_owned') for game in results)
+    assert render(results) == expected
+
+
+def test_payment_history_matches_the_serializer(client, payments):
+    response = client.get(reverse('api:payments:payment-history'))
+
+    expected = serializer_output(
+        PaymentListSerializer, Payment.objects.order_by('-created_at', '-id'),
+        reverse('api:payments:payment-history')
+    )
+    assert render(response.data['results']) == expected
+
+
+def test_nested_objects_are_fetched_once_per_relation(client, payments, django_assert_max_num_queries):
+    # Payments, then buyers, sellers, games and their sellers and categories
+    with django_assert_max_num_queries(6):
+        response = client.get(reverse('api:payments:payment-history'))
+
+    assert len(response.data['results']) == 3
@@ -0,0 +1,106 @@
+import time
+import paypalrestsdk
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core import health
+
+
+class TestRunProbes:
+    def test_runs_probes_concurrently(self):
+        started = time.perf_counter()
+        results = health.run_probes({
+            'first': lambda: time.sleep(0.2) or {'status': 'healthy'},
+            'second': lambda: time.sleep(0.2) or {'status': 'healthy'},
+        }, timeout=1)
+
+        assert time.perf_counter() - started < 0.35
+        assert results == {'first': {'status': 'healthy'}, 'second': {'status': 'healthy'}}
+
+    def test_reports_timeouts_and_errors(self):
+        def failing():
+            raise ConnectionError('refused')
+
+        started = time.perf_counter()
+        results = health.run_probes({
+            'slow': lambda: time.sleep(1) or {'status': 'healthy'},
+            'failing': failing,
+        }, timeout=0.1)
+
+        assert time.perf_counter() - started < 0.5
+        assert results['slow']['status'] == 'timeout'
+        assert results['failing'] == {'status': 'unhealthy', 'error': 'refused'}
+
+    def test_does_not_restart_a_probe_still_running(self):
+        calls = []
+
+        def hung():
+            calls.append(1)
+            time.sleep(0.3)
+            return {'status': 'healthy'}
+
+        first = health.run_probes({'hung': hung}, timeout=0.05)
+        second = health.run_probes({'hung': hung}, timeout=0.05)
+        time.sleep(0.35)
+        third = health.run_probes({'hung': lambda: {'status': 'healthy'}}, timeout=0.05)
+
+        assert first['hung']['status'] == second['hung']['status'] == 'timeout'
+        assert len(calls) == 1
+        assert third['hung'] == {'status': 'healthy'}
+
+
+def test_paypal_probe_bounds_the_token_request(mocker):
+    http_call = mocker.patch('paypalrestsdk.api.Api.http_call', return_value={'access_token': 'token'})
+    api = paypalrestsdk.Api(mode='sandbox', client_id='id', client_secret='secret')
+    mocker.patch('paypalrestsdk.api.default', return_value=api)
+
+    assert health.probe_paypal(1.5)['status'] == 'healthy'
+    assert http_call.call_args.kwargs['timeout'] == 1.5
+    assert api.token_hash == {'access_token': 'token'}
+
+
+@pytest.mark.django_db
+def test_database_probe_measures_latency():
+    result = health.probe_database()
+    assert result['status'] == 'healthy'
+    assert result['latency'] >= 0
+
+
+def test_sampler_does_not_block():
+    sampler = health.SystemSampler(interval=60)
+    started = time.perf_counter()
+    sample = sampler.latest()
+    assert time.perf_counter() - started < 0.5
+    assert {'cpu_usage', 'memory_usage', 'disk_usage'} <= set(sample)
+
+
+def test_health_report_is_cached(settings, monkeypatch):
+    settings.HEALTH_CHECK_CACHE_SECONDS = 60
+    monkeypatch.setattr(health, '_report', {'value': None, 'expires': 0})
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {'status': 'healthy'}
+
+    assert health.health_report(build) == {'status': 'healthy'}
+    assert health.health_report(build) == {'status': 'healthy'}
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_health_check_view(admin_user, mocker, monkeypatch):
+    monkeypatch.setattr(health, '_report', {'value': None, 'expires': 0})
+    mocker.patch('core.views.api.probe_celery', return_value={'status': 'healthy', 'latency': 1.0})
+    mocker.patch('core.views.api.probe_paypal', side_effect=ConnectionError('unreachable'))
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    response = client.get(reverse('api:core:system-health'))
+
+    assert response.status_code == 200
+    assert response.data['status'] == 'degraded'
+    assert response.data['database']['status'] == 'healthy'
+    assert response.data['database']['latency'] >= 0
+    assert response.data['paypal'] == {'status': 'unhealthy', 'error': 'unreachable'}
+    assert 'response_time' in response.data
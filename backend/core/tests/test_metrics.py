@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from core.metrics import render_metrics
+from core.models import FAQ
+from core.middleware import view_labels
+from core.views.api import FAQViewSet, SystemHealthCheckAPIView
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_view_labels_name_viewset_actions():
+    assert view_labels(FAQViewSet.as_view({'get': 'list'}), 'GET') == ('FAQViewSet', 'list')
+    assert view_labels(SystemHealthCheckAPIView.as_view(), 'GET') == ('SystemHealthCheckAPIView', 'get')
+
+
+def test_middleware_records_latency_and_queries(client):
+    FAQ.objects.create(question='Q?', answer='A', category='general')
+    labels = {'view': 'FAQViewSet', 'action': 'list'}
+    requests_before = sample('samma_http_request_duration_seconds_count', method='GET', status='200', **labels)
+    queries_before = sample('samma_http_request_db_queries_sum', **labels)
+
+    response = client.get(reverse('api:core:faq-list'))
+
+    assert response.status_code == 200
+    assert sample(
+        'samma_http_request_duration_seconds_count', method='GET', status='200', **labels
+    ) == requests_before + 1
+    assert sample('samma_http_request_db_queries_sum', **labels) > queries_before
+
+
+def test_merges_task_metrics_of_worker_services(tmp_path, monkeypatch):
+    # A Celery worker child, with its own multiprocess directory
+    worker = textwrap.dedent('''
+        import os
+        from types import SimpleNamespace
+        from core import metrics
+
+        metrics._reset_multiproc_dir()
+        task = SimpleNamespace(name='tests.task', request=SimpleNamespace(published_at=None))
+        metrics._task_prerun(task_id='1', task=task)
+        metrics._task_postrun(task_id='1', task=task, state='SUCCESS')
+        metrics._mark_process_dead(pid=os.getpid())
+    ''')
+    subprocess.run(
+        [sys.executable, '-c', worker], cwd=settings.BASE_DIR, check=True,
+        env={**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path / 'worker-analytics')},
+    )
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_ROOT', str(tmp_path))
+
+    body, _ = render_metrics()
+
+    assert b'samma_celery_task_duration_seconds_count{state="SUCCESS",task="tests.task"} 1.0' in body
+
+
+class TestMetricsEndpoint:
+    def test_forbidden_for_anonymous_remote_clients(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = []
+        assert client.get(reverse('api:core:metrics')).status_code == 403
+
+    def test_exposes_metrics_to_staff(self, settings):
+        settings.METRICS_ALLOWED_IPS = []
+        client = APIClient()
+        client.force_login(User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', is_staff=True
+        ))
+
+        response = client.get(reverse('api:core:metrics'))
+
+        assert response.status_code == 200
+        assert b'samma_http_request_duration_seconds' in response.content
@@ -0,0 +1,150 @@
+import base64
+import json
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import Notification
+from core.pagination import EstimatedCountPaginator, estimate_count
+from games.models import Category, Game
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username='reader', email='reader@example.com', password='pass')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def notifications(user):
+    Notification.objects.bulk_create([
+        Notification(user=user, notification_type='system', title=f'N{i}', message='Hi')
+        for i in range(7)
+    ])
+    # Ties on created_at are broken by id
+    Notification.objects.filter(title__in=['N2', 'N3', 'N4']).update(created_at=timezone.now())
+    return list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+
+def walk(client, url, key='next'):
+    ids, pages = [], []
+    while url:
+        data = client.get(url).data
+        pages.append([item['id'] for item in data['results']])
+        ids += pages[-1]
+        url = data[key]
+    return ids, pages
+
+
+def test_pages_forward_without_gaps_or_count(client, notifications):
+    url = reverse('api:core:notification-list') + '?page_size=3'
+
+    with CaptureQueriesContext(connection) as queries:
+        first = client.get(url).data
+    assert 'count' not in first
+    assert first['previous'] is None
+    assert not any('COUNT(' in query['sql'].upper() for query in queries)
+
+    ids, pages = walk(client, url)
+    assert ids == notifications
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+def test_pages_backward_from_the_end(client, notifications):
+    url = reverse('api:core:notification-list') + '?page_size=3'
+    data = client.get(url).data
+    data = client.get(data['next']).data
+    last = client.get(data['next']).data
+    assert last['next'] is None
+
+    ids, pages = walk(client, last['previous'], key='previous')
+    assert pages == [notifications[3:6], notifications[0:3]]
+
+
+def test_invalid_cursor(client, notifications):
+    response = client.get(reverse('api:core:notification-list') + '?cursor=bm9wZQ')
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('position', [
+    ['x', {}],
+    ['not a date', 1],
+    ['2024-01-02T03:04:05+00:00', 'x'],
+    [None, 1],
+    [[1], 1],
+])
+def test_cursor_with_malformed_values(client, notifications, position):
+    cursor = base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+
+    response = client.get(reverse('api:core:notification-list'), {'cursor': cursor})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('position', [['x', 1], ['1.50', 'x']])
+def test_game_cursor_with_malformed_values(client, position):
+    cursor = base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+
+    response = client.get(reverse('api:games:game-list'), {'cursor': cursor})
+
+    assert response.status_code == 404
+
+
+def test_games_page_by_ad_score(client, user):
+    category = Category.objects.create(name='Action', slug='action')
+    games = [
+        Game.objects.create(
+            title=f'Game {i}', description='Game', price=10, seller=user, category=category,
+            ad_score=Decimal(score)
+        )
+        for i, score in enumerate(['1.50', '9.00', '1.50', '4.25'])
+    ]
+    url = reverse('api:games:game-list') + '?page_size=2'
+
+    ids, pages = walk(client, url)
+
+    assert ids == [games[1].id, games[3].id, games[2].id, games[0].id]
+
+
+def test_estimated_count_above_threshold(settings, mocker, notifications):
+    settings.ESTIMATED_COUNT_THRESHOLD = 1000
+    estimate = mocker.patch('core.pagination.estimate_count', return_value=250000)
+
+    assert EstimatedCountPaginator(Notification.objects.all(), 10).count == 250000
+
+    estimate.return_value = 900
+    assert EstimatedCountPaginator(Notification.objects.all(), 10).count == 7
+
+
+def test_estimates_need_postgresql(notifications):
+    if connection.vendor == 'postgresql':
+        pytest.skip('estimates are available')
+    assert estimate_count(Notification.objects.all()) is None
+
+
+def test_admin_changelist_uses_estimates(mocker, notifications):
+    admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass')
+    mocker.patch('core.pagination.estimate_count', return_value=5000000)
+    client = APIClient()
+    client.force_login(admin)
+
+    response = client.get(reverse('admin:core_notification_changelist'))
+
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 5000000
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import FAQ
+from core.profiling import RequestProfile
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def staff():
+    return User.objects.create_user(
+        username='admin', email='admin@example.com', password='testpass123', is_staff=True
+    )
+
+
+def test_staff_request_is_profiled(client, staff):
+    FAQ.objects.create(question='Q?', answer='A', category='general')
+    client.force_login(staff)
+
+    response = client.get(reverse('api:core:faq-list'), HTTP_X_PROFILE='1')
+
+    assert response.status_code == 200
+    api = APIClient()
+    api.force_authenticate(staff)
+    profile = api.get(reverse('api:core:profile-detail', args=[response['X-Profile-Id']])).json()
+    assert profile['path'] == reverse('api:core:faq-list')
+    assert any('core_faq' in query['sql'] for query in profile['sql'])
+    assert any(call['method'] == 'get' for call in profile['cache'])
+    assert {'call_tree', 'top_functions', 'samples'} <= set(profile)
+    assert [p['id'] for p in api.get(reverse('api:core:profile-list')).json()] == [profile['id']]
+
+
+def test_sampler_builds_call_tree():
+    def slow():
+        time.sleep(0.05)
+
+    with RequestProfile(interval=0.001).record() as profile:
+        slow()
+
+    assert profile.sampler.samples > 0
+    [root] = profile.call_tree()
+    assert root['function'].startswith('slow')
+    assert profile.top_functions()[0]['function'].startswith('slow')
+
+
+def test_profiling_requires_staff(client):
+    client.force_login(User.objects.create_user(
+        username='user', email='user@example.com', password='testpass123'
+    ))
+    response = client.get(reverse('api:core:faq-list') + '?_profile=1')
+    assert 'X-Profile-Id' not in response
+
+
+def test_unknown_profile_is_404(staff):
+    api = APIClient()
+    api.force_authenticate(staff)
+    assert api.get(reverse('api:core:profile-detail', args=['missing'])).status_code == 404
@@ -0,0 +1,103 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from core.models import Notification
+from core.query_budget import QueryBudgetExceeded, QueryRecorder, check_queries, query_shape
+from games.models import Category, Game, GameComment
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username='user', email='user@example.com', password='testpass123')
+
+
+@pytest.fixture
+def game(user):
+    return Game.objects.create(
+        title='Game', description='d', price=Decimal('10.00'), bid_percentage=Decimal('5.00'),
+        seller=user, category=Category.objects.create(name='Action'),
+        is_active=True, is_approved=True
+    )
+
+
+def test_query_shape_collapses_values():
+    assert query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND n = 5') == \
+        query_shape("SELECT * FROM t WHERE id IN (%s) AND n = 'x'")
+
+
+def test_repeated_shape_raises_with_stack(settings, user):
+    settings.QUERY_BUDGET_RAISE = True
+    for n in range(3):
+        Notification.objects.create(user=user, notification_type='system', title=f'N{n}', message='m')
+
+    recorder = QueryRecorder(repeat_threshold=3)
+    with connection.execute_wrapper(recorder):
+        for notification in Notification.objects.all():
+            User.objects.get(pk=notification.user_id)
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        check_queries(recorder, 'test')
+    assert 'possible N+1: 3 x' in str(excinfo.value)
+    assert 'test_query_budget.py' in str(excinfo.value)
+
+
+def test_violations_are_logged_when_not_raising(settings, caplog):
+    settings.QUERY_BUDGET_RAISE = False
+    recorder = QueryRecorder(repeat_threshold=10)
+    with connection.execute_wrapper(recorder):
+        User.objects.count()
+        User.objects.exists()
+
+    check_queries(recorder, 'test', budget=1)
+
+    assert '2 queries, budget is 1' in caplog.text
+
+
+class TestCommentListBudget:
+    def test_replies_are_prefetched(self, client, game, user):
+        for n in range(12):
+            comment = GameComment.objects.create(game=game, user=user, content=f'C{n}')
+            GameComment.objects.create(game=game, user=user, content='reply', parent=comment)
+
+        # Raises QueryBudgetExceeded on N+1 or more than the declared budget
+        response = client.get(reverse('api:games:gamecomment-list'))
+
+        assert response.status_code == 200
+        assert all(len(c['replies']) == 1 for c in response.json()['results'])
+
+    def test_whole_threads_are_rendered(self, client, game, user):
+        parent = None
+        for n in range(5):
+            parent = GameComment.objects.create(game=game, user=user, content=f'L{n}', parent=parent)
+
+        # Raises QueryBudgetExceeded if replies are read a query per comment
+        response = client.get(reverse('api:games:gamecomment-list'))
+
+        reply = response.json()['results'][0]
+        for n in range(1, 5):
+            reply = reply['replies'][0]
+            assert reply['content'] == f'L{n}'
+        assert reply['replies'] == []
+
+    def test_retrieve_renders_whole_thread(self, client, game, user):
+        root = parent = GameComment.objects.create(game=game, user=user, content='L0')
+        for n in range(1, 4):
+            parent = GameComment.objects.create(game=game, user=user, content=f'L{n}', parent=parent)
+
+        response = client.get(reverse('api:games:gamecomment-detail', args=[root.pk]))
+
+        deepest = response.json()['replies'][0]['replies'][0]['replies'][0]
+        assert deepest['content'] == 'L3'
+        assert deepest['replies'] == []
+
+    def test_violation_fails_the_request(self, client, settings, game):
+        settings.QUERY_BUDGET_REPEAT_THRESHOLD = 1
+        with pytest.raises(QueryBudgetExceeded):
+            client.get(reverse('api:games:gamecomment-list'))
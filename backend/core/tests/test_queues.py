@@ -0,0 +1,46 @@
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from samma.celery import app
+
+
+def route(task_name):
+    return app.amqp.router.route({}, task_name)
+
+
+@pytest.mark.parametrize('task_name, queue', [
+    ('games.tasks.process_game_purchase', 'payments-critical'),
+    ('payments.tasks.process_pending_payments', 'payments-critical'),
+    ('core.tasks.cleanup_old_notifications', 'maintenance'),
+    ('core.tasks.send_inactive_user_notifications_range', 'maintenance'),
+    ('games.tasks.update_game_statistics', 'analytics'),
+    ('games.tasks.update_game_statistics_range', 'analytics'),
+    ('core.tasks.invalidate_cache_namespaces', 'user-facing'),
+    ('some.unrouted.task', 'user-facing'),
+])
+def test_routes(task_name, queue):
+    assert route(task_name)['queue'].name == queue
+
+
+def test_purchases_have_top_priority():
+    assert route('games.tasks.process_game_purchase')['priority'] == 0
+
+
+def test_every_queue_has_a_worker_profile():
+    queues = {queue.name for queue in settings.CELERY_TASK_QUEUES}
+    assert queues == set(settings.CELERY_WORKER_PROFILES)
+    for entry in app.conf.beat_schedule.values():
+        assert route(entry['task'])['queue'].name in queues
+
+
+def test_celery_worker_command(mocker):
+    worker_main = mocker.patch.object(app, 'worker_main')
+
+    call_command('celery_worker', 'maintenance')
+
+    argv = worker_main.call_args.kwargs['argv']
+    assert '--queues=maintenance' in argv
+    assert '--prefetch-multiplier=1' in argv
+    assert '--max-tasks-per-child=50' in argv
+    with pytest.raises(CommandError):
+        call_command('celery_worker', 'nope')
@@ -0,0 +1,120 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+from core.renderers import ORJSONParser, ORJSONRenderer
+
+User = get_user_model()
+
+
+@pytest.fixture
+def payload():
+    return ReturnDict({
+        'id': 1,
+        'price': '9.99',
+        'amount': Decimal('10.50'),
+        'created_at': datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+        'local': datetime.datetime(2024, 7, 1, 12, 0, tzinfo=ZoneInfo('Europe/Paris')),
+        'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+        'day': datetime.date(2024, 1, 2),
+        'time': datetime.time(3, 4, 5),
+        'duration': datetime.timedelta(hours=1),
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+        'label': gettext_lazy('Games'),
+        'text': 'Jeux vidéo \u2028\u2029 🎮',
+        'tags': [{'id': 2, 'rating': Decimal('7.5')}],
+        'empty': None,
+    }, serializer=None)
+
+
+def test_renders_like_the_json_renderer(payload):
+    assert ORJSONRenderer().render(payload) == JSONRenderer().render(payload)
+
+
+@pytest.mark.parametrize('media_type', ['application/json; indent=4', 'application/json'])
+def test_indent_and_unsupported_values_fall_back(media_type):
+    data = {'big': 2 ** 70, 'nested': {1: [1, 2]}}
+
+    rendered = ORJSONRenderer().render(data, media_type)
+
+    assert rendered == JSONRenderer().render(data, media_type)
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), Decimal('-Infinity')])
+def test_non_finite_numbers_are_rejected(value):
+    data = {'rating': 7.5, 'scores': [{'value': value}], 'empty': None}
+
+    with pytest.raises(ValueError):
+        JSONRenderer().render(data)
+    with pytest.raises(ValueError, match='not JSON compliant'):
+        ORJSONRenderer().render(data)
+
+
+def test_non_strict_renders_like_the_json_renderer():
+    renderer, fallback = ORJSONRenderer(), JSONRenderer()
+    renderer.strict = fallback.strict = False
+    data = {'rating': float('nan')}
+
+    assert renderer.render(data) == fallback.render(data) == b'{"rating":NaN}'
+
+
+def test_render_nothing():
+    assert ORJSONRenderer().render(None) == b''
+
+
+def test_parses_like_the_json_parser():
+    body = '{"title": "Jeux vidéo", "price": 9.99, "tags": [1, 2], "draft": false}'.encode()
+
+    assert ORJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+
+def test_parses_other_encodings():
+    body = '{"title": "Jeux vidéo"}'.encode('latin-1')
+
+    assert ORJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}) == {
+        'title': 'Jeux vidéo',
+    }
+
+
+@pytest.mark.parametrize('body', [b'{"title": ', b'{"price": NaN}', b'\xff'])
+def test_invalid_json_is_a_parse_error(body):
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(body))
+
+
+def test_msgpack_round_trip(payload):
+    msgpack = pytest.importorskip('msgpack')
+    from core.renderers import MessagePackParser, MessagePackRenderer
+
+    rendered = MessagePackRenderer().render(payload)
+
+    assert msgpack.unpackb(rendered, raw=False)['created_at'] == '2024-01-02T03:04:05.123456Z'
+    assert MessagePackParser().parse(io.BytesIO(rendered))['amount'] == 10.5
+
+
+@pytest.mark.django_db
+def test_api_uses_the_fast_renderer_and_parser():
+    user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(reverse('api:core:notification-list'))
+    invalid = client.post(
+        reverse('api:core:notification-list'), data=b'{"title": ', content_type='application/json'
+    )
+
+    assert isinstance(response.accepted_renderer, ORJSONRenderer)
+    assert response.json()['results'] == []
+    assert invalid.status_code == 400
+    assert invalid.json()['detail'].startswith('JSON parse error')
@@ -0,0 +1,143 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from games.models import Category, Game
+from games.tasks import finish_game_rankings
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def response_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    settings.RESPONSE_CACHE_ENABLED = True
+    # Anonymous users as in production, rather than None
+    settings.REST_FRAMEWORK = dict(
+        settings.REST_FRAMEWORK, UNAUTHENTICATED_USER='django.contrib.auth.models.AnonymousUser'
+    )
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def game():
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    return Game.objects.create(
+        title='Game', description='Game', price=10, seller=seller, category=category,
+        is_approved=True, rating=8
+    )
+
+
+def get_twice(url, **kwargs):
+    """
+    Responses of a first request, which initializes the surrogate keys, and
+    of the one that gets stored
+    """
+    client = APIClient()
+    client.get(url, **kwargs)
+    return client.get(url, **kwargs)
+
+
+def test_hits_skip_the_database(game, django_assert_num_queries):
+    url = reverse('api:games:top-games')
+    stored = get_twice(url)
+
+    with django_assert_num_queries(0):
+        hit = APIClient().get(url)
+
+    assert stored['X-Cache'] == 'MISS'
+    assert hit['X-Cache'] == 'HIT'
+    assert hit['Content-Type'] == 'application/json'
+    assert hit.content == stored.content
+    assert hit.json()['results'][0]['title'] == 'Game'
+
+
+def test_query_strings_are_normalized(game):
+    url = reverse('api:games:top-games')
+    get_twice(url, data={'metric': 'rating', 'time_frame': 'all'})
+
+    hit = APIClient().get(f'{url}?time_frame=all&utm_source=mail&metric=rating')
+    other = APIClient().get(url, {'metric': 'sales'})
+
+    assert hit['X-Cache'] == 'HIT'
+    assert other['X-Cache'] == 'MISS'
+
+
+def test_hosts_get_their_own_entries(game, settings):
+    settings.ALLOWED_HOSTS = ['testserver', 'internal']
+    url = reverse('api:games:top-games')
+    get_twice(url)
+
+    internal = APIClient().get(url, HTTP_HOST='internal')
+    secure = APIClient().get(url, secure=True)
+    hit = APIClient().get(url)
+
+    assert internal['X-Cache'] == 'MISS'
+    assert secure['X-Cache'] == 'MISS'
+    assert hit['X-Cache'] == 'HIT'
+
+
+def test_authenticated_requests_bypass_the_cache(game):
+    url = reverse('api:games:top-games')
+    get_twice(url)
+    User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+    client = APIClient()
+    client.login(username='buyer', password='pass')
+
+    response = client.get(url)
+
+    assert 'X-Cache' not in response
+
+
+def test_game_changes_purge_their_responses(game, django_capture_on_commit_callbacks):
+    detail = reverse('api:games:game-detail', kwargs={'slug': game.slug})
+    top = reverse('api:games:top-games')
+    get_twice(detail)
+    get_twice(top)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game.title = 'Renamed'
+        game.save()
+
+    assert APIClient().get(detail).data['title'] == 'Renamed'
+    assert APIClient().get(top).data['results'][0]['title'] == 'Renamed'
+
+
+def test_category_changes_purge_games_showing_it(game, django_capture_on_commit_callbacks):
+    url = reverse('api:games:game-detail', kwargs={'slug': game.slug})
+    get_twice(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.create(name='Puzzle', slug='puzzle')
+    unrelated = APIClient().get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        game.category.name = 'Arcade'
+        game.category.save()
+    related = APIClient().get(url)
+
+    assert unrelated['X-Cache'] == 'HIT'
+    assert related['X-Cache'] == 'MISS'
+    assert related.data['category']['name'] == 'Arcade'
+
+
+def test_ranking_updates_purge_listings(game):
+    url = reverse('api:games:top-games')
+    get_twice(url)
+
+    finish_game_rankings([])
+
+    assert APIClient().get(url)['X-Cache'] == 'MISS'
+
+
+def test_hits_answer_conditional_requests(game):
+    url = reverse('api:games:game-detail', kwargs={'slug': game.slug})
+    stored = get_twice(url)
+
+    response = APIClient().get(url, HTTP_IF_NONE_MATCH=stored['ETag'])
+
+    assert response.status_code == 304
@@ -0,0 +1,103 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from core.sharding import fan_out, id_ranges, lanes
+from games.models import Category, Game, GameComment
+from games.tasks import update_game_statistics, update_game_statistics_range
+from samma.celery import app
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def eager():
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = False
+
+
+@pytest.fixture
+def games(db):
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    games = [
+        Game.objects.create(
+            title=f'Game {i}', description='Game', price=10, seller=seller, category=category
+        )
+        for i in range(5)
+    ]
+    for i, game in enumerate(games):
+        for rating in range(1, i + 2):
+            GameComment.objects.create(game=game, user=buyer, content='Nice', rating=rating)
+    return games
+
+
+def test_lanes_cap_parallelism():
+    ranges = [(i, i + 1) for i in range(7)]
+
+    assert lanes(ranges, 3) == [
+        [(0, 1), (3, 4), (6, 7)],
+        [(1, 2), (4, 5)],
+        [(2, 3), (5, 6)],
+    ]
+    assert lanes(ranges[:2], 8) == [[(0, 1)], [(1, 2)]]
+    assert lanes([], 8) == []
+
+
+def test_id_ranges_cover_the_queryset(games):
+    first, last = games[0].id, games[-1].id
+
+    ranges = id_ranges(Game.objects.all(), 2)
+
+    assert ranges[0][0] == first and ranges[-1][1] == last + 1
+    assert all(end - start <= 2 for start, end in ranges)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert id_ranges(Game.objects.none(), 2) == []
+
+
+def test_fan_out_collects_shard_results(games, eager):
+    ranges = id_ranges(Game.objects.all(), 2)
+
+    result = fan_out(update_game_statistics_range, ranges, max_parallel=2)
+
+    assert sorted(rows for lane in result.get() for rows in lane) == [1, 2, 2]
+
+
+def test_sharded_statistics_match_a_single_pass(games, eager):
+    result = update_game_statistics.apply(kwargs={'shard_size': 2}).get()
+
+    assert result['shards'] == 3
+    for i, game in enumerate(Game.objects.order_by('id')):
+        assert game.total_ratings == i + 1
+        assert float(game.rating) == pytest.approx((i + 2) / 2)
+    assert cache.get(f'singleton:{update_game_statistics.name}') is None
+
+
+def test_lock_is_held_until_the_shards_are_finished(games, mocker):
+    dispatch = mocker.patch('games.tasks.fan_out')
+    lock_key = f'singleton:{update_game_statistics.name}'
+
+    update_game_statistics.apply(kwargs={'shard_size': 2})
+
+    assert cache.get(lock_key) is not None
+    assert update_game_statistics.apply(kwargs={'shard_size': 2}).get()['skipped'] is True
+    dispatch.call_args.kwargs['callback'].apply(args=([2, 2, 1],))
+    assert cache.get(lock_key) is None
+
+
+def test_small_tables_run_inline(games, mocker):
+    dispatch = mocker.patch('games.tasks.fan_out')
+
+    result = update_game_statistics.apply().get()
+
+    assert result['rows'] == 5
+    dispatch.assert_not_called()
+    assert Game.objects.get(id=games[2].id).total_ratings == 3
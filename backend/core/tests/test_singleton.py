@@ -0,0 +1,96 @@
+import pytest
+from celery.exceptions import Retry
+from django.core.cache import cache
+from prometheus_client import REGISTRY
+from core.singleton import CacheLock, LockLost, SingletonTask
+from core.tasks import invalidate_cache_namespaces
+from games.tasks import flush_game_sales_buffer
+from samma.celery import app
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def flush(mocker):
+    return mocker.patch('games.tasks.flush_sales_buffer', return_value=(1, 1))
+
+
+def skipped(task_name):
+    return REGISTRY.get_sample_value(
+        'samma_celery_singleton_contention_total', {'task': task_name, 'action': 'skipped'}
+    ) or 0
+
+
+def test_runs_and_releases_the_lock(flush):
+    assert flush_game_sales_buffer.apply().get()['rows'] == 2
+    assert flush_game_sales_buffer.apply().get()['rows'] == 2
+    assert cache.get(f'singleton:{flush_game_sales_buffer.name}') is None
+
+
+def test_skips_while_another_run_holds_the_lock(flush):
+    name = flush_game_sales_buffer.name
+    before = skipped(name)
+    held = CacheLock(f'singleton:{name}', 60)
+    assert held.acquire()
+
+    result = flush_game_sales_buffer.apply().get()
+
+    assert result['skipped'] is True
+    flush.assert_not_called()
+    assert skipped(name) == before + 1
+
+
+def test_queue_contention_retries():
+    @app.task(base=SingletonTask, singleton_contention='queue', name='tests.singleton_queue')
+    def queued():
+        return 'ran'
+
+    CacheLock('singleton:tests.singleton_queue', 60).acquire()
+
+    with pytest.raises(Retry):
+        queued.apply(throw=True)
+
+
+def test_cache_lock_lease_renewal():
+    lock = CacheLock('lock', 60)
+    assert lock.acquire()
+    assert not CacheLock('lock', 60).acquire()
+    lock.reacquire()
+
+    lock.release()
+    with pytest.raises(LockLost):
+        lock.reacquire()
+
+
+def test_all_beat_tasks_are_singletons():
+    app.loader.import_default_modules()
+    for entry in app.conf.beat_schedule.values():
+        assert isinstance(app.tasks[entry['task']], SingletonTask), entry['task']
+
+
+def test_plain_tasks_are_not_locked():
+    assert not isinstance(invalidate_cache_namespaces, SingletonTask)
+
+
+def test_handed_off_lock_outlives_the_run():
+    @app.task(base=SingletonTask, name='tests.singleton_hand_off')
+    def dispatch(fail=False):
+        release = dispatch.hand_off_lock()
+        if fail:
+            raise RuntimeError('broker down')
+        return release
+
+    release = dispatch.apply().get()
+    assert cache.get('singleton:tests.singleton_hand_off') is not None
+    assert dispatch.apply().get()['skipped'] is True
+
+    release.apply()
+    assert cache.get('singleton:tests.singleton_hand_off') is None
+
+    dispatch.apply(kwargs={'fail': True})
+    assert cache.get('singleton:tests.singleton_hand_off') is None
@@ -0,0 +1,73 @@
+import logging
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from core.slow_queries import QueryLog, fingerprint, query_log, query_origin, report, reset
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    reset()
+    yield
+    cache.clear()
+
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint('SELECT 1 FROM t WHERE a = 5 AND b IN (%s, %s)')[0] == \
+        fingerprint('SELECT 1 FROM t WHERE a = 7 AND b IN (%s)')[0]
+
+
+def test_installed_on_connections():
+    assert query_log in connection.execute_wrappers
+
+
+def test_aggregates_by_fingerprint():
+    for pk in range(3):
+        User.objects.filter(pk=pk).exists()
+    User.objects.count()
+
+    rows = [row for row in report(order_by='count') if 'accounts_user' in row['sql']]
+    assert [row['count'] for row in rows] == [3, 1]
+    assert rows[0]['total'] >= rows[0]['mean'] > 0
+    assert rows[0]['p95'] >= 1
+
+
+def test_slow_queries_are_logged_with_origin(settings, caplog):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    token = query_origin.set('GameViewSet.list')
+    try:
+        with caplog.at_level(logging.WARNING, logger='core.slow_queries'):
+            QueryLog().record('SELECT 1', 0.5)
+    finally:
+        query_origin.reset(token)
+    assert 'from GameViewSet.list: SELECT 1' in caplog.text
+
+
+def test_flushes_off_the_query_thread(settings, mocker):
+    settings.SLOW_QUERY_FLUSH_SECONDS = 0
+    threads = []
+    mocker.patch('core.slow_queries._incr', side_effect=lambda *args: threads.append(threading.current_thread()))
+    log = QueryLog()
+
+    log.record('SELECT 1', 0.5)
+    log.flush()
+
+    assert threads
+    assert threading.current_thread() not in threads
+
+
+def test_report_command(capsys):
+    User.objects.count()
+
+    call_command('slow_queries', '--top', '5')
+
+    assert 'COUNT(*)' in capsys.readouterr().out
@@ -0,0 +1,68 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.task_monitor import record_run, task_runs, task_stats
+from core.tasks import invalidate_cache_namespaces
+from games.tasks import flush_game_sales_buffer
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+def test_signals_record_structured_runs(mocker):
+    mocker.patch('games.tasks.flush_sales_buffer', return_value=(2, 1))
+
+    flush_game_sales_buffer.apply()
+
+    [run] = task_runs('games.tasks.flush_game_sales_buffer')
+    assert run['state'] == 'SUCCESS'
+    assert run['rows'] == 3
+    assert run['duration'] >= 0
+    assert run['overlapped'] is False
+
+
+def test_stats_report_percentiles_and_overruns():
+    name = 'games.tasks.flush_game_sales_buffer'  # scheduled every 30 s
+    for n, duration in enumerate([100, 200, 300, 400, 45000]):
+        record_run(name, (1000.0 + n, duration, n * 10.0, 'SUCCESS', n, 0, n == 4))
+
+    stats = task_stats(name)
+
+    assert stats['runs'] == 5
+    assert stats['duration_p50'] == 300
+    assert stats['duration_p95'] == 45000
+    assert stats['lateness_max'] == 40.0
+    assert stats['overruns'] == 1
+    assert stats['overlaps'] == 1
+    assert stats['rows'] == 10
+    assert stats['last_run']['started_at'] == 1004.0
+
+
+def test_ring_buffer_keeps_latest_runs(settings):
+    settings.TASK_MONITOR_RETAIN = 3
+    for n in range(5):
+        record_run('task', (float(n), 1.0, None, 'SUCCESS', None, 0, False))
+    assert [run['started_at'] for run in task_runs('task')] == [4.0, 3.0, 2.0]
+
+
+@pytest.mark.django_db
+def test_task_stats_api():
+    invalidate_cache_namespaces.apply()
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(
+        username='admin', email='admin@example.com', password='testpass123', is_staff=True
+    ))
+
+    stats = client.get(reverse('api:core:task-stats')).json()
+    detail = client.get(reverse('api:core:task-stats-detail', args=['core.tasks.invalidate_cache_namespaces'])).json()
+
+    assert [s['task'] for s in stats] == ['core.tasks.invalidate_cache_namespaces']
+    assert len(detail['history']) == 1
@@ -0,0 +1,99 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from core.models import Notification
+from core.tasks import send_inactive_user_notifications, send_inactive_user_notifications_range
+from samma.celery import app
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def eager():
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = False
+
+
+@pytest.fixture
+def inactive_users():
+    last_login = timezone.now() - timezone.timedelta(days=60)
+    return [
+        User.objects.create_user(
+            username=f'inactive{n}', email=f'inactive{n}@example.com',
+            password='testpass123', last_login=last_login
+        )
+        for n in range(5)
+    ]
+
+
+@pytest.fixture
+def active_user():
+    return User.objects.create_user(
+        username='active', email='active@example.com',
+        password='testpass123', last_login=timezone.now()
+    )
+
+
+class TestSendInactiveUserNotifications:
+    def test_notifies_inactive_users_in_batches(self, inactive_users, active_user):
+        result = send_inactive_user_notifications(batch_size=2)
+
+        assert result['rows'] == 5
+        assert Notification.objects.count() == 5
+        assert not Notification.objects.filter(user=active_user).exists()
+        notification = Notification.objects.get(user=inactive_users[0])
+        assert notification.data['campaign'] == 'inactive_user'
+        assert notification.data['last_login'] == inactive_users[0].last_login.isoformat()
+
+    def test_does_not_renotify(self, inactive_users):
+        send_inactive_user_notifications()
+        result = send_inactive_user_notifications()
+
+        assert result['rows'] == 0
+        assert Notification.objects.count() == 5
+
+    def test_renotifies_after_new_login(self, inactive_users):
+        send_inactive_user_notifications()
+        user = inactive_users[0]
+        User.objects.filter(id=user.id).update(last_login=timezone.now() - timezone.timedelta(days=31))
+        Notification.objects.filter(user=user).update(
+            created_at=timezone.now() - timezone.timedelta(days=45)
+        )
+
+        assert send_inactive_user_notifications()['rows'] == 1
+
+    def test_range_subtask_only_covers_its_ids(self, inactive_users):
+        ids = sorted(user.id for user in inactive_users)
+
+        send_inactive_user_notifications_range(ids[0], ids[2])
+
+        assert set(Notification.objects.values_list('user_id', flat=True)) == set(ids[:2])
+
+    def test_parallel_keeps_the_lock_until_range_subtasks_finish(self, mocker, inactive_users, locmem_cache):
+        fan_out = mocker.patch('core.tasks.fan_out')
+        lock_key = f'singleton:{send_inactive_user_notifications.name}'
+
+        result = send_inactive_user_notifications(parallel=True, range_size=2)
+
+        assert result['subtasks'] == 3
+        assert len(fan_out.call_args.args[1]) == 3
+        assert cache.get(lock_key) is not None
+        fan_out.call_args.kwargs['callback'].apply()
+        assert cache.get(lock_key) is None
+
+    def test_parallel_notifies_every_range(self, inactive_users, locmem_cache, eager):
+        send_inactive_user_notifications.apply(kwargs={'parallel': True, 'range_size': 2})
+
+        assert Notification.objects.count() == 5
+        assert cache.get(f'singleton:{send_inactive_user_notifications.name}') is None
@@ -7,6 +7,11 @@ from core.views.api import (
     DashboardStatsAPIView,
     MarkNotificationReadAPIView,
     SystemHealthCheckAPIView,
+    CacheStatsAPIView,
+    ProfileListAPIView,
+    ProfileDetailAPIView,
+    TaskStatsAPIView,
+    metrics,
     health_check,
     system_info,
     GetCSRFToken,
@@ -25,5 +30,11 @@ urlpatterns = [
     path('system/health-check/', health_check, name='health-check'),
     path('system/info/', system_info, name='system-info'),
     path('health/', SystemHealthCheckAPIView.as_view(), name='system-health'),
+    path('cache/stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
+    path('profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('profiles/<str:profile_id>/', ProfileDetailAPIView.as_view(), name='profile-detail'),
+    path('tasks/stats/', TaskStatsAPIView.as_view(), name='task-stats'),
+    path('tasks/stats/<str:task>/', TaskStatsAPIView.as_view(), name='task-stats-detail'),
+    path('metrics/', metrics, name='metrics'),
     path('csrf/', GetCSRFToken.as_view(), name='csrf-token'),
 ] + router.urls 
\ No newline at end of file
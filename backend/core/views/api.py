@@ -5,11 +5,24 @@ from rest_framework.permissions import AllowAny
 from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache
 from django.conf import settings
-import psutil
-import redis
+import time
+from core.metrics import render_metrics
+from core.pagination import KeysetPagination
+from core.profiling import get_profile, recent_profiles
+from core.task_monitor import all_task_stats, task_runs, task_stats
+from core.cache import NAMESPACES, dashboard_cache, hot_cache
+from core.health import (
+    health_report,
+    probe_cache,
+    probe_celery,
+    probe_database,
+    probe_paypal,
+    run_probes,
+    sampler,
+)
 from core.models import Notification, AuditLog, SystemConfiguration, FAQ
+from core.views.mixins import ConditionalGetMixin, HotCacheListMixin, SparseFieldsetMixin
 from core.serializers.core import (
     NotificationSerializer,
     AuditLogSerializer,
@@ -18,7 +31,7 @@ from core.serializers.core import (
     DashboardStatsSerializer,
     SystemHealthSerializer,
 )
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
@@ -43,13 +56,14 @@ def system_info(request):
     }, status=status.HTTP_200_OK)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and managing notifications.
     """
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(
@@ -78,10 +92,13 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return Response({'status': 'all notifications marked as read'})
 
 
-class FAQViewSet(viewsets.ModelViewSet):
+class FAQViewSet(ConditionalGetMixin, SparseFieldsetMixin, HotCacheListMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and managing FAQs.
     """
+    hot_cache_key = 'faqs'
+    conditional_versions = ('faqs',)
+    cache_max_age = 60
     queryset = FAQ.objects.filter(is_active=True)
     serializer_class = FAQSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -101,11 +118,22 @@ class FAQViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('category', 'order')
 
+    def get_hot_objects(self):
+        faqs = super().get_hot_objects()
+        
+        # Filter by category
+        category = self.request.query_params.get('category')
+        if category:
+            faqs = [faq for faq in faqs if faq.category == category]
+        
+        return faqs
+
 
-class SystemConfigurationViewSet(viewsets.ModelViewSet):
+class SystemConfigurationViewSet(HotCacheListMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and managing system configurations.
     """
+    hot_cache_key = 'public_configs'
     queryset = SystemConfiguration.objects.all()
     serializer_class = SystemConfigurationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -122,6 +150,12 @@ class SystemConfigurationViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_public=True)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Staff see private configurations too, which aren't in the hot cache
+        if request.user.is_staff:
+            return viewsets.ModelViewSet.list(self, request, *args, **kwargs)
+        return super().list(request, *args, **kwargs)
+
 
 class DashboardStatsAPIView(generics.RetrieveAPIView):
     """
@@ -132,8 +166,8 @@ class DashboardStatsAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         # Try to get cached statistics
-        cache_key = f'dashboard_stats_{self.request.user.id}'
-        stats = cache.get(cache_key)
+        cache_key = f'stats_{self.request.user.id}'
+        stats = dashboard_cache.get(cache_key)
         
         if not stats:
             # Calculate statistics
@@ -180,7 +214,7 @@ class DashboardStatsAPIView(generics.RetrieveAPIView):
             }
             
             # Cache for 5 minutes
-            cache.set(cache_key, stats, 300)
+            dashboard_cache.set(cache_key, stats, 300)
         
         return stats
 
@@ -210,94 +244,125 @@ class SystemHealthCheckAPIView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get_object(self):
-        # Check database
-        from django.db import connection
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            db_status = {'status': 'healthy', 'latency': 0}  # Add actual latency measurement
-        except Exception as e:
-            db_status = {'status': 'unhealthy', 'error': str(e)}
-
-        # Check Redis cache
-        try:
-            redis_client = redis.from_url(settings.REDIS_URL)
-            redis_client.ping()
-            cache_status = {'status': 'healthy', 'used_memory': redis_client.info()['used_memory_human']}
-        except Exception as e:
-            cache_status = {'status': 'unhealthy', 'error': str(e)}
-
-        # Check Celery
-        try:
-            from celery.app.control import Control
-            from samma.celery import app
-            
-            control = Control(app)
-            active_workers = control.inspect().active()
-            celery_status = {
-                'status': 'healthy' if active_workers else 'warning',
-                'active_workers': len(active_workers) if active_workers else 0
-            }
-        except Exception as e:
-            celery_status = {'status': 'unhealthy', 'error': str(e)}
-
-        # Check storage
-        storage_info = psutil.disk_usage('/')
-        storage_status = {
-            'total': storage_info.total,
-            'used': storage_info.used,
-            'free': storage_info.free,
-            'percent': storage_info.percent
-        }
+        return health_report(self.build_report)
 
-        # Check PayPal API
-        try:
-            import paypalrestsdk
-            paypal_status = {'status': 'healthy'} if paypalrestsdk.api.default().token else {'status': 'unhealthy'}
-        except Exception as e:
-            paypal_status = {'status': 'unhealthy', 'error': str(e)}
-
-        # System metrics
-        memory = psutil.virtual_memory()
-        memory_status = {
-            'total': memory.total,
-            'available': memory.available,
-            'percent': memory.percent,
-            'used': memory.used
-        }
+    def build_report(self):
+        started = time.perf_counter()
+        timeout = settings.HEALTH_CHECK_TIMEOUT
+
+        # Probe dependencies concurrently, each bounded by the deadline
+        probes = run_probes({
+            'database': probe_database,
+            'cache': probe_cache,
+            'celery': lambda: probe_celery(timeout),
+            'paypal': lambda: probe_paypal(timeout),
+        }, timeout=timeout)
+
+        # System metrics sampled in the background
+        system = sampler.latest()
 
         # Get error rate from logs
         from core.models import AuditLog
         recent_logs = AuditLog.objects.filter(
             created_at__gte=timezone.now() - timezone.timedelta(hours=1)
+        ).aggregate(
+            total=Count('id'),
+            errors=Count('id', filter=Q(changes__has_key='error') | Q(action='error'))
+        )
+        error_rate = (
+            recent_logs['errors'] / recent_logs['total'] * 100
+            if recent_logs['total'] > 0 else 0
         )
-        total_logs = recent_logs.count()
-        error_logs = recent_logs.filter(
-            Q(changes__contains='error') | Q(action='error')
-        ).count()
-        error_rate = (error_logs / total_logs * 100) if total_logs > 0 else 0
+
+        last_backup = SystemConfiguration.objects.filter(
+            key='last_backup_time'
+        ).values_list('value', flat=True).first()
 
         return {
             'status': 'healthy' if all(
-                x['status'] == 'healthy' for x in 
-                [db_status, cache_status, celery_status, paypal_status]
+                probe['status'] == 'healthy' for probe in probes.values()
             ) else 'degraded',
-            'database': db_status,
-            'cache': cache_status,
-            'celery': celery_status,
-            'storage': storage_status,
-            'paypal': paypal_status,
-            'memory_usage': memory_status,
-            'cpu_usage': psutil.cpu_percent(interval=1),
-            'disk_usage': storage_status,
-            'last_backup': SystemConfiguration.objects.filter(
-                key='last_backup_time'
-            ).first().value if SystemConfiguration.objects.filter(
-                key='last_backup_time'
-            ).exists() else None,
-            'error_rate': error_rate
+            'database': probes['database'],
+            'cache': probes['cache'],
+            'celery': probes['celery'],
+            'storage': system['disk_usage'],
+            'paypal': probes['paypal'],
+            'memory_usage': system['memory_usage'],
+            'cpu_usage': system['cpu_usage'],
+            'disk_usage': system['disk_usage'],
+            'last_backup': last_backup,
+            'error_rate': error_rate,
+            'response_time': round((time.perf_counter() - started) * 1000, 2),
         }
 
+
+class CacheStatsAPIView(APIView):
+    """
+    API view for cache hit/miss statistics per namespace
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'namespaces': {
+                name: namespace.stats()
+                for name, namespace in NAMESPACES.items()
+            },
+            # Per-process counters of the worker serving this request
+            'hot_cache': hot_cache.stats(),
+        })
+
+
+class ProfileListAPIView(APIView):
+    """
+    API view listing recent request profiles
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(recent_profiles())
+
+
+class ProfileDetailAPIView(APIView):
+    """
+    API view returning a stored request profile
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profile_id, *args, **kwargs):
+        profile = get_profile(profile_id)
+        if profile is None:
+            return Response(
+                {'detail': _('Profile not found or expired.')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(profile)
+
+
+class TaskStatsAPIView(APIView):
+    """
+    API view for Celery task runtime and lateness statistics
+
+    With a ``task`` name, returns that task's statistics and its stored runs.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, task=None, *args, **kwargs):
+        if task is None:
+            return Response(all_task_stats())
+        return Response(dict(task_stats(task), history=task_runs(task)))
+
+
+def metrics(request):
+    """
+    Prometheus metrics in the text exposition format
+    """
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS):
+        return HttpResponseForbidden()
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class GetCSRFToken(APIView):
     permission_classes = [AllowAny]
@@ -1,16 +1,19 @@
 from django.views.generic import TemplateView, ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from core.models import Notification, FAQ
+from core.cache import hot_cache
+from core.models import Notification
+from core.views.mixins import ResponseCacheMixin
 from games.models import Game
 from payments.models import Payment
 from django.db.models import Sum, Count
 from django.utils import timezone
 
-class HomeView(TemplateView):
+class HomeView(ResponseCacheMixin, TemplateView):
     """
     Home page view
     """
     template_name = 'core/home.html'
+    cache_tags = ('games', 'ranking', 'users')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -77,9 +80,7 @@ class FAQView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['faqs'] = FAQ.objects.filter(
-            is_active=True
-        ).order_by('category', 'order')
+        context['faqs'] = hot_cache.get('faqs')
         return context
 
 
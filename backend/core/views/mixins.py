@@ -0,0 +1,162 @@
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+from core.cache import hot_cache
+from core.conditional import get_versions, make_etag
+from core.response_cache import get_response, is_anonymous, store_response
+from core.serializers.dynamic import optimize_queryset, sparse_params
+from core.serializers.fast import values_plan
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``list`` and ``retrieve`` requests carrying ``If-None-Match`` or
+    ``If-Modified-Since`` with ``304 Not Modified`` when nothing changed,
+    before any serializer work. ``get_conditional_state()`` describes what
+    the response reads, by default the version counters named in
+    ``conditional_versions``, see ``core.conditional``.
+    """
+    conditional_versions = ()
+    # Seconds clients may reuse a response before revalidating it
+    cache_max_age = 0
+
+    def get_conditional_state(self):
+        """
+        ``(parts, last modified datetime)``, where ``parts`` change whenever
+        the response would; None to answer unconditionally
+        """
+        if not self.conditional_versions:
+            return None
+        return get_versions(*self.conditional_versions)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        state = self.get_conditional_state()
+        if state is None:
+            return handler(request, *args, **kwargs)
+
+        parts, last_modified = state
+        # The same state renders differently per query string and media type
+        etag = quote_etag(make_etag(parts, request.get_full_path(), request.accepted_media_type))
+        last_modified = int(last_modified.timestamp())
+        validators = HttpResponse()
+        self.set_validators(validators, etag, last_modified)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+        if response is not validators:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if 200 <= response.status_code < 300:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        user = self.request.user
+        visibility = 'private' if user is not None and user.is_authenticated else 'public'
+        patch_cache_control(response, max_age=self.cache_max_age, must_revalidate=True, **{visibility: True})
+        patch_vary_headers(response, ['Accept'])
+
+
+class ResponseCacheMixin:
+    """
+    Serve anonymous GET requests from ``core.response_cache``, before
+    authentication or any database work. Successful responses are stored
+    under the surrogate keys of ``get_cache_tags()``; none means not cached.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self, response):
+        return self.cache_tags
+
+    def dispatch(self, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_ENABLED or not is_anonymous(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        response = get_response(request)
+        if response is not None:
+            last_modified = parse_http_date_safe(response.get('Last-Modified', ''))
+            return get_conditional_response(
+                request, etag=response.get('ETag'), last_modified=last_modified, response=response
+            )
+
+        started = time.time()
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code == 200 and not response.streaming:
+            if hasattr(response, 'render'):
+                response.render()
+            tags = self.get_cache_tags(response)
+            if tags:
+                store_response(request, response, tags, started)
+                response['X-Cache'] = 'MISS'
+        return response
+
+
+class HotCacheListMixin:
+    """
+    Serve the ``list`` action from ``core.cache.hot_cache`` instead of the
+    database. ``hot_cache_key`` names the registered loader to use.
+    """
+    hot_cache_key = None
+
+    def get_hot_objects(self):
+        return hot_cache.get(self.hot_cache_key)
+
+    def list(self, request, *args, **kwargs):
+        objects = self.get_hot_objects()
+
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(objects, many=True)
+        return Response(serializer.data)
+
+
+class SparseFieldsetMixin:
+    """
+    Narrow the queryset to the columns and joins the serializer still reads
+    when a read request passes ``fields``, ``omit`` or ``expand``, see
+    ``core.serializers.dynamic``
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if sparse_params(self.request) is not None:
+            queryset = optimize_queryset(queryset, self.get_serializer())
+        return queryset
+
+
+class FastListMixin:
+    """
+    Serve the ``list`` action from ``values()`` rows through the compiled
+    plan of the serializer, see ``core.serializers.fast``. Sparse fieldsets
+    and serializers without a plan go through the serializer as usual.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = values_plan(self.get_serializer_class())
+        if plan is None or sparse_params(request) is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Keyset pagination reads the positions from the rows
+        ordering = [field.lstrip('-') for field in getattr(self.paginator, 'ordering', ())]
+        rows = queryset.values(*plan.columns, *ordering)
+        context = self.get_serializer_context()
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page, context))
+        return Response(plan.serialize(rows, context))
@@ -13,4 +13,4 @@ python manage.py migrate
 
 # Start server
 echo "Starting server..."
-python manage.py runserver 0.0.0.0:8000 
\ No newline at end of file
+exec gunicorn samma.wsgi:application --config gunicorn.conf.py 
\ No newline at end of file
@@ -0,0 +1,15 @@
+"""
+Loaders for catalog rows served from ``core.cache.hot_cache``.
+"""
+from core.cache import hot_cache
+from games.models import Category, Tag
+
+
+@hot_cache.loader('categories')
+def load_categories():
+    return list(Category.objects.all())
+
+
+@hot_cache.loader('tags')
+def load_tags():
+    return list(Tag.objects.all())
@@ -0,0 +1,76 @@
+"""
+Games users own.
+
+A ``LibraryEntry`` row per ``(user, game)`` is written when a payment
+completes and deleted when it's refunded or fails, so "has U bought G" is a
+unique index lookup instead of a scan of the buyer's payments.
+
+On top of it the ids of each user's games are cached as one set under
+``library:<user id>``. A single check and the ownership of a whole page of
+game cards are then answered by one cache read. The set is dropped on every
+change to the user's library and again once it commits. Purchases don't
+trust a cached "not owned" and confirm it in the database.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from games.models import LibraryEntry
+
+LIBRARY_KEY = 'library:{}'
+
+
+def owned_game_ids(user):
+    """
+    Frozen set of the ids of the games ``user`` owns
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    key = LIBRARY_KEY.format(user.pk)
+    game_ids = cache.get(key)
+    if game_ids is None:
+        game_ids = frozenset(LibraryEntry.objects.filter(user=user).values_list('game_id', flat=True))
+        cache.set(key, game_ids, settings.LIBRARY_CACHE_TIMEOUT)
+    return game_ids
+
+
+def owns(user, game, verify=False):
+    """
+    Whether ``user`` owns ``game`` (an instance or an id); with ``verify``, a
+    negative answer of the cache is confirmed in the database
+    """
+    game_id = getattr(game, 'pk', game)
+    if game_id in owned_game_ids(user):
+        return True
+    if not verify or user is None or not user.is_authenticated:
+        return False
+    return LibraryEntry.objects.filter(user=user, game_id=game_id).exists()
+
+
+def annotate_ownership(user, games, game_ids):
+    """
+    Copies of the serialized ``games`` with ``is_owned`` set from the
+    matching ``game_ids``, by one lookup of the library of ``user``
+    """
+    owned = owned_game_ids(user)
+    return [{**game, 'is_owned': game_id in owned} for game, game_id in zip(games, game_ids)]
+
+
+def add_to_library(user_id, game_id, acquired_at):
+    LibraryEntry.objects.bulk_create(
+        [LibraryEntry(user_id=user_id, game_id=game_id, acquired_at=acquired_at)],
+        ignore_conflicts=True
+    )
+    _evict(user_id)
+
+
+def remove_from_library(user_id, game_id):
+    LibraryEntry.objects.filter(user_id=user_id, game_id=game_id).delete()
+    _evict(user_id)
+
+
+def _evict(user_id):
+    key = LIBRARY_KEY.format(user_id)
+    cache.delete(key)
+    # Again after commit, in case a reader re-cached the old library meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,108 @@
+from decimal import Decimal
+import base64
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.models import User
+from games.models import Category, Game
+from games.views.api import GameViewSet
+
+
+class LegacyGameViewSet(GameViewSet):
+    """
+    The game list as it was: one OR of both visibility rules under DISTINCT
+    """
+    keyset_branches = None
+
+    def get_queryset(self):
+        queryset = Game.objects.filter(is_active=True)
+        if self.request.user.is_authenticated:
+            return queryset.filter(Q(is_approved=True) | Q(seller=self.request.user)).distinct()
+        return queryset.filter(is_approved=True)
+
+
+def _latency_ms(view, request, rounds):
+    """
+    Median wall time of ``rounds`` renderings of ``request``, in milliseconds
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = view(request)
+        response.render()
+        timings.append((time.perf_counter() - started) * 1e3)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the latency of the game list (first page and a page in the middle) before and after '
+        'the split visibility query, for anonymous users, buyers and sellers with pending games. '
+        'Benchmark data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=1_000_000, help='Games in the table')
+        parser.add_argument('--pending', type=float, default=0.01, help='Share of games awaiting approval')
+        parser.add_argument('--sellers', type=int, default=1000, help='Sellers owning the games')
+        parser.add_argument('--rounds', type=int, default=5, help='Requests per measurement, the median counts')
+
+    def handle(self, *args, **options):
+        count = options['games']
+        rng = random.Random(0)
+
+        with transaction.atomic(), override_settings(RESPONSE_CACHE_ENABLED=False):
+            sellers = User.objects.bulk_create([
+                User(username=f'bench-list-seller-{i}', email=f'bench-list-seller-{i}@example.com')
+                for i in range(options['sellers'])
+            ])
+            buyer = User.objects.create_user(username='bench-list-buyer', email='bench-list-buyer@example.com')
+            category = Category.objects.create(name='Bench', slug='bench-game-list')
+            for start in range(0, count, 10_000):
+                Game.objects.bulk_create([
+                    Game(
+                        title=f'Bench Game {i}', slug=f'bench-game-list-{i}', description='List benchmark',
+                        price=Decimal('9.99'), seller=sellers[i % len(sellers)], category=category,
+                        is_approved=rng.random() >= options['pending'],
+                        ad_score=Decimal(rng.randrange(100_000)) / 100
+                    )
+                    for i in range(start, min(start + 10_000, count))
+                ])
+            self.stdout.write(f'{count} games loaded')
+
+            pending_seller = Game.objects.filter(is_approved=False).values_list('seller', flat=True).first()
+            middle = (
+                Game.objects.filter(is_approved=True).order_by('-ad_score', '-id')
+                .values_list('ad_score', 'id')[count // 2:count // 2 + 1].get()
+            )
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': [str(middle[0]), middle[1]]}).encode()).decode()
+            users = (
+                ('anonymous', AnonymousUser()),
+                ('buyer', buyer),
+                ('seller', User.objects.get(pk=pending_seller) if pending_seller else buyer),
+            )
+            pages = (('first', {}), ('middle', {'cursor': cursor}))
+
+            legacy = LegacyGameViewSet.as_view({'get': 'list'})
+            current = GameViewSet.as_view({'get': 'list'})
+            factory = APIRequestFactory()
+            self.stdout.write(f'{"user":<10} {"page":<7} {"before ms":>10} {"after ms":>9} {"speedup":>8}')
+            for user_name, user in users:
+                for page_name, params in pages:
+                    request = factory.get('/api/v1/games/', params, HTTP_HOST='localhost')
+                    force_authenticate(request, user=user)
+                    before = _latency_ms(legacy, request, options['rounds'])
+                    after = _latency_ms(current, request, options['rounds'])
+                    self.stdout.write(
+                        f'{user_name:<10} {page_name:<7} {before:>10.2f} {after:>9.2f} {before / after:>7.1f}x'
+                    )
+
+            transaction.set_rollback(True)
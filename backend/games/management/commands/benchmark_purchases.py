@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from accounts.models import User
+from core.models import Notification
+from games.models import Category, Game
+from games.sales_buffer import flush_sales_buffer
+from games.tasks import process_game_purchase
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = 'Runs concurrent purchases of a single game and checks that no sale counter increments are lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purchases', type=int, default=1000, help='Number of purchases to process')
+        parser.add_argument('--workers', type=int, default=32, help='Number of parallel workers')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError('This benchmark needs a database that supports concurrent writers (PostgreSQL).')
+
+        purchases = options['purchases']
+        price = Decimal('9.99')
+
+        seller, _ = User.objects.get_or_create(
+            username='bench-seller', defaults={'email': 'bench-seller@example.com'}
+        )
+        buyer, _ = User.objects.get_or_create(
+            username='bench-buyer', defaults={'email': 'bench-buyer@example.com'}
+        )
+        category, _ = Category.objects.get_or_create(slug='bench', defaults={'name': 'Bench'})
+        game = Game.objects.create(
+            title='Bench Game', description='Purchase benchmark', price=price,
+            seller=seller, category=category
+        )
+        payment_ids = [
+            p.id for p in Payment.objects.bulk_create([
+                Payment(
+                    buyer=buyer, seller=seller, game=game, amount=price,
+                    platform_fee=Decimal('0.50'), seller_amount=price - Decimal('0.50'),
+                    status='completed'
+                )
+                for _ in range(purchases)
+            ])
+        ]
+        seller_sales_before = User.objects.get(id=seller.id).total_sales
+
+        def purchase(payment_id):
+            try:
+                return process_game_purchase(payment_id)
+            finally:
+                connection.close()
+
+        self.stdout.write(f'Processing {purchases} purchases with {options["workers"]} workers...')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(purchase, payment_ids))
+        elapsed = time.perf_counter() - started
+
+        if settings.GAME_SALES_BUFFER_ENABLED:
+            flush_sales_buffer()
+
+        errors = [r['summary'] for r in results if 'error' in r]
+        game.refresh_from_db()
+        seller_sales = User.objects.get(id=seller.id).total_sales - seller_sales_before
+
+        self.stdout.write(f'Elapsed: {elapsed:.2f}s ({purchases / elapsed:.0f} purchases/s)')
+        self.stdout.write(f'Game total_sales: {game.total_sales} (expected {purchases})')
+        self.stdout.write(f'Seller total_sales delta: {seller_sales} (expected {price * purchases})')
+
+        if not options['keep']:
+            Notification.objects.filter(user=seller, data__game_id=game.id).delete()
+            Payment.objects.filter(id__in=payment_ids).delete()
+            game.delete()
+
+        if errors:
+            raise CommandError(f'{len(errors)} purchases failed, e.g. {errors[0]}')
+        if game.total_sales != purchases or seller_sales != price * purchases:
+            raise CommandError('Lost increments detected')
+        self.stdout.write(self.style.SUCCESS('No lost increments'))
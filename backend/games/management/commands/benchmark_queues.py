@@ -0,0 +1,109 @@
+from decimal import Decimal
+import time
+
+from celery import shared_task
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from core.models import Notification
+from games.models import Category, Game
+from games.tasks import process_game_purchase
+from payments.models import Payment
+from samma.celery import app
+
+
+@shared_task(name='benchmark.maintenance_load')
+def maintenance_load(seconds):
+    """
+    Keep a maintenance worker busy; only workers started with
+    ``--include games.management.commands.benchmark_queues`` know this task
+    """
+    time.sleep(seconds)
+    return {'summary': f"Slept {seconds}s"}
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures process_game_purchase latency on idle workers and while the maintenance queue is '
+        'saturated. Needs the broker and a worker per queue (manage.py celery_worker <queue>), the '
+        'maintenance one started with --include games.management.commands.benchmark_queues.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purchases', type=int, default=50, help='Purchases measured in each phase')
+        parser.add_argument('--load-jobs', type=int, default=20, help='Maintenance jobs queued for the loaded phase')
+        parser.add_argument('--load-seconds', type=float, default=10, help='Duration of each maintenance job')
+        parser.add_argument(
+            '--same-queue', action='store_true',
+            help='Send purchases to the maintenance queue, as when everything shared one queue'
+        )
+        parser.add_argument('--timeout', type=float, default=300, help='Seconds to wait for each purchase')
+
+    def handle(self, *args, **options):
+        if app.conf.task_always_eager:
+            raise CommandError('This benchmark needs a broker and running workers.')
+
+        purchases = options['purchases']
+        price = Decimal('9.99')
+        seller, _ = User.objects.get_or_create(
+            username='bench-seller', defaults={'email': 'bench-seller@example.com'}
+        )
+        buyer, _ = User.objects.get_or_create(
+            username='bench-buyer', defaults={'email': 'bench-buyer@example.com'}
+        )
+        category, _ = Category.objects.get_or_create(slug='bench', defaults={'name': 'Bench'})
+        game = Game.objects.create(
+            title='Queue Bench Game', description='Queue benchmark', price=price,
+            seller=seller, category=category
+        )
+        payment_ids = [
+            p.id for p in Payment.objects.bulk_create([
+                Payment(
+                    buyer=buyer, seller=seller, game=game, amount=price,
+                    platform_fee=Decimal('0.50'), seller_amount=price - Decimal('0.50'),
+                    status='completed'
+                )
+                for _ in range(purchases * 2)
+            ])
+        ]
+        route = {'queue': 'maintenance'} if options['same_queue'] else {}
+
+        def measure(ids):
+            latencies = []
+            for payment_id in ids:
+                started = time.perf_counter()
+                process_game_purchase.apply_async((payment_id,), **route).get(timeout=options['timeout'])
+                latencies.append((time.perf_counter() - started) * 1000)
+            return latencies
+
+        load = []
+        try:
+            self.stdout.write(f'Idle: {purchases} purchases...')
+            idle = measure(payment_ids[:purchases])
+
+            self.stdout.write(
+                f'Loaded: {options["load_jobs"]} x {options["load_seconds"]}s maintenance jobs queued, '
+                f'{purchases} purchases...'
+            )
+            load = [
+                maintenance_load.apply_async((options['load_seconds'],), queue='maintenance')
+                for _ in range(options['load_jobs'])
+            ]
+            loaded = measure(payment_ids[purchases:])
+        finally:
+            for result in load:
+                result.revoke()
+            Notification.objects.filter(user=seller, data__game_id=game.id).delete()
+            Payment.objects.filter(id__in=payment_ids).delete()
+            game.delete()
+
+        self.stdout.write(f'{"phase":<8} {"p50 ms":>9} {"p95 ms":>9} {"max ms":>9}')
+        for phase, latencies in (('idle', idle), ('loaded', loaded)):
+            self.stdout.write(
+                f'{phase:<8} {_percentile(latencies, 0.5):>9.1f} '
+                f'{_percentile(latencies, 0.95):>9.1f} {max(latencies):>9.1f}'
+            )
@@ -0,0 +1,81 @@
+from decimal import Decimal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from accounts.models import User
+from core.serializers.fast import values_plan
+from games.models import Category, Game
+from games.serializers.game import GameListSerializer
+from payments.models import Payment
+from payments.serializers.payment import PaymentListSerializer
+
+
+def _cpu_us(func, rounds):
+    """
+    Best CPU time of ``rounds`` calls to ``func``, in microseconds
+    """
+    best = None
+    for _ in range(rounds):
+        started = time.process_time()
+        func()
+        elapsed = (time.process_time() - started) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the CPU time per object of the DRF list serializers with their compiled values() '
+        'plans, database reads included. Benchmark data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objects', type=int, default=1000, help='Games and payments serialized per round')
+        parser.add_argument('--rounds', type=int, default=5, help='Rounds per measurement, the best one counts')
+
+    def handle(self, *args, **options):
+        count = options['objects']
+        request = APIRequestFactory().get('/api/v1/games/')
+        context = {'request': request}
+
+        with transaction.atomic():
+            seller = User.objects.create_user(username='bench-serializer-seller', email='bench-seller@example.com')
+            buyer = User.objects.create_user(username='bench-serializer-buyer', email='bench-buyer@example.com')
+            category = Category.objects.create(name='Bench', slug='bench-serializers', icon='category_icons/bench.png')
+            games = Game.objects.bulk_create([
+                Game(
+                    title=f'Bench Game {i}', slug=f'bench-serializers-{i}', description='Serializer benchmark',
+                    price=Decimal('9.99'), seller=seller, category=category,
+                    thumbnail='game_thumbnails/bench.png', rating=Decimal('7.5')
+                )
+                for i in range(count)
+            ])
+            Payment.objects.bulk_create([
+                Payment(
+                    buyer=buyer, seller=seller, game=game, amount=Decimal('9.99'),
+                    platform_fee=Decimal('0.50'), seller_amount=Decimal('9.49'),
+                    status='completed', completed_at=timezone.now()
+                )
+                for game in games
+            ])
+
+            cases = (
+                ('games', GameListSerializer, Game.objects.filter(seller=seller), ('seller', 'category')),
+                ('payments', PaymentListSerializer, Payment.objects.filter(buyer=buyer),
+                 ('buyer', 'seller', 'game__seller', 'game__category')),
+            )
+            self.stdout.write(f'{"list":<10} {"DRF µs/obj":>11} {"plan µs/obj":>12} {"speedup":>8}')
+            for name, serializer_class, queryset, related in cases:
+                plan = values_plan(serializer_class)
+                drf = _cpu_us(lambda: serializer_class(
+                    list(queryset.select_related(*related)), many=True, context=context
+                ).data, options['rounds'])
+                fast = _cpu_us(lambda: plan.serialize(queryset.values(*plan.columns), context), options['rounds'])
+                self.stdout.write(
+                    f'{name:<10} {drf / count:>11.1f} {fast / count:>12.1f} {drf / fast:>7.1f}x'
+                )
+
+            transaction.set_rollback(True)
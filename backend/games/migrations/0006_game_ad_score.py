@@ -0,0 +1,22 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_alter_game_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='ad_score',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='ad score'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['-ad_score', '-id'], name='games_game_ad_scor_fcba33_idx'),
+        ),
+    ]
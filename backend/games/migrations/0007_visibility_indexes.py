@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_game_ad_score'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='game',
+            name='games_game_ad_scor_fcba33_idx',
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_approved', True)), fields=['-ad_score', '-id'], name='games_visible_ad_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['seller'], name='games_active_seller_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.9 on 2026-10-19 16:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_libraries(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    LibraryEntry = apps.get_model('games', 'LibraryEntry')
+    payments = Payment.objects.filter(status='completed').values_list(
+        'buyer_id', 'game_id', 'completed_at', 'updated_at'
+    )
+    entries = []
+    for buyer_id, game_id, completed_at, updated_at in payments.iterator(chunk_size=5000):
+        entries.append(LibraryEntry(user_id=buyer_id, game_id=game_id, acquired_at=completed_at or updated_at))
+        if len(entries) == 5000:
+            LibraryEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    LibraryEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('games', '0007_visibility_indexes'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acquired_at', models.DateTimeField(verbose_name='acquired at')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_entries', to='games.game', verbose_name='game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'library entry',
+                'verbose_name_plural': 'library entries',
+                'ordering': ['-acquired_at'],
+                'indexes': [models.Index(fields=['user', '-acquired_at', '-id'], name='games_libra_user_id_45c0d8_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='libraryentry',
+            constraint=models.UniqueConstraint(fields=('user', 'game'), name='games_library_user_game_uniq'),
+        ),
+        migrations.RunPython(fill_libraries, migrations.RunPython.noop),
+    ]
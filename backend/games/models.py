@@ -88,6 +88,12 @@ class Game(models.Model):
         _('total sales'),
         default=0
     )
+    ad_score = models.DecimalField(
+        _('ad score'),
+        max_digits=10,
+        decimal_places=2,
+        default=0
+    )
     
     # Relations
     seller = models.ForeignKey(
@@ -147,6 +153,13 @@ class Game(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['slug']),
             models.Index(fields=['seller']),
+            # Keyset pagination of the game list, and the pending games of
+            # sellers, see games.visibility
+            models.Index(
+                fields=['-ad_score', '-id'], name='games_visible_ad_score_idx',
+                condition=models.Q(is_active=True, is_approved=True)
+            ),
+            models.Index(fields=['seller'], name='games_active_seller_idx', condition=models.Q(is_active=True)),
         ]
 
     def __str__(self):
@@ -224,3 +237,37 @@ class GameComment(models.Model):
             game.rating = avg_rating or 0
             game.total_ratings = total_ratings
             game.save()
+
+
+class LibraryEntry(models.Model):
+    """
+    A game a user owns, see games.library
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='library',
+        verbose_name=_('user')
+    )
+    game = models.ForeignKey(
+        Game,
+        on_delete=models.CASCADE,
+        related_name='library_entries',
+        verbose_name=_('game')
+    )
+    acquired_at = models.DateTimeField(_('acquired at'))
+
+    class Meta:
+        verbose_name = _('library entry')
+        verbose_name_plural = _('library entries')
+        ordering = ['-acquired_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game'], name='games_library_user_game_uniq'),
+        ]
+        indexes = [
+            # Keyset pagination of a user's library
+            models.Index(fields=['user', '-acquired_at', '-id']),
+        ]
+
+    def __str__(self):
+        return f'{self.game_id} owned by {self.user_id}'
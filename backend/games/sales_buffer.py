@@ -0,0 +1,81 @@
+"""
+Redis-backed buffer for coalescing purchase counters.
+
+When ``GAME_SALES_BUFFER_ENABLED`` is on, ``process_game_purchase`` increments
+Redis hashes instead of touching the ``Game`` and seller rows directly, and the
+periodic ``flush_game_sales_buffer`` task applies the accumulated deltas with
+one ``UPDATE`` per game/seller. Bursts of sales for a hit game then cost one row
+write per flush instead of one per purchase.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+GAME_SALES_KEY = 'games:sales_buffer:games'
+SELLER_SALES_KEY = 'games:sales_buffer:sellers'
+
+
+def _to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def buffer_sale(game_id, seller_id, amount):
+    """
+    Record one sale of ``game_id`` for ``amount`` in the Redis buffer
+    """
+    pipe = get_redis_connection('default').pipeline()
+    pipe.hincrby(GAME_SALES_KEY, game_id, 1)
+    # Money is buffered as integer cents so HINCRBY stays exact
+    pipe.hincrby(SELLER_SALES_KEY, seller_id, _to_cents(amount))
+    pipe.execute()
+
+
+def _claim(conn, key):
+    """
+    Move the live hash aside and return its contents.
+
+    A leftover ``:processing`` hash from a crashed flush is drained first, so
+    buffered sales are never dropped.
+    """
+    processing = f'{key}:processing'
+    if not conn.exists(processing):
+        try:
+            conn.rename(key, processing)
+        except ResponseError:
+            # Nothing buffered since the last flush
+            return processing, {}
+    return processing, {int(k): int(v) for k, v in conn.hgetall(processing).items()}
+
+
+def flush_sales_buffer():
+    """
+    Apply buffered sales to the database.
+
+    Returns a ``(games, sellers)`` tuple with the number of rows updated.
+    """
+    if not settings.GAME_SALES_BUFFER_ENABLED:
+        # Nothing gets buffered; don't hit Redis on every beat
+        return 0, 0
+
+    User = get_user_model()
+    from games.models import Game
+
+    conn = get_redis_connection('default')
+    game_key, game_counts = _claim(conn, GAME_SALES_KEY)
+    seller_key, seller_cents = _claim(conn, SELLER_SALES_KEY)
+
+    with transaction.atomic():
+        for game_id, count in game_counts.items():
+            Game.objects.filter(id=game_id).update(total_sales=F('total_sales') + count)
+        for seller_id, cents in seller_cents.items():
+            User.objects.filter(id=seller_id).update(
+                total_sales=F('total_sales') + Decimal(cents) / 100
+            )
+
+    conn.delete(game_key, seller_key)
+    return len(game_counts), len(seller_cents)
@@ -1,11 +1,12 @@
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
-from games.models import Game, Category, Tag, GameComment
+from games.models import Game, Category, Tag, GameComment, LibraryEntry
 from accounts.serializers.user import UserSerializer
+from core.serializers.dynamic import DynamicFieldsMixin
 from django.db import models
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Category model
     """
@@ -15,7 +16,7 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'slug')
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Tag model
     """
@@ -25,7 +26,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'slug')
 
 
-class GameCommentSerializer(serializers.ModelSerializer):
+class GameCommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the GameComment model
     """
@@ -39,14 +40,18 @@ class GameCommentSerializer(serializers.ModelSerializer):
             'parent', 'replies', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'user', 'created_at', 'updated_at')
+        expandable_fields = {'game': 'games.serializers.game.GameListSerializer'}
 
     def get_replies(self, obj):
         """
-        Get replies to this comment
+        Get replies to this comment, down the whole thread
         """
-        if obj.replies.exists():
-            return GameCommentSerializer(obj.replies.all(), many=True).data
-        return []
+        # Threads assembled by views (see ``attach_threads``), otherwise all()
+        # rather than exists() so prefetched replies are reused
+        replies = getattr(obj, 'thread_replies', None)
+        if replies is None:
+            replies = obj.replies.all()
+        return GameCommentSerializer(replies, many=True).data if replies else []
 
     def validate_rating(self, value):
         """
@@ -59,7 +64,7 @@ class GameCommentSerializer(serializers.ModelSerializer):
         return value
 
 
-class GameListSerializer(serializers.ModelSerializer):
+class GameListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for listing games with basic information
     """
@@ -81,7 +86,7 @@ class GameListSerializer(serializers.ModelSerializer):
         )
 
 
-class GameDetailSerializer(serializers.ModelSerializer):
+class GameDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for detailed game information
     """
@@ -106,6 +111,18 @@ class GameDetailSerializer(serializers.ModelSerializer):
         )
 
 
+class LibraryEntrySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the games of a user's library
+    """
+    game = GameListSerializer(read_only=True)
+
+    class Meta:
+        model = LibraryEntry
+        fields = ('id', 'game', 'acquired_at')
+        read_only_fields = fields
+
+
 class GameCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating new games
@@ -224,7 +241,7 @@ class GameUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
-class GameStatisticsSerializer(serializers.ModelSerializer):
+class GameStatisticsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for game statistics
     """
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.serializers.user import UserSerializer
+from core.cache import hot_cache, invalidate_namespaces
+from core.conditional import bump_versions
+from core.response_cache import purge
+from games.library import add_to_library, remove_from_library
+from games.models import Game, Category, Tag, GameComment
+from payments.models import Payment
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_game_caches(sender, **kwargs):
+    """
+    Drop cached game representations when catalog data changes
+    """
+    invalidate_namespaces('games')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_hot_catalog(sender, **kwargs):
+    """
+    Evict categories/tags from the two-tier cache in every process
+    """
+    key = 'categories' if sender is Category else 'tags'
+    hot_cache.invalidate(key)
+    # Again after commit, in case a reader re-cached the old rows meanwhile
+    transaction.on_commit(lambda: hot_cache.invalidate(key))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_catalog_version(sender, instance, **kwargs):
+    """
+    Make the ETags of category/tag responses and game details stale, and
+    purge the responses tagged with the row
+    """
+    names = ('categories', f'category:{instance.pk}') if sender is Category else ('tags', f'tag:{instance.pk}')
+    # After commit, so a version is never paired with uncommitted rows
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+@receiver(post_save, sender=GameComment)
+@receiver(post_delete, sender=GameComment)
+def bump_game_version(sender, instance, **kwargs):
+    """
+    Game details include their comments
+    """
+    name = f'game:{instance.game_id}'
+    transaction.on_commit(lambda: bump_versions(name))
+
+
+@receiver(post_save, sender=User)
+def bump_user_version(sender, update_fields=None, **kwargs):
+    """
+    Game details include their seller and commenters; logins only touch
+    ``last_login`` and are skipped
+    """
+    if update_fields is None or set(update_fields) & set(UserSerializer.Meta.fields):
+        transaction.on_commit(lambda: bump_versions('users'))
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def purge_game_responses(sender, instance, **kwargs):
+    """
+    Purge cached responses showing the game or listings it may join
+    """
+    tags = (f'game:{instance.pk}', 'games')
+    transaction.on_commit(lambda: purge(*tags))
+
+
+@receiver(post_save, sender=Payment)
+def update_library(sender, instance, update_fields=None, **kwargs):
+    """
+    Completed payments put the game in the buyer's library, refunds and
+    failures take it out unless another payment still pays for it
+    """
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    if instance.status == 'completed':
+        add_to_library(instance.buyer_id, instance.game_id, instance.completed_at or instance.updated_at)
+    elif instance.status in ('refunded', 'failed') and not Payment.objects.filter(
+        buyer_id=instance.buyer_id, game_id=instance.game_id, status='completed'
+    ).exists():
+        remove_from_library(instance.buyer_id, instance.game_id)
@@ -1,30 +1,69 @@
 from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.db.models import F, Count, Avg
 from django.utils import timezone
+from decimal import Decimal
 from math import log
+from core.batch import batch_update
+from core.cache import invalidate_namespaces
+from core.response_cache import purge
+from core.sharding import fan_out, id_ranges
+from core.singleton import SingletonTask
 from .models import Game
+from .sales_buffer import buffer_sale, flush_sales_buffer
 
+User = get_user_model()
 
-@shared_task
-def update_game_rankings():
+
+@shared_task(base=SingletonTask)
+def update_game_rankings(shard_size=None):
     """
     Update ad scores for all active games based on bid percentage, rating, and comments
+    
+    Tables larger than one shard are recomputed in parallel, see ``core.sharding``,
+    and the lock of this run is held until the shards are finished.
     """
     games = Game.objects.filter(is_active=True, is_approved=True)
+    ranges = id_ranges(games, shard_size or settings.SHARD_SIZE)
+    
+    if len(ranges) > 1:
+        fan_out(
+            update_game_rankings_range, ranges,
+            callback=finish_game_rankings.s() | update_game_rankings.hand_off_lock()
+        )
+        return {'shards': len(ranges), 'summary': f"Dispatched rankings update in {len(ranges)} shards"}
+    return finish_game_rankings([update_game_rankings_range(*shard) for shard in ranges])
+
+
+@shared_task
+def update_game_rankings_range(start_id, end_id):
+    """
+    Update ad scores of the active games with ids in [start_id, end_id)
+    """
+    games = list(
+        Game.objects.filter(is_active=True, is_approved=True, id__gte=start_id, id__lt=end_id)
+        .annotate(comments_count=Count('comments'))
+    )
     
     for game in games:
-        comments_count = game.comments.count()
-        
         # Ad score formula: (bid_percentage * 10) + (rating) + (log(comments_count + 1) * 2)
-        ad_score = (
+        game.ad_score = (
             game.bid_percentage * 10 +  # Bid has the highest weight
             game.rating +               # Rating directly added
-            (log(comments_count + 1) * 2)  # Logarithmic scale for comments
+            Decimal(log(game.comments_count + 1) * 2)  # Logarithmic scale for comments
         )
-        
-        Game.objects.filter(id=game.id).update(ad_score=ad_score)
+    
+    Game.objects.bulk_update(games, ['ad_score'])
+    return len(games)
 
-    return f"Updated rankings for {games.count()} games"
+
+@shared_task
+def finish_game_rankings(results):
+    invalidate_namespaces('games')
+    purge('ranking')
+    rows = sum(results)
+    return {'rows': rows, 'summary': f"Updated rankings for {rows} games"}
 
 
 @shared_task
@@ -35,17 +74,17 @@ def process_game_purchase(payment_id):
     from payments.models import Payment
     
     try:
-        payment = Payment.objects.get(id=payment_id)
+        payment = Payment.objects.select_related('game', 'seller', 'buyer').get(id=payment_id)
         game = payment.game
+        seller = payment.seller
         
-        # Update game statistics
-        game.total_sales = F('total_sales') + 1
-        game.save()
-        
-        # Update seller statistics
-        seller = game.seller
-        seller.total_sales = F('total_sales') + payment.amount
-        seller.save()
+        # Update game and seller statistics with single-column UPDATEs so
+        # concurrent purchases never rewrite (or lose) each other's rows
+        if settings.GAME_SALES_BUFFER_ENABLED:
+            buffer_sale(game.id, seller.id, payment.amount)
+        else:
+            Game.objects.filter(id=game.id).update(total_sales=F('total_sales') + 1)
+            User.objects.filter(id=seller.id).update(total_sales=F('total_sales') + payment.amount)
         
         # Create notification for seller
         from core.models import Notification
@@ -61,15 +100,29 @@ def process_game_purchase(payment_id):
             }
         )
         
-        return f"Successfully processed purchase for game {game.id}"
+        return {'rows': 1, 'summary': f"Successfully processed purchase for game {game.id}"}
     
     except Payment.DoesNotExist:
-        return f"Payment {payment_id} not found"
+        return {'rows': 0, 'error': 'not_found', 'summary': f"Payment {payment_id} not found"}
     except Exception as e:
-        return f"Error processing game purchase: {str(e)}"
+        return {'rows': 0, 'error': str(e), 'summary': f"Error processing game purchase: {str(e)}"}
 
 
-@shared_task
+@shared_task(base=SingletonTask)
+def flush_game_sales_buffer():
+    """
+    Apply sales counters buffered in Redis to games and sellers
+    """
+    games, sellers = flush_sales_buffer()
+    return {
+        'rows': games + sellers,
+        'games': games,
+        'sellers': sellers,
+        'summary': f"Flushed sales buffer for {games} games and {sellers} sellers",
+    }
+
+
+@shared_task(base=SingletonTask)
 def cleanup_inactive_games():
     """
     Clean up games that have been inactive for a long time
@@ -85,30 +138,58 @@ def cleanup_inactive_games():
     )
     
     # Deactivate games
-    count = inactive_games.count()
-    inactive_games.update(is_active=False)
+    result = batch_update(inactive_games, checkpoint='cleanup_inactive_games', is_active=False)
+    # Updated without post_save signals; details are tagged with the ranking
+    purge('games', 'ranking')
     
-    return f"Deactivated {count} inactive games"
+    return dict(result, summary=f"Deactivated {result['rows']} inactive games")
 
 
-@shared_task
-def update_game_statistics():
+@shared_task(base=SingletonTask)
+def update_game_statistics(shard_size=None):
     """
     Update statistics for all games
+    
+    Tables larger than one shard are recomputed in parallel, see ``core.sharding``,
+    and the lock of this run is held until the shards are finished.
     """
     games = Game.objects.filter(is_active=True)
+    ranges = id_ranges(games, shard_size or settings.SHARD_SIZE)
     
-    for game in games:
-        # Update ratings
-        ratings = game.comments.filter(rating__isnull=False).aggregate(
-            avg_rating=Avg('rating'),
-            total_ratings=Count('id')
+    if len(ranges) > 1:
+        fan_out(
+            update_game_statistics_range, ranges,
+            callback=finish_game_statistics.s() | update_game_statistics.hand_off_lock()
         )
-        
-        game.rating = ratings['avg_rating'] or 0
-        game.total_ratings = ratings['total_ratings']
-        
-        # Save the game
-        game.save()
+        return {'shards': len(ranges), 'summary': f"Dispatched statistics update in {len(ranges)} shards"}
+    return finish_game_statistics([update_game_statistics_range(*shard) for shard in ranges])
+
+
+@shared_task
+def update_game_statistics_range(start_id, end_id):
+    """
+    Update ratings of the active games with ids in [start_id, end_id)
+    """
+    games = list(
+        Game.objects.filter(is_active=True, id__gte=start_id, id__lt=end_id)
+        .annotate(avg_rating=Avg('comments__rating'), ratings_count=Count('comments__rating'))
+    )
+    now = timezone.now()
     
-    return f"Updated statistics for {games.count()} games" 
\ No newline at end of file
+    for game in games:
+        game.rating = game.avg_rating or 0
+        game.total_ratings = game.ratings_count
+        # Bumped like save() did, which cleanup_inactive_games takes into account
+        game.updated_at = now
+    
+    Game.objects.bulk_update(games, ['rating', 'total_ratings', 'updated_at'])
+    return len(games)
+
+
+@shared_task
+def finish_game_statistics(results):
+    # bulk_update skips the post_save signals that invalidate these
+    invalidate_namespaces('games')
+    purge('ranking')
+    rows = sum(results)
+    return {'rows': rows, 'summary': f"Updated statistics for {rows} games"}
@@ -0,0 +1,113 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from games.models import Category, Game, GameComment
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    return client
+
+
+@pytest.fixture
+def games(buyer):
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    games = [
+        Game.objects.create(
+            title=f'Game {i}', slug=f'game-{i}', description='Game', price=10, seller=seller,
+            category=category, is_approved=i != 2
+        )
+        for i in range(4)
+    ]
+    for game in games:
+        comment = GameComment.objects.create(game=game, user=buyer, content='Nice', rating=8)
+        GameComment.objects.create(game=game, user=seller, content='Thanks', parent=comment)
+    return games
+
+
+def batch(client, **params):
+    return client.get(reverse('api:games:game-batch'), params)
+
+
+def test_results_follow_request_order(client, games):
+    response = batch(client, slugs='game-3,missing,game-0,game-2,game-3')
+
+    assert response.status_code == 200
+    results = response.data['results']
+    assert [game and game['slug'] for game in results] == ['game-3', None, 'game-0', None, 'game-3']
+    # Unapproved games of other sellers are hidden like in retrieve
+    assert response.data['not_found'] == ['missing', 'game-2']
+    comment = next(comment for comment in results[0]['comments'] if comment['content'] == 'Nice')
+    assert comment['replies'][0]['content'] == 'Thanks'
+
+
+def test_matches_retrieve(client, games):
+    detail = client.get(reverse('api:games:game-detail', kwargs={'slug': 'game-1'})).data
+
+    response = batch(client, ids=f'{games[1].id}')
+
+    assert response.data['results'] == [detail]
+
+
+def test_sellers_see_their_unapproved_games(games):
+    client = APIClient()
+    client.force_authenticate(games[2].seller)
+
+    response = batch(client, ids=f'{games[2].id}')
+
+    assert response.data['results'][0]['slug'] == 'game-2'
+
+
+def test_queries_do_not_grow_with_games(client, games, django_assert_max_num_queries):
+    # Visible rows, games with sellers and categories, comments, replies,
+    # replies of replies
+    with django_assert_max_num_queries(5):
+        response = batch(client, slugs='game-0,game-1,game-3')
+
+    assert len(response.data['results']) == 3
+
+
+def test_cached_details_skip_serialization(client, games, locmem_cache, django_assert_num_queries,
+                                           django_capture_on_commit_callbacks):
+    slugs = 'game-0,game-1'
+    first = batch(client, slugs=slugs)
+
+    with django_assert_num_queries(1):
+        cached = batch(client, slugs=slugs)
+    sparse = batch(client, slugs=slugs, fields='title')
+    with django_capture_on_commit_callbacks(execute=True):
+        GameComment.objects.create(game=games[1], user=games[1].seller, content='New')
+    changed = batch(client, slugs=slugs)
+
+    assert cached.data == first.data
+    assert sparse.data['results'] == [{'title': 'Game 0'}, {'title': 'Game 1'}]
+    assert len(changed.data['results'][1]['comments']) == 3
+    assert changed.data['results'][0] == first.data['results'][0]
+
+
+@pytest.mark.parametrize('params', [{}, {'slugs': 'a', 'ids': '1'}, {'ids': '1,x'}, {'slugs': ','.join('abc')}])
+def test_invalid_requests(client, settings, params):
+    settings.GAME_BATCH_MAX_ITEMS = 2
+
+    assert batch(client, **params).status_code == 400
@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from games.library import owned_game_ids, owns
+from games.models import Category, Game, LibraryEntry
+from payments.models import Payment
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    return client
+
+
+@pytest.fixture
+def games():
+    seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    return [
+        Game.objects.create(
+            title=f'Game {i}', slug=f'game-{i}', description='Game', price=Decimal('9.90'),
+            seller=seller, category=category, ad_score=i
+        )
+        for i in range(3)
+    ]
+
+
+def pay(buyer, game, status='completed'):
+    return Payment.objects.create(
+        buyer=buyer, seller=game.seller, game=game, amount=game.price, platform_fee=Decimal('0.50'),
+        seller_amount=Decimal('9.40'), status=status, completed_at=timezone.now() if status == 'completed' else None
+    )
+
+
+def test_completed_payments_fill_the_library(buyer, games):
+    pay(buyer, games[0])
+    pay(buyer, games[1], status='pending')
+    payment = pay(buyer, games[2])
+    payment.status = 'refunded'
+    payment.save()
+
+    assert list(LibraryEntry.objects.values_list('user', 'game')) == [(buyer.id, games[0].id)]
+
+
+def test_refunds_keep_games_paid_for_twice(buyer, games):
+    pay(buyer, games[0])
+    refunded = pay(buyer, games[0])
+    refunded.status = 'refunded'
+    refunded.save()
+
+    assert owns(buyer, games[0])
+
+
+def test_ownership_is_read_from_the_cache(buyer, games, locmem_cache, django_assert_num_queries,
+                                          django_capture_on_commit_callbacks):
+    pay(buyer, games[0])
+    owned_game_ids(buyer)
+
+    with django_assert_num_queries(0):
+        assert owns(buyer, games[0])
+        assert not owns(buyer, games[1].id)
+    with django_capture_on_commit_callbacks(execute=True):
+        pay(buyer, games[1])
+
+    assert owns(buyer, games[1])
+
+
+def test_library_is_evicted_again_on_commit(buyer, games, locmem_cache, django_capture_on_commit_callbacks):
+    owned_game_ids(buyer)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        pay(buyer, games[0])
+        assert cache.get(f'library:{buyer.id}') is None
+        # Re-cached from a snapshot without the purchase before the commit
+        cache.set(f'library:{buyer.id}', frozenset())
+
+    assert owns(buyer, games[0])
+
+
+def test_library_lists_latest_purchases_first(client, buyer, games):
+    for game in games:
+        pay(buyer, game)
+    other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+    pay(other, games[0])
+    url = reverse('api:games:library')
+
+    first = client.get(url, {'page_size': 2}).data
+    second = client.get(first['next']).data
+
+    slugs = [entry['game']['slug'] for entry in first['results'] + second['results']]
+    assert slugs == ['game-2', 'game-1', 'game-0']
+    assert second['next'] is None
+
+
+def test_game_lists_mark_owned_games(client, buyer, games):
+    pay(buyer, games[1])
+    url = reverse('api:games:game-list')
+
+    results = client.get(url).data['results']
+    sparse = client.get(url, {'fields': 'slug'}).data['results']
+    asked = client.get(url, {'fields': 'slug,is_owned'}).data['results']
+
+    assert [(game['slug'], game['is_owned']) for game in results] == [
+        ('game-2', False), ('game-1', True), ('game-0', False)
+    ]
+    assert sparse[0] == {'slug': 'game-2'}
+    assert asked[1] == {'slug': 'game-1', 'is_owned': True}
+
+
+@pytest.mark.parametrize('stale_cache', [False, True])
+def test_owned_games_cannot_be_bought_again(client, buyer, games, locmem_cache, stale_cache):
+    pay(buyer, games[0])
+    if stale_cache:
+        cache.set(f'library:{buyer.id}', frozenset())
+
+    response = client.post(reverse('api:payments:create-payment'), {'game_slug': games[0].slug})
+
+    assert response.status_code == 400
+    assert 'game_slug' in response.data
@@ -0,0 +1,163 @@
+import pytest
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.db.models.signals import post_init
+from redis.exceptions import ResponseError
+from games.models import Game, Category
+from games.sales_buffer import GAME_SALES_KEY, SELLER_SALES_KEY, flush_sales_buffer
+from games.tasks import process_game_purchase
+from payments.models import Payment
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def seller():
+    return User.objects.create_user(username='seller', email='seller@example.com', password='testpass123')
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='testpass123')
+
+
+@pytest.fixture
+def sold_game(seller):
+    category = Category.objects.create(name='Action')
+    return Game.objects.create(
+        title='Hit Game', description='A hit game', price=Decimal('10.00'),
+        bid_percentage=Decimal('5.00'),
+        seller=seller, category=category
+    )
+
+
+def make_payment(buyer, game):
+    return Payment.objects.create(
+        buyer=buyer, seller=game.seller, game=game,
+        amount=game.price, status='completed'
+    )
+
+
+class TestProcessGamePurchase:
+    def test_increments_sale_counters(self, buyer, sold_game):
+        for _ in range(3):
+            result = process_game_purchase(make_payment(buyer, sold_game).id)
+            assert result['rows'] == 1
+
+        sold_game.refresh_from_db()
+        assert sold_game.total_sales == 3
+        assert User.objects.get(id=sold_game.seller_id).total_sales == Decimal('30.00')
+
+    def test_does_not_overwrite_other_columns(self, buyer, sold_game):
+        payment = make_payment(buyer, sold_game)
+
+        def edit_concurrently(sender, instance, **kwargs):
+            # Another request edits the rows right after the task loaded them
+            if sender is Game and instance.pk == sold_game.id:
+                Game.objects.filter(id=sold_game.id).update(title='Renamed')
+            elif sender is User and instance.pk == sold_game.seller_id:
+                User.objects.filter(id=sold_game.seller_id).update(first_name='Renamed')
+
+        post_init.connect(edit_concurrently, sender=Game)
+        post_init.connect(edit_concurrently, sender=User)
+        try:
+            process_game_purchase(payment.id)
+        finally:
+            post_init.disconnect(edit_concurrently, sender=Game)
+            post_init.disconnect(edit_concurrently, sender=User)
+
+        sold_game.refresh_from_db()
+        assert sold_game.title == 'Renamed'
+        assert sold_game.total_sales == 1
+        assert User.objects.get(id=sold_game.seller_id).first_name == 'Renamed'
+
+    def test_uses_buffer_when_enabled(self, settings, mocker, buyer, sold_game):
+        settings.GAME_SALES_BUFFER_ENABLED = True
+        buffer_sale = mocker.patch('games.tasks.buffer_sale')
+        payment = make_payment(buyer, sold_game)
+
+        process_game_purchase(payment.id)
+
+        buffer_sale.assert_called_once_with(sold_game.id, sold_game.seller_id, payment.amount)
+        sold_game.refresh_from_db()
+        assert sold_game.total_sales == 0
+
+
+class FakeRedis:
+    """
+    The hash commands the sales buffer uses, kept in a dict
+    """
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[str(field).encode()] = str(int(fields.get(str(field).encode(), 0)) + amount).encode()
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def rename(self, key, new_key):
+        if key not in self.hashes:
+            raise ResponseError('no such key')
+        self.hashes[new_key] = self.hashes.pop(key)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+
+class TestFlushSalesBuffer:
+    @pytest.fixture
+    def redis(self, settings, mocker):
+        settings.GAME_SALES_BUFFER_ENABLED = True
+        redis = FakeRedis()
+        mocker.patch('games.sales_buffer.get_redis_connection', return_value=redis)
+        return redis
+
+    def buffer(self, redis, game, count=1):
+        redis.hincrby(GAME_SALES_KEY, game.id, count)
+        redis.hincrby(SELLER_SALES_KEY, game.seller_id, count * 1000)
+
+    def test_applies_and_deletes_buffered_sales(self, redis, sold_game):
+        self.buffer(redis, sold_game, count=2)
+
+        assert flush_sales_buffer() == (1, 1)
+
+        sold_game.refresh_from_db()
+        assert sold_game.total_sales == 2
+        assert User.objects.get(id=sold_game.seller_id).total_sales == Decimal('20.00')
+        assert redis.hashes == {}
+
+    def test_failed_flush_is_retried_from_the_processing_hash(self, redis, sold_game):
+        self.buffer(redis, sold_game, count=2)
+        with mock.patch.object(Game.objects, 'filter', side_effect=DatabaseError('down')):
+            with pytest.raises(DatabaseError):
+                flush_sales_buffer()
+        # Sales made meanwhile start a new live hash
+        self.buffer(redis, sold_game)
+
+        assert redis.hashes[f'{GAME_SALES_KEY}:processing'] == {str(sold_game.id).encode(): b'2'}
+        flush_sales_buffer()
+        sold_game.refresh_from_db()
+        assert sold_game.total_sales == 2
+        assert GAME_SALES_KEY in redis.hashes
+        flush_sales_buffer()
+        sold_game.refresh_from_db()
+        assert sold_game.total_sales == 3
+        assert User.objects.get(id=sold_game.seller_id).total_sales == Decimal('30.00')
+
+    def test_does_nothing_when_disabled(self, redis, settings, sold_game):
+        settings.GAME_SALES_BUFFER_ENABLED = False
+        self.buffer(redis, sold_game)
+
+        assert flush_sales_buffer() == (0, 0)
+        assert GAME_SALES_KEY in redis.hashes
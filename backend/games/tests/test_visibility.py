@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from games.models import Category, Game
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def seller():
+    return User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+
+
+@pytest.fixture
+def games(seller):
+    other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    # Pending games of the seller interleaved with approved ones, and pending
+    # ones of another seller
+    return [
+        Game.objects.create(
+            title=f'Game {i}', slug=f'game-{i}', description='Game', price=10, category=category,
+            seller=seller if i % 3 else other, is_approved=i % 2 == 0, ad_score=i
+        )
+        for i in range(12)
+    ]
+
+
+def list_slugs(client, page_size):
+    """
+    Slugs of every page of the game list, following ``next`` links
+    """
+    slugs = []
+    url = reverse('api:games:game-list')
+    params = {'page_size': page_size}
+    while url:
+        data = client.get(url, params).data
+        slugs.extend(game['slug'] for game in data['results'])
+        url, params = data['next'], None
+    return slugs
+
+
+@pytest.mark.parametrize('page_size', [2, 5, 20])
+def test_sellers_see_their_pending_games_in_order(seller, games, page_size):
+    client = APIClient()
+    client.force_authenticate(seller)
+
+    slugs = list_slugs(client, page_size)
+
+    expected = [game.slug for game in reversed(games) if game.is_approved or game.seller == seller]
+    assert slugs == expected
+
+
+def test_previous_pages_merge_branches_too(seller, games):
+    client = APIClient()
+    client.force_authenticate(seller)
+    url = reverse('api:games:game-list')
+    first = client.get(url, {'page_size': 3}).data
+    second = client.get(first['next']).data
+
+    back = client.get(second['previous']).data
+
+    assert [game['slug'] for game in back['results']] == [game['slug'] for game in first['results']]
+
+
+def test_buyers_only_query_approved_games(games, django_assert_num_queries):
+    buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+    client = APIClient()
+    client.force_authenticate(buyer)
+
+    # Pending games probe, the page, its sellers and categories, the
+    # buyer's library
+    with django_assert_num_queries(5) as queries:
+        slugs = list_slugs(client, 20)
+
+    assert slugs == [game.slug for game in reversed(games) if game.is_approved]
+    assert not any('DISTINCT' in query['sql'] for query in queries.captured_queries)
+
+
+def test_details_of_pending_games_are_for_their_seller(seller, games):
+    url = reverse('api:games:game-detail', kwargs={'slug': games[1].slug})
+    client = APIClient()
+    client.force_authenticate(games[0].seller)
+    hidden = client.get(url)
+    client.force_authenticate(seller)
+
+    response = client.get(url)
+
+    assert hidden.status_code == 404
+    assert response.status_code == 200
@@ -9,6 +9,7 @@ from games.views.api import (
     TopGamesAPIView,
     GameStatisticsAPIView,
     UpdateGameBidAPIView,
+    LibraryAPIView,
 )
 
 app_name = 'games'
@@ -19,11 +20,13 @@ router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'comments', GameCommentViewSet, basename='gamecomment')
 router.register(r'', GameViewSet, basename='game')
 
+# The router's game detail route would capture the paths below as slugs
 urlpatterns = [
-    path('', include(router.urls)),
     path('search/', GameSearchAPIView.as_view(), name='game-search'),
     path('top-games/', TopGamesAPIView.as_view(), name='top-games'),
     path('statistics/<int:pk>/', GameStatisticsAPIView.as_view(), name='game-statistics'),
     path('update-bid/<int:pk>/', UpdateGameBidAPIView.as_view(), name='update-game-bid'),
     path('my-games/', GameViewSet.as_view({'get': 'my_games'}), name='my-games'),
+    path('library/', LibraryAPIView.as_view(), name='library'),
+    path('', include(router.urls)),
 ] 
\ No newline at end of file
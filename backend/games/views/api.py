@@ -1,12 +1,33 @@
+import operator
+from collections import defaultdict
+from functools import reduce
+from itertools import chain
+
 from rest_framework import viewsets, generics, permissions, filters, status
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q, Count, Avg, Sum
+from django.conf import settings
+from django.db.models import Q, Count, Avg, Sum, Prefetch
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
-from games.models import Game, Category, Tag, GameComment
+from core.pagination import AcquiredAtPagination, AdScorePagination
+from core.query_budget import query_budget
+from core.cache import games_cache
+from core.conditional import get_versions, make_etag
+from core.serializers.dynamic import SPARSE_PARAMS, parse_field_tree, sparse_params
+from core.views.mixins import (
+    ConditionalGetMixin,
+    FastListMixin,
+    HotCacheListMixin,
+    ResponseCacheMixin,
+    SparseFieldsetMixin,
+)
+from games.library import annotate_ownership
+from games.models import Game, Category, Tag, GameComment, LibraryEntry
+from games.visibility import visibility_branches, visible_to
 from games.serializers.game import (
     GameListSerializer,
     GameDetailSerializer,
@@ -16,9 +37,50 @@ from games.serializers.game import (
     CategorySerializer,
     TagSerializer,
     GameCommentSerializer,
+    LibraryEntrySerializer,
 )
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
+# Columns that change whenever a game's own fields in its details do
+DETAIL_STATE_COLUMNS = ('id', 'updated_at', 'rating', 'total_ratings', 'total_sales')
+
+
+def game_cache_tags(games, listing=True):
+    """
+    Surrogate keys of a response with serialized ``games``, see
+    ``core.response_cache``; ``listing`` when other games could join them
+    """
+    tags = {'ranking', 'users', 'tags'}
+    if listing:
+        tags.add('games')
+    for game in games:
+        if 'id' in game:
+            tags.add(f"game:{game['id']}")
+        if isinstance(game.get('category'), dict) and 'id' in game['category']:
+            tags.add(f"category:{game['category']['id']}")
+    return sorted(tags)
+
+
+def attach_threads(comments, replies=None):
+    """
+    Set ``thread_replies`` on ``comments`` and on every reply below them, so
+    whole threads serialize without a query per comment. ``replies`` are all
+    the replies on the games of ``comments``; read in one query when omitted.
+    """
+    comments = list(comments)
+    if replies is None:
+        replies = GameComment.objects.filter(
+            game_id__in={comment.game_id for comment in comments}, parent__isnull=False
+        ).select_related('user') if comments else []
+    children = defaultdict(list)
+    for reply in replies:
+        if reply.parent_id is not None:
+            children[reply.parent_id].append(reply)
+    for comment in chain(comments, *children.values()):
+        comment.thread_replies = children.get(comment.pk, [])
+    return comments
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -40,10 +102,40 @@ class IsCommentOwnerOrReadOnly(permissions.BasePermission):
         return obj.user == request.user
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class OwnershipMixin:
+    """
+    Mark the games of list pages with ``is_owned``, answered for the whole
+    page by one lookup of the user's library, see ``games.library``
+    """
+
+    def wants_ownership(self):
+        params = sparse_params(self.request)
+        if params is None:
+            return True
+        if params.get('fields'):
+            return 'is_owned' in parse_field_tree(params['fields'])
+        return 'is_owned' not in parse_field_tree(params.get('omit', ''))
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            # Sparse fieldsets may leave the ids out of the serialized games
+            self.page_game_ids = [game['id'] if isinstance(game, dict) else game.pk for game in page]
+        return page
+
+    def get_paginated_response(self, data):
+        if self.wants_ownership():
+            data = annotate_ownership(self.request.user, data, self.page_game_ids)
+        return super().get_paginated_response(data)
+
+
+class CategoryViewSet(ConditionalGetMixin, SparseFieldsetMixin, HotCacheListMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing category instances.
     """
+    hot_cache_key = 'categories'
+    conditional_versions = ('categories',)
+    cache_max_age = 60
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -55,10 +147,13 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ConditionalGetMixin, SparseFieldsetMixin, HotCacheListMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing tag instances.
     """
+    hot_cache_key = 'tags'
+    conditional_versions = ('tags',)
+    cache_max_age = 60
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -70,11 +165,12 @@ class TagViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class GameViewSet(viewsets.ModelViewSet):
+class GameViewSet(ResponseCacheMixin, ConditionalGetMixin, OwnershipMixin, FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Game.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     lookup_field = 'slug'
     http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
+    pagination_class = AdScorePagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -94,14 +190,12 @@ class GameViewSet(viewsets.ModelViewSet):
         """
         base_queryset = Game.objects.filter(is_active=True)
         
-        if self.action in ['list', 'retrieve']:
-            if self.request.user.is_authenticated:
-                # Show approved games + user's own games
-                return base_queryset.filter(
-                    Q(is_approved=True) | Q(seller=self.request.user)
-                ).distinct()
-            # Show only approved games to anonymous users
-            return base_queryset.filter(is_approved=True)
+        if self.action == 'list':
+            # Approved games + user's own pending ones, paged per branch
+            return base_queryset.filter(reduce(operator.or_, self.keyset_branches))
+        elif self.action in ['retrieve', 'batch']:
+            # Lookups by slug or id, no need to probe for pending games
+            return base_queryset.filter(visible_to(self.request.user))
             
         elif self.action in ['update', 'partial_update', 'destroy']:
             game_slug = self.kwargs.get('slug')
@@ -116,6 +210,39 @@ class GameViewSet(viewsets.ModelViewSet):
         # For other actions, show only user's games
         return base_queryset.filter(seller=self.request.user)
 
+    @cached_property
+    def keyset_branches(self):
+        """
+        Disjoint conditions on the listed games, see ``games.visibility``
+        """
+        return visibility_branches(self.request.user, Game.objects.filter(is_active=True))
+
+    def get_cache_tags(self, response):
+        if self.action == 'list':
+            return game_cache_tags(response.data['results'])
+        if self.action == 'retrieve':
+            return game_cache_tags([response.data], listing=False)
+        if self.action == 'batch':
+            # Missing games may become visible
+            return game_cache_tags([game for game in response.data['results'] if game])
+        return ()
+
+    def get_conditional_state(self):
+        """
+        Details change with the game row, its comments, and the categories
+        and users they nest
+        """
+        if self.action != 'retrieve':
+            return None
+        row = self.get_queryset().filter(slug=self.kwargs['slug']).values_list(*DETAIL_STATE_COLUMNS).first()
+        if row is None:
+            return None
+        state = get_versions('categories', 'users', f'game:{row[0]}')
+        if state is None:
+            return None
+        versions, last_modified = state
+        return (row, versions), max(row[1], last_modified)
+
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
@@ -128,6 +255,87 @@ class GameViewSet(viewsets.ModelViewSet):
         serializer = GameListSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Details of the games listed in ``slugs`` or ``ids`` (comma separated,
+        at most ``GAME_BATCH_MAX_ITEMS``), in request order with None for
+        those that don't exist or aren't visible
+        """
+        field, keys = self.get_batch_keys(request.query_params)
+        states = {
+            row[0]: row[1:]
+            for row in self.get_queryset().filter(**{f'{field}__in': set(keys)})
+            .values_list(field, *DETAIL_STATE_COLUMNS)
+        }
+        details = self.get_batch_details(states.values())
+        results = [details[states[key][0]] if key in states else None for key in keys]
+        return Response({
+            'results': results,
+            'not_found': [key for key in keys if key not in states],
+        })
+
+    def get_batch_keys(self, params):
+        """
+        ``('slug' or 'id', [keys])`` requested in ``params``
+        """
+        if bool(params.get('slugs')) == bool(params.get('ids')):
+            raise ValidationError({'detail': _('Pass either slugs or ids.')})
+        field = 'slug' if params.get('slugs') else 'id'
+        keys = [key.strip() for key in params[f'{field}s'].split(',') if key.strip()]
+        if len(keys) > settings.GAME_BATCH_MAX_ITEMS:
+            raise ValidationError({
+                'detail': _('At most %(count)d games per request.') % {'count': settings.GAME_BATCH_MAX_ITEMS}
+            })
+        if field == 'id':
+            try:
+                keys = [int(key) for key in keys]
+            except ValueError:
+                raise ValidationError({'ids': _('Ids must be integers.')})
+        return field, keys
+
+    def get_batch_details(self, states):
+        """
+        ``{id: representation}`` of the games with ``DETAIL_STATE_COLUMNS``
+        values ``states``. Representations are cached in ``games_cache``
+        under their state and the version counters of what they nest, so
+        stale ones are never read back.
+        """
+        states = list(states)
+        cache_keys = {}
+        versions = get_versions('categories', 'users', *(f'game:{state[0]}' for state in states))
+        if versions is not None:
+            shared = (versions[0]['categories'], versions[0]['users'])
+            # Sparse fieldsets and hosts in absolute URLs change the output
+            variant = (
+                tuple(self.request.query_params.get(param, '') for param in SPARSE_PARAMS),
+                self.request.get_host(),
+            )
+            cache_keys = {
+                state[0]: f"detail:{state[0]}:{make_etag(state, shared, versions[0][f'game:{state[0]}'], variant)}"
+                for state in states
+            }
+        cached = games_cache.get_many(cache_keys.values())
+        details = {
+            game_id: cached[key] for game_id, key in cache_keys.items() if key in cached
+        }
+
+        missing = [state[0] for state in states if state[0] not in details]
+        if missing:
+            queryset = self.filter_queryset(
+                Game.objects.filter(id__in=missing).select_related('seller', 'category')
+                .prefetch_related(Prefetch('comments', queryset=GameComment.objects.select_related('user')))
+            )
+            games = list(queryset)
+            # Every comment of the games is loaded, replies included
+            comments = [comment for game in games for comment in game.comments.all()]
+            attach_threads(comments, replies=comments)
+            fetched = dict(zip((game.id for game in games), self.get_serializer(games, many=True).data))
+            details.update(fetched)
+            if cache_keys:
+                games_cache.set_many({cache_keys[game_id]: data for game_id, data in fetched.items()})
+        return details
+
     @action(detail=True, methods=['post'])
     def approve(self, request, slug=None):
         """
@@ -145,7 +353,8 @@ class GameViewSet(viewsets.ModelViewSet):
         return Response({"status": "game approved"})
 
 
-class GameCommentViewSet(viewsets.ModelViewSet):
+@query_budget(list=6, retrieve=5)
+class GameCommentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing game comments.
     """
@@ -158,9 +367,19 @@ class GameCommentViewSet(viewsets.ModelViewSet):
     parser_classes = [JSONParser, FormParser, MultiPartParser]
 
     def get_queryset(self):
+        queryset = GameComment.objects.select_related('user')
         if self.action == 'list':
-            return GameComment.objects.filter(parent=None).order_by('-created_at')
-        return GameComment.objects.all()
+            return queryset.filter(parent=None).order_by('-created_at')
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return None if page is None else attach_threads(page)
+
+    def get_object(self):
+        comment = super().get_object()
+        attach_threads([comment])
+        return comment
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -175,7 +394,7 @@ class GameCommentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class GameSearchAPIView(generics.ListAPIView):
+class GameSearchAPIView(OwnershipMixin, SparseFieldsetMixin, generics.ListAPIView):
     """
     API view for searching games with advanced filters
     """
@@ -206,13 +425,17 @@ class GameSearchAPIView(generics.ListAPIView):
         return queryset
 
 
-class TopGamesAPIView(generics.ListAPIView):
+class TopGamesAPIView(ResponseCacheMixin, OwnershipMixin, generics.ListAPIView):
     """
     API view for listing top games based on various metrics
     """
     serializer_class = GameListSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_cache_tags(self, response):
+        data = response.data
+        return game_cache_tags(data['results'] if isinstance(data, dict) else data)
+
     def get_queryset(self):
         metric = self.request.query_params.get('metric', 'rating')
         time_frame = self.request.query_params.get('time_frame', 'all')
@@ -278,4 +501,15 @@ class UpdateGameBidAPIView(generics.UpdateAPIView):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
-        return Response(serializer.data) 
\ No newline at end of file
+        return Response(serializer.data) 
+
+class LibraryAPIView(FastListMixin, SparseFieldsetMixin, generics.ListAPIView):
+    """
+    API view listing the games the current user owns, latest first
+    """
+    serializer_class = LibraryEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AcquiredAtPagination
+
+    def get_queryset(self):
+        return LibraryEntry.objects.filter(user=self.request.user).select_related('game__seller', 'game__category')
@@ -0,0 +1,44 @@
+"""
+Which active games a user can see.
+
+Everyone sees approved games, and sellers also see their own while they wait
+for approval. Written as ``is_approved OR seller = ?`` under ``DISTINCT``, that
+rule can't use an index on ``is_approved`` and sorts the whole result before
+the first row comes out. Here it's split into two disjoint branches, each
+backed by a partial index of ``Game``:
+
+* approved: ``(-ad_score, -id) WHERE is_active AND is_approved``
+* pending: ``(seller) WHERE is_active``
+
+Being disjoint and join-free, the branches need no ``DISTINCT`` when OR-ed
+together. Most users have nothing pending, which one probe of the second
+index tells, and only get the approved branch. Otherwise views hand both to
+``KeysetPagination`` as ``keyset_branches``, which reads a page from each in
+index order and merges them, like a ``UNION ALL`` with a ``LIMIT`` per branch.
+"""
+from django.db.models import Q
+
+APPROVED = Q(is_approved=True)
+
+
+def pending(user):
+    return Q(seller=user, is_approved=False)
+
+
+def visible_to(user):
+    """
+    Condition on active games selecting those ``user`` can see
+    """
+    if user is None or not user.is_authenticated:
+        return APPROVED
+    return APPROVED | pending(user)
+
+
+def visibility_branches(user, queryset):
+    """
+    ``visible_to(user)`` as a list of disjoint conditions, without the
+    pending branch if ``user`` has no pending games in ``queryset``
+    """
+    if user is None or not user.is_authenticated or not queryset.filter(pending(user)).exists():
+        return [APPROVED]
+    return [APPROVED, pending(user)]
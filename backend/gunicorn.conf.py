@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration.
+
+Set ``PROMETHEUS_MULTIPROC_DIR`` to a writable directory so every worker
+records metrics there and ``/api/v1/core/metrics/`` reports totals for all
+of them.
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+bind = '0.0.0.0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to the new totals
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
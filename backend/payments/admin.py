@@ -1,3 +1,20 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.admin import LargeTableAdmin
+from payments.models import Payment, Transaction
+
+
+@admin.register(Payment)
+class PaymentAdmin(LargeTableAdmin):
+    list_display = ('id', 'game', 'buyer', 'seller', 'amount', 'status', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('game', 'buyer', 'seller')
+    raw_id_fields = ('buyer', 'seller', 'game')
+
+
+@admin.register(Transaction)
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ('id', 'payment', 'transaction_type', 'amount', 'status', 'created_at')
+    list_filter = ('transaction_type', 'status')
+    list_select_related = ('payment__game',)
+    raw_id_fields = ('payment',)
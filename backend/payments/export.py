@@ -0,0 +1,148 @@
+"""
+Streaming exports of payments and transactions.
+
+Rows are read as flat ``values_list`` tuples from ``iterator()`` (a server-side
+cursor on PostgreSQL) and encoded to CSV or NDJSON ``CHUNK_ROWS`` at a time,
+gzipped on the fly if asked, so memory stays flat however many rows there
+are. ``PaymentExportAPIView`` streams the chunks to the client and the
+``export_to_storage`` task writes them to ``EXPORT_STORAGE``.
+
+That storage is private: files get random names under their owner's id and
+are only handed out by ``PaymentExportDownloadAPIView``, which checks the
+owner and redirects to a URL signed for ``EXPORT_URL_EXPIRES`` seconds (or
+streams the file from local storage).
+"""
+import csv
+import io
+import zlib
+
+import orjson
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+from django.db.models import Q
+
+from payments.models import Payment, Transaction
+
+CHUNK_ROWS = 2000
+
+EXPORTS = {
+    'payments': (Payment, (
+        'id', 'created_at', 'completed_at', 'status', 'game_id', 'game__title',
+        'buyer__username', 'seller__username', 'amount', 'platform_fee', 'seller_amount',
+        'paypal_transaction_id',
+    )),
+    'transactions': (Transaction, (
+        'id', 'created_at', 'payment_id', 'payment__game__title', 'transaction_type',
+        'status', 'amount', 'paypal_transaction_id', 'notes',
+    )),
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_storage():
+    return import_string(settings.EXPORT_STORAGE['BACKEND'])(**settings.EXPORT_STORAGE.get('OPTIONS', {}))
+
+
+def filter_history(queryset, user, params, prefix=''):
+    """
+    Apply the ``role``, ``status``, ``start_date`` and ``end_date`` filters of
+    the payment history; ``prefix`` leads from the queryset's model to
+    ``Payment``
+    """
+    # Filter by role (buyer/seller)
+    role = params.get('role')
+    if role == 'buyer':
+        queryset = queryset.filter(**{f'{prefix}buyer': user})
+    elif role == 'seller':
+        queryset = queryset.filter(**{f'{prefix}seller': user})
+
+    # Filter by status
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    # Filter by date range
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    if start_date:
+        queryset = queryset.filter(created_at__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(created_at__lte=end_date)
+    return queryset
+
+
+def export_rows(kind, user, params):
+    """
+    ``(header, rows)`` of the ``kind`` export: everything for staff, the
+    user's own purchases and sales otherwise
+    """
+    model, columns = EXPORTS[kind]
+    prefix = 'payment__' if model is Transaction else ''
+    queryset = model.objects.all()
+    if not user.is_staff:
+        queryset = queryset.filter(Q(**{f'{prefix}buyer': user}) | Q(**{f'{prefix}seller': user}))
+    queryset = filter_history(queryset, user, params, prefix)
+
+    header = [column.replace('__', '_') for column in columns]
+    rows = queryset.order_by('-created_at', '-id').values_list(*columns).iterator(chunk_size=CHUNK_ROWS)
+    return header, rows
+
+
+def _drain(buffer):
+    data = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def encode_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CHUNK_ROWS == 0:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def encode_ndjson(header, rows):
+    # Datetimes and decimals are left to DjangoJSONEncoder for its format
+    default = DjangoJSONEncoder().default
+    option = orjson.OPT_PASSTHROUGH_DATETIME
+    lines = []
+    for row in rows:
+        lines.append(orjson.dumps(dict(zip(header, row)), default=default, option=option))
+        if len(lines) == CHUNK_ROWS:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(header, rows, fmt, compress=False):
+    """
+    Byte chunks of ``rows`` encoded as ``fmt``
+    """
+    chunks = ENCODERS[fmt](header, rows)
+    return gzip_chunks(chunks) if compress else chunks
@@ -2,10 +2,11 @@ from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 from payments.models import Payment, Transaction
 from accounts.serializers.user import UserSerializer
+from core.serializers.dynamic import DynamicFieldsMixin
 from games.serializers.game import GameListSerializer
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Transaction model
     """
@@ -19,9 +20,10 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = (
             'id', 'payment', 'created_at', 'updated_at'
         )
+        expandable_fields = {'payment': 'payments.serializers.payment.PaymentListSerializer'}
 
 
-class PaymentListSerializer(serializers.ModelSerializer):
+class PaymentListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for listing payments
     """
@@ -39,7 +41,7 @@ class PaymentListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PaymentDetailSerializer(serializers.ModelSerializer):
+class PaymentDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for detailed payment information
     """
@@ -75,6 +77,7 @@ class CreatePaymentSerializer(serializers.ModelSerializer):
         """
         Validate game slug and check if the game exists and is available
         """
+        from games.library import owns
         from games.models import Game
         try:
             game = Game.objects.get(slug=value, is_active=True, is_approved=True)
@@ -82,6 +85,10 @@ class CreatePaymentSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     _("You cannot purchase your own game")
                 )
+            if owns(self.context['request'].user, game, verify=True):
+                raise serializers.ValidationError(
+                    _("You already own this game")
+                )
             return value
         except Game.DoesNotExist:
             raise serializers.ValidationError(
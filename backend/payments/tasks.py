@@ -1,9 +1,20 @@
+import tempfile
+import uuid
 from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.urls import reverse
 from django.utils import timezone
 from django.conf import settings
 import paypalrestsdk
+from core.batch import batch_update
+from core.models import Notification
+from core.singleton import SingletonTask
+from .export import export_chunks, export_rows, export_storage
 from .models import Payment, Transaction
 
+User = get_user_model()
+
 
 # Configure PayPal
 paypalrestsdk.configure({
@@ -13,7 +24,7 @@ paypalrestsdk.configure({
 })
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def process_pending_payments():
     """
     Process all pending payments
@@ -86,10 +97,10 @@ def process_pending_payments():
                 user=payment.buyer
             )
     
-    return f"Processed {processed_count} payments"
+    return {'rows': processed_count, 'summary': f"Processed {processed_count} payments"}
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def process_seller_payments():
     """
     Process payments to sellers for completed transactions
@@ -176,10 +187,10 @@ def process_seller_payments():
                 user=payment.seller
             )
     
-    return f"Processed {processed_count} seller payments"
+    return {'rows': processed_count, 'summary': f"Processed {processed_count} seller payments"}
 
 
-@shared_task
+@shared_task(base=SingletonTask)
 def cleanup_abandoned_payments():
     """
     Clean up abandoned payment records
@@ -194,7 +205,39 @@ def cleanup_abandoned_payments():
     )
     
     # Update their status
-    count = abandoned_payments.count()
-    abandoned_payments.update(status='failed')
+    result = batch_update(abandoned_payments, checkpoint='cleanup_abandoned_payments', status='failed')
     
-    return f"Cleaned up {count} abandoned payments" 
\ No newline at end of file
+    return dict(result, summary=f"Cleaned up {result['rows']} abandoned payments ({result['rows_per_second']} rows/s)") 
+
+
+@shared_task
+def export_to_storage(user_id, kind, fmt, params):
+    """
+    Write a gzipped export to the private export storage and notify the user
+    """
+    user = User.objects.get(id=user_id)
+    header, rows = export_rows(kind, user, params)
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for count, row in enumerate(rows, 1):
+            yield row
+
+    # Spooled through a temporary file, so the upload never holds the export in memory
+    with tempfile.TemporaryFile() as spool:
+        for chunk in export_chunks(header, counted(rows), fmt, compress=True):
+            spool.write(chunk)
+        spool.seek(0)
+        # Unguessable, as the name is all a download link carries
+        name = f'{kind}-{timezone.now():%Y%m%d}-{uuid.uuid4().hex}.{fmt}.gz'
+        path = export_storage().save(f'{user_id}/{name}', File(spool))
+
+    Notification.objects.create(
+        user=user,
+        notification_type='system',
+        title=f'Your {kind} export is ready',
+        message=f'{count} rows exported.',
+        data={'path': path, 'url': reverse('api:payments:payment-export-download', args=[path.split('/')[-1]])}
+    )
+    return {'rows': count, 'path': path, 'summary': f"Exported {count} {kind} to {path}"}
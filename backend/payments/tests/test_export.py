@@ -0,0 +1,148 @@
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import Notification
+from games.models import Category, Game
+from payments import export
+from payments.models import Payment, Transaction
+from payments.tasks import export_to_storage
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def seller():
+    return User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+
+
+@pytest.fixture
+def history(seller, buyer):
+    other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+    category = Category.objects.create(name='Action', slug='action')
+    game = Game.objects.create(title='Game', description='Game', price=10, seller=seller, category=category)
+    payments = [
+        Payment.objects.create(
+            buyer=user, seller=seller if user != seller else other, game=game,
+            amount=Decimal('10.00'), platform_fee=Decimal('1.00'), seller_amount=Decimal('9.00'),
+            status='completed', paypal_transaction_id=f'PAY-{i}'
+        )
+        for i, user in enumerate([buyer, buyer, other])
+    ]
+    Transaction.objects.bulk_create([
+        Transaction(payment=payment, transaction_type='purchase', amount=payment.amount, status='completed')
+        for payment in payments
+    ])
+    return payments
+
+
+def get_export(user, kind, fmt, **kwargs):
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('api:payments:payment-export', kwargs={'kind': kind, 'fmt': fmt})
+    return client.get(url, **kwargs)
+
+
+def test_csv_export_streams_own_history(buyer, history):
+    response = get_export(buyer, 'payments', 'csv')
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+    assert [row['id'] for row in rows] == [str(history[1].id), str(history[0].id)]
+    assert rows[0]['game_title'] == 'Game'
+    assert rows[0]['buyer_username'] == 'buyer'
+    assert rows[0]['amount'] == '10.00'
+
+
+def test_ndjson_export_is_gzipped_when_accepted(buyer, history):
+    response = get_export(buyer, 'transactions', 'ndjson', HTTP_ACCEPT_ENCODING='gzip, br')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert {row['payment_id'] for row in rows} == {history[0].id, history[1].id}
+    assert rows[0]['amount'] == '10.00'
+
+
+def test_export_takes_history_filters(seller, history):
+    response = get_export(seller, 'payments', 'ndjson', data={'role': 'buyer'})
+
+    assert b''.join(response.streaming_content) == b''
+
+
+def test_staff_export_everything(history):
+    staff = User.objects.create_user(username='staff', email='staff@example.com', password='pass', is_staff=True)
+
+    response = get_export(staff, 'payments', 'ndjson')
+
+    assert len(b''.join(response.streaming_content).splitlines()) == 3
+
+
+def test_unknown_export(buyer):
+    assert get_export(buyer, 'users', 'csv').status_code == 404
+    assert get_export(buyer, 'payments', 'xlsx').status_code == 404
+
+
+def test_chunks_hold_a_bounded_number_of_rows(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 2)
+    rows = iter([(i, 'x') for i in range(5)])
+
+    chunks = list(export.encode_ndjson(['id', 'name'], rows))
+
+    assert [chunk.count(b'\n') for chunk in chunks] == [2, 2, 1]
+
+
+def test_async_export_writes_to_storage(settings, tmp_path, seller, buyer, history, mocker):
+    settings.EXPORT_STORAGE = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': str(tmp_path)}
+    }
+    delay = mocker.patch.object(export_to_storage, 'delay', return_value=mocker.Mock(id='task-id'))
+
+    response = get_export(buyer, 'payments', 'csv', data={'async': '1', 'status': 'completed'})
+
+    assert response.status_code == 202
+    assert response.data == {'task_id': 'task-id'}
+    delay.assert_called_once_with(buyer.id, 'payments', 'csv', {'status': 'completed'})
+
+    result = export_to_storage.apply(args=delay.call_args.args).get()
+    assert result['rows'] == 2
+    with export.export_storage().open(result['path']) as exported:
+        assert gzip.decompress(exported.read()).decode().count('\n') == 3
+    notification = Notification.objects.get(user=buyer)
+    assert notification.data['path'] == result['path']
+    assert result['path'].startswith(f'{buyer.id}/')
+
+    client = APIClient()
+    client.force_authenticate(buyer)
+    download = client.get(notification.data['url'])
+    client.force_authenticate(seller)
+    other = client.get(notification.data['url'])
+
+    assert download.status_code == 200
+    assert gzip.decompress(b''.join(download.streaming_content)).decode().count('\n') == 3
+    assert other.status_code == 404
+
+
+def test_async_flag_is_parsed_as_a_boolean(buyer, history, mocker):
+    delay = mocker.patch.object(export_to_storage, 'delay')
+
+    response = get_export(buyer, 'payments', 'csv', data={'async': '0'})
+
+    assert response.status_code == 200
+    delay.assert_not_called()
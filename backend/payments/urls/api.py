@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
 from payments.views.api import (
     PaymentViewSet,
@@ -6,6 +6,8 @@ from payments.views.api import (
     CreatePaymentAPIView,
     PayPalWebhookAPIView,
     PaymentHistoryAPIView,
+    PaymentExportAPIView,
+    PaymentExportDownloadAPIView,
     PaymentStatisticsAPIView,
 )
 
@@ -19,5 +21,10 @@ urlpatterns = [
     path('create-payment/', CreatePaymentAPIView.as_view(), name='create-payment'),
     path('paypal-webhook/', PayPalWebhookAPIView.as_view(), name='paypal-webhook'),
     path('history/', PaymentHistoryAPIView.as_view(), name='payment-history'),
+    path('export/<str:kind>.<str:fmt>', PaymentExportAPIView.as_view(), name='payment-export'),
+    re_path(
+        r'^exports/(?P<name>[\w-]+\.\w+\.gz)$', PaymentExportDownloadAPIView.as_view(),
+        name='payment-export-download'
+    ),
     path('statistics/', PaymentStatisticsAPIView.as_view(), name='payment-statistics'),
 ] + router.urls 
\ No newline at end of file
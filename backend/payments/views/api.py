@@ -1,11 +1,17 @@
-from rest_framework import viewsets, generics, permissions, status
+from rest_framework import viewsets, generics, permissions, serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Q, Count, Sum, Avg
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 import paypalrestsdk
+from core.pagination import EstimatedCountPagination, KeysetPagination
+from core.views.mixins import FastListMixin, SparseFieldsetMixin
+from payments.export import CONTENT_TYPES, EXPORTS, export_chunks, export_rows, export_storage, filter_history
 from payments.models import Payment, Transaction
 from payments.serializers.payment import (
     PaymentListSerializer,
@@ -25,12 +31,13 @@ paypalrestsdk.configure({
 })
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing payment instances.
     """
     queryset = Payment.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = EstimatedCountPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -49,13 +56,14 @@ class PaymentViewSet(viewsets.ModelViewSet):
         return queryset.select_related('buyer', 'seller', 'game')
 
 
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing transaction instances.
     """
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -164,42 +172,82 @@ class PayPalWebhookAPIView(APIView):
         return Response({'status': 'processed'})
 
 
-class PaymentHistoryAPIView(generics.ListAPIView):
+class PaymentHistoryAPIView(FastListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """
     API view for viewing payment history
     """
     serializer_class = PaymentListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
         queryset = Payment.objects.filter(
             Q(buyer=user) | Q(seller=user)
         ).select_related('buyer', 'seller', 'game')
-        
-        # Filter by role (buyer/seller)
-        role = self.request.query_params.get('role')
-        if role == 'buyer':
-            queryset = queryset.filter(buyer=user)
-        elif role == 'seller':
-            queryset = queryset.filter(seller=user)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by date range
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        if start_date:
-            queryset = queryset.filter(created_at__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__lte=end_date)
+        queryset = filter_history(queryset, user, self.request.query_params)
         
         return queryset.order_by('-created_at')
 
 
+class PaymentExportAPIView(APIView):
+    """
+    API view streaming the payment or transaction history as CSV or NDJSON,
+    gzipped for clients accepting it. Staff export everyone's history.
+
+    Takes the filters of the payment history; with ``async=1`` the export is
+    written to private storage by a task instead and the user notified when
+    it's ready.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, kind, fmt):
+        if kind not in EXPORTS or fmt not in CONTENT_TYPES:
+            return Response(
+                {'error': _('Unknown export')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        params = request.query_params.dict()
+
+        if params.pop('async', None) in serializers.BooleanField.TRUE_VALUES:
+            from payments.tasks import export_to_storage
+            task = export_to_storage.delay(request.user.id, kind, fmt, params)
+            return Response({'task_id': task.id}, status=status.HTTP_202_ACCEPTED)
+
+        compress = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        header, rows = export_rows(kind, request.user, params)
+        response = StreamingHttpResponse(
+            export_chunks(header, rows, fmt, compress),
+            content_type=CONTENT_TYPES[fmt]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class PaymentExportDownloadAPIView(APIView):
+    """
+    API view handing an export written by ``export_to_storage`` to its owner,
+    through a freshly signed short-lived URL
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, name):
+        storage = export_storage()
+        path = f'{request.user.id}/{name}'
+        if not storage.exists(path):
+            return Response(
+                {'error': _('Unknown export')},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if isinstance(storage, FileSystemStorage):
+            # Nothing to sign locally; the file is streamed from here
+            return FileResponse(storage.open(path), as_attachment=True, filename=name)
+        return HttpResponseRedirect(storage.url(path))
+
+
 class PaymentStatisticsAPIView(generics.RetrieveAPIView):
     """
     API view for retrieving payment statistics
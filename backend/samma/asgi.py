@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'samma.settings')
 
 application = get_asgi_application()
+
+# Fill the in-process hot cache before serving the first request
+from core.cache import warm_hot_cache  # noqa: E402
+
+warm_hot_cache()
@@ -31,6 +31,10 @@ app.conf.beat_schedule = {
         'task': 'games.tasks.cleanup_inactive_games',
         'schedule': crontab(hour=0, minute=0),  # Daily at midnight
     },
+    'flush-game-sales-buffer': {
+        'task': 'games.tasks.flush_game_sales_buffer',
+        'schedule': 30.0,  # Every 30 seconds
+    },
     
     # Payment tasks
     'process-pending-payments': {
@@ -59,10 +63,6 @@ app.conf.beat_schedule = {
         'task': 'core.tasks.cleanup_old_audit_logs',
         'schedule': crontab(day_of_month=1, hour=4),  # Monthly at 4 AM
     },
-    'clear-expired-cache': {
-        'task': 'core.tasks.clear_expired_cache',
-        'schedule': 43200.0,  # Every 12 hours
-    },
     'send-inactive-user-notifications': {
         'task': 'core.tasks.send_inactive_user_notifications',
         'schedule': crontab(hour=10, minute=0),  # Daily at 10 AM
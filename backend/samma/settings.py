@@ -13,7 +13,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 from dotenv import load_dotenv
+from kombu import Queue
 
 # Load environment variables
 load_dotenv()
@@ -68,6 +70,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',  # Prometheus request metrics
+    'core.middleware.QueryBudgetMiddleware',  # N+1 detection and query budgets
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'debug_toolbar.middleware.DebugToolbarMiddleware',  # Debug Toolbar middleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +79,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',  # Staff profiling via X-Profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # django-allauth middleware
@@ -126,6 +131,11 @@ CACHES = {
     }
 }
 
+# In-process tier of core.cache.hot_cache (seconds / entries); 0 disables it
+HOT_CACHE_LOCAL_TIMEOUT = int(os.getenv('HOT_CACHE_LOCAL_TIMEOUT', 30))
+HOT_CACHE_MAXSIZE = int(os.getenv('HOT_CACHE_MAXSIZE', 1024))
+HOT_CACHE_WARM_ON_START = os.getenv('HOT_CACHE_WARM_ON_START', 'True') == 'True'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -191,6 +201,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# MessagePack is offered to internal consumers when msgpack is installed
+API_MSGPACK_ENABLED = find_spec('msgpack') is not None
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -200,8 +213,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        *(('core.renderers.MessagePackRenderer',) if API_MSGPACK_ENABLED else ()),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'core.renderers.ORJSONParser',
+        *(('core.renderers.MessagePackParser',) if API_MSGPACK_ENABLED else ()),
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ),
@@ -302,11 +321,131 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Celery queues: payment processing never waits behind maintenance or
+# analytics jobs. Lower priority numbers run first within a queue.
+CELERY_TASK_QUEUES = (
+    Queue('payments-critical'),
+    Queue('user-facing'),
+    Queue('maintenance'),
+    Queue('analytics'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'user-facing'
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = {
+    'games.tasks.process_game_purchase': {'queue': 'payments-critical', 'priority': 0},
+    'games.tasks.flush_game_sales_buffer': {'queue': 'payments-critical', 'priority': 3},
+    'payments.tasks.process_pending_payments': {'queue': 'payments-critical', 'priority': 3},
+    'payments.tasks.process_seller_payments': {'queue': 'payments-critical', 'priority': 6},
+    'core.tasks.invalidate_cache_namespaces': {'queue': 'user-facing', 'priority': 2},
+    'core.tasks.cleanup_*': {'queue': 'maintenance'},
+    'core.tasks.send_inactive_user_notifications*': {'queue': 'maintenance'},
+    'games.tasks.cleanup_inactive_games': {'queue': 'maintenance'},
+    'payments.tasks.cleanup_abandoned_payments': {'queue': 'maintenance'},
+    'games.tasks.update_game_rankings*': {'queue': 'analytics'},
+    'games.tasks.update_game_statistics*': {'queue': 'analytics'},
+    'games.tasks.finish_game_*': {'queue': 'analytics'},
+    'core.tasks.update_system_statistics': {'queue': 'analytics'},
+    'payments.tasks.export_to_storage': {'queue': 'analytics'},
+}
+# Redis emulates priorities with one list per step
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Workers reserve one message per process, so a long job never holds
+# others back in its prefetch buffer
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Worker settings per queue, used by ``manage.py celery_worker <queue>``
+CELERY_WORKER_PROFILES = {
+    'payments-critical': {'concurrency': int(os.getenv('CELERY_PAYMENTS_CONCURRENCY', 4)), 'prefetch_multiplier': 1},
+    'user-facing': {'concurrency': int(os.getenv('CELERY_USER_FACING_CONCURRENCY', 4)), 'prefetch_multiplier': 4},
+    'maintenance': {
+        'concurrency': int(os.getenv('CELERY_MAINTENANCE_CONCURRENCY', 2)),
+        'prefetch_multiplier': 1,
+        'max_tasks_per_child': 50,
+    },
+    'analytics': {
+        'concurrency': int(os.getenv('CELERY_ANALYTICS_CONCURRENCY', 2)),
+        'prefetch_multiplier': 1,
+        'max_tasks_per_child': 50,
+    },
+}
+
+# Chunk size and pause (seconds) between chunks for batched cleanup tasks
+MAINTENANCE_BATCH_SIZE = int(os.getenv('MAINTENANCE_BATCH_SIZE', 1000))
+MAINTENANCE_BATCH_SLEEP = float(os.getenv('MAINTENANCE_BATCH_SLEEP', 0.05))
+
+# System health check: per-probe deadline, report cache and sampling period (seconds),
+# threads shared by the probes
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', 2.0))
+HEALTH_CHECK_CACHE_SECONDS = float(os.getenv('HEALTH_CHECK_CACHE_SECONDS', 5.0))
+HEALTH_SAMPLE_INTERVAL = float(os.getenv('HEALTH_SAMPLE_INTERVAL', 5.0))
+HEALTH_PROBE_WORKERS = int(os.getenv('HEALTH_PROBE_WORKERS', 8))
+
+# Clients allowed to scrape the metrics endpoint without a staff session
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+
+# Query budgets: share of requests tracked, repetitions of one query shape
+# reported as N+1, and whether violations raise instead of being logged
+QUERY_BUDGET_SAMPLE_RATE = float(os.getenv('QUERY_BUDGET_SAMPLE_RATE', 0.1))
+QUERY_BUDGET_REPEAT_THRESHOLD = int(os.getenv('QUERY_BUDGET_REPEAT_THRESHOLD', 10))
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE', 'False') == 'True'
+
+# Query log by SQL fingerprint; slower queries are logged with their view
+SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True') == 'True'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_FLUSH_SECONDS = float(os.getenv('SLOW_QUERY_FLUSH_SECONDS', 10))
+
+# Paginated tables estimated to hold more rows than this show the
+# planner's estimate instead of running COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD', 100000))
+
+# Whole-response cache for anonymous GETs, purged by surrogate keys
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Most games the batch endpoint returns per request
+GAME_BATCH_MAX_ITEMS = int(os.getenv('GAME_BATCH_MAX_ITEMS', 50))
+
+# How long a user's owned game ids stay cached; dropped on every purchase
+LIBRARY_CACHE_TIMEOUT = int(os.getenv('LIBRARY_CACHE_TIMEOUT', 3600))
+
+# Rows per shard and shards running at once for full-table recomputations
+SHARD_SIZE = int(os.getenv('SHARD_SIZE', 5000))
+SHARD_MAX_PARALLEL = int(os.getenv('SHARD_MAX_PARALLEL', 8))
+
+# Lease of singleton task locks; renewed every third while the task runs
+SINGLETON_TASK_LEASE = int(os.getenv('SINGLETON_TASK_LEASE', 60))
+# Longest a lock handed off to the subtasks of a run is held for
+SINGLETON_HANDOFF_TIMEOUT = int(os.getenv('SINGLETON_HANDOFF_TIMEOUT', 6 * 3600))
+
+# Celery task history: runs kept per task and for how long
+TASK_MONITOR_RETAIN = int(os.getenv('TASK_MONITOR_RETAIN', 500))
+TASK_MONITOR_TTL = int(os.getenv('TASK_MONITOR_TTL', 7 * 24 * 3600))
+
+# Staff request profiling (X-Profile header); profiles are kept this long
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_TTL = int(os.getenv('PROFILING_TTL', 3600))
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', 0.001))
+
+# Coalesce purchase counters in Redis and flush them periodically
+GAME_SALES_BUFFER_ENABLED = os.getenv('GAME_SALES_BUFFER_ENABLED', 'False') == 'True'
+
 # PayPal settings
 PAYPAL_MODE = os.getenv('PAYPAL_MODE', 'sandbox')  # sandbox or live
 PAYPAL_CLIENT_ID = os.getenv('PAYPAL_CLIENT_ID', '')
 PAYPAL_CLIENT_SECRET = os.getenv('PAYPAL_CLIENT_SECRET', '')
 
+# Private storage of asynchronous payment exports, never served from MEDIA_URL,
+# and how long the download links handed out for them last (seconds)
+EXPORT_STORAGE = {
+    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    'OPTIONS': {'location': os.path.join(BASE_DIR, 'private', 'exports')},
+}
+EXPORT_URL_EXPIRES = int(os.getenv('EXPORT_URL_EXPIRES', 300))
+
 # AWS S3 settings (for production file storage)
 if not DEBUG:
     AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
@@ -317,6 +456,15 @@ if not DEBUG:
     AWS_DEFAULT_ACL = None
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
     STATICFILES_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    EXPORT_STORAGE = {
+        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+        'OPTIONS': {
+            'location': 'private/exports',
+            'default_acl': 'private',
+            'querystring_auth': True,
+            'querystring_expire': EXPORT_URL_EXPIRES,
+        },
+    }
 
 # Security settings
 SECURE_SSL_REDIRECT = False  # Changed for development
@@ -21,6 +21,18 @@ CACHES = {
     }
 }
 
+# Keep the in-process hot cache off so tests never see rows from other tests
+HOT_CACHE_LOCAL_TIMEOUT = 0
+HOT_CACHE_WARM_ON_START = False
+
+# Requests made with force_authenticate() carry no credentials and would be
+# served from the anonymous response cache; its own tests turn it on
+RESPONSE_CACHE_ENABLED = False
+
+# Check every request and fail the test on N+1 queries or budget overruns
+QUERY_BUDGET_SAMPLE_RATE = 1.0
+QUERY_BUDGET_RAISE = True
+
 # Disable celery tasks during testing
 CELERY_ALWAYS_EAGER = True
 CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
@@ -28,6 +40,10 @@ CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
 # Use local storage for testing
 DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'test_media')
+EXPORT_STORAGE = {
+    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    'OPTIONS': {'location': os.path.join(BASE_DIR, 'test_media', 'private', 'exports')},
+}
 
 # REST Framework test settings
 REST_FRAMEWORK = {
@@ -37,6 +53,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),